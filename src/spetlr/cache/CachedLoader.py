@@ -4,12 +4,23 @@ from typing import List, Optional
 import pyspark.sql.functions as f
 from pyspark.sql import DataFrame
 
+from spetlr.delta.delta_log import get_snapshot_version
+from spetlr.delta.merge_builder import DeltaMergeBuilder
+from spetlr.delta.table_metadata import TableMetadataCache
 from spetlr.etl import Loader
 from spetlr.spark import Spark
 
-from ..functions import get_unique_tempview_name
+from .CachedLoaderBatch import CachedLoaderBatch
 from .CachedLoaderParameters import CachedLoaderParameters
 
+# the columns of the reduction, which never clash with the input or the cache
+_PAYLOAD_HASH = "__payload_rowHash"
+_FROM_PAYLOAD = "__fromPayload"
+_CACHE_PREFIX = "__cache_"
+_ACTION = "__action"
+_WRITE = "write"
+_DELETE = "delete"
+
 
 class CachedLoader(Loader):
     """
@@ -29,6 +40,13 @@ class CachedLoader(Loader):
     class ReductionResult:
         to_be_written: DataFrame
         to_be_deleted: DataFrame
+        # the persisted join that both are selected from
+        reduced: DataFrame
+
+        def count_written(self) -> int:
+            """The number of rows to be written, counted on the persisted join,
+            which is materialized for both branches by the same job."""
+            return self.reduced.filter(f"{_ACTION} = '{_WRITE}'").count()
 
     def __init__(self, params: CachedLoaderParameters):
         super().__init__()
@@ -90,11 +108,18 @@ class CachedLoader(Loader):
         df = df.dropDuplicates(self.params.key_cols)
 
         cache = self._extract_cache()
+        if self.params.prune_cache:
+            cache = self._prune_cache(cache, df)
 
         result = self._discard_non_new_rows_against_cache(df, cache)
+        try:
+            self._save_reduced(result, in_cols)
+        finally:
+            result.reduced.unpersist()
 
+    def _save_reduced(self, result: ReductionResult, in_cols: List[str]) -> None:
         if self.params.do_nothing_if_more_rows_than is not None:
-            if result.to_be_written.count() > self.params.do_nothing_if_more_rows_than:
+            if result.count_written() > self.params.do_nothing_if_more_rows_than:
                 self.too_many_rows()
                 return
 
@@ -108,7 +133,14 @@ class CachedLoader(Loader):
             self._load_cache(df_written_cache_update)
 
         # delete branch
-        df_deleted = self.delete_operation(result.to_be_deleted)
+        # a pruned cache cannot show deleted rows, see delete_missing
+        if not self.params.prune_cache:
+            self._delete(result.to_be_deleted)
+
+        return
+
+    def _delete(self, to_be_deleted: DataFrame) -> None:
+        df_deleted = self.delete_operation(to_be_deleted)
         if df_deleted:
             df_deleted_cache_update = self._prepare_deleted_cache_update(df_deleted)
 
@@ -116,17 +148,60 @@ class CachedLoader(Loader):
             # this method is called a again separately in order to ensure that the
             # written cache is saved even if the delete operation fails.
 
-        return
+    def delete_missing(self, df: DataFrame) -> None:
+        """Pass the cached rows whose keys are not in the full data set df on to
+        delete_operation. Use this on a separate schedule with prune_cache,
+        where save() does not detect deleted rows."""
+        key_cols = self.params.key_cols
+        keys = (
+            df.select(*key_cols)
+            .filter(" AND ".join(f"({col} is NOT NULL)" for col in key_cols))
+            .distinct()
+        )
+        self._delete(self._extract_cache().join(keys, key_cols, "left_anti"))
+
+    def _prune_cache(self, cache: DataFrame, df: DataFrame) -> DataFrame:
+        """Restrict the cache to the range of each key column in df. The literal
+        ranges let Delta skip the files of the cache table outside of them."""
+        key_cols = self.params.key_cols
+        row = df.agg(
+            *[f.min(col).alias(f"min_{i}") for i, col in enumerate(key_cols)],
+            *[f.max(col).alias(f"max_{i}") for i, col in enumerate(key_cols)],
+        ).collect()[0]
+        for i, col in enumerate(key_cols):
+            low, high = row[f"min_{i}"], row[f"max_{i}"]
+            if low is None:
+                # no keys at all, so nothing in the cache can match
+                return cache.filter(f.lit(False))
+            cache = cache.filter(f.col(col).between(f.lit(low), f.lit(high)))
+        return cache
+
+    def _get_cache_version(self) -> int:
+        """The current version of the cache table, from the transaction log
+        if it can be accessed directly, otherwise from the table history."""
+        location = TableMetadataCache().get(self.params.cache_table_name).location
+        version = get_snapshot_version(location) if location else None
+        if version is None:
+            version = (
+                Spark.get()
+                .sql(f"DESCRIBE HISTORY {self.params.cache_table_name} LIMIT 1")
+                .select("version")
+                .take(1)[0][0]
+            )
+        return version
 
     def _extract_cache(self) -> DataFrame:
         # here we fix the version,
         # so we don't overwrite the cache before we might want to use it.
-        version = (
-            Spark.get()
-            .sql(f"DESCRIBE HISTORY {self.params.cache_table_name} LIMIT 1")
-            .select("version")
-            .take(1)[0][0]
-        )
+        # In a batch, all loaders use the version taken by the first one.
+        batch = CachedLoaderBatch.get_active(self.params.cache_table_name)
+        if batch is not None:
+            if batch.version is None:
+                batch.version = self._get_cache_version()
+            version = batch.version
+        else:
+            version = self._get_cache_version()
+
         cache = Spark.get().sql(
             f"SELECT * FROM {self.params.cache_table_name} VERSION AS OF {version}"
             f" WHERE {self.params.deletedTime} IS NULL"
@@ -156,25 +231,16 @@ class CachedLoader(Loader):
         )
 
     def _load_cache(self, cache_to_load: DataFrame) -> None:
-        view_name = get_unique_tempview_name()
-
-        merge_sql_statement = (
-            f"MERGE INTO {self.params.cache_table_name} AS target "
-            f"USING {view_name} as source "
-            f"ON "
-            + (
-                " AND ".join(
-                    f"(source.{col} = target.{col})" for col in self.params.key_cols
-                )
-            )
-            +
-            # update existing records
-            "WHEN MATCHED THEN UPDATE SET * "
-            # insert new records.
-            "WHEN NOT MATCHED THEN INSERT * "
+        batch = CachedLoaderBatch.get_active(self.params.cache_table_name)
+        if batch is not None:
+            # merged together with the other loaders when the batch ends
+            batch.add(cache_to_load)
+            return
+
+        # update existing records and insert new records.
+        DeltaMergeBuilder(self.params.cache_table_name, self.params.key_cols).execute(
+            cache_to_load
         )
-        cache_to_load.createOrReplaceTempView(view_name)
-        Spark.get().sql(merge_sql_statement)
 
     def _discard_non_new_rows_against_cache(
         self, df_in: DataFrame, cache: DataFrame
@@ -188,58 +254,66 @@ class CachedLoader(Loader):
              - are present in the cache but not in the data
         """
         in_cols = df_in.columns
+        key_cols = self.params.key_cols
 
         # ensure no null keys:
-        df_in = df_in.filter(
-            " AND ".join(f"({col} is NOT NULL)" for col in self.params.key_cols)
-        )
+        df_in = df_in.filter(" AND ".join(f"({col} is NOT NULL)" for col in key_cols))
 
         # prepare hash of row
-        df_hashed = df_in.withColumn("rowHash", f.hash("*"))
+        df_hashed = df_in.withColumn(_PAYLOAD_HASH, f.hash("*"))
 
         # add a column to distinguish rows after the join
-        df_hashed = df_hashed.withColumn("fromPayload", f.lit(True))
+        df_hashed = df_hashed.withColumn(_FROM_PAYLOAD, f.lit(True))
+
+        # the cache columns are renamed, so that they cannot clash with the payload
+        cache_columns = cache.columns
+        cache = cache.select(
+            *key_cols,
+            *[
+                f.col(col).alias(_CACHE_PREFIX + col)
+                for col in cache.columns
+                if col not in key_cols
+            ],
+        )
 
-        # join with cache
-        joined_df = (
-            df_hashed.alias("df")
-            .join(cache.alias("cache"), self.params.key_cols, "full")
-            .cache()
+        # Join with the cache once, and tag every row with what to do with it.
+        # Only the tagged rows are persisted, so the write and delete branches,
+        # and the row count guard, are all served by the same materialization.
+        action = (
+            f.when(f.col(_FROM_PAYLOAD).isNull(), f.lit(_DELETE))
+            # either the row has never been loaded before
+            .when(f.col(_CACHE_PREFIX + self.params.loadedTime).isNull(), f.lit(_WRITE))
+            # or it has changed wrt the previous load
+            .when(
+                f.col(_PAYLOAD_HASH) != f.col(_CACHE_PREFIX + self.params.rowHash),
+                f.lit(_WRITE),
+            )
+        )
+        reduced = (
+            # A pruned cache cannot show deleted rows, so a left join suffices.
+            # It lets Spark prune the cache scan further by a runtime bloom filter.
+            df_hashed.join(
+                cache, key_cols, "left" if self.params.prune_cache else "full"
+            )
+            .withColumn(_ACTION, action)
+            .filter(f.col(_ACTION).isNotNull())
+            .drop(_PAYLOAD_HASH, _FROM_PAYLOAD)
+            .persist()
         )
 
         result = self.ReductionResult()
+        result.reduced = reduced
 
-        # rows coming from the original df will have a non-null fromPayload column
-        result.to_be_written = (
-            joined_df.filter("fromPayload IS NOT NULL")
-            .filter(
-                # either the row has never been loaded before
-                (f.col(f"cache.{self.params.loadedTime}").isNull())
-                # or it has changed wrt the previous load
-                | (
-                    f.col(f"df.{self.params.rowHash}")
-                    != f.col(f"cache.{self.params.rowHash}")
-                )
-            )
-            .select(
-                *self.params.key_cols,
-                *[f"df.{c}" for c in in_cols if c not in self.params.key_cols],
-            )
+        result.to_be_written = reduced.filter(f.col(_ACTION) == _WRITE).select(
+            *key_cols, *[c for c in in_cols if c not in key_cols]
         )
 
-        # cached rows with no incoming match will have a null fromPayload column
-        if Spark.version() > Spark.DATABRICKS_RUNTIME_9_1:
-            # from databricks 10.4 this returns all columns, including key columns.
-            # specifying key columns again causes them to be present twice in the
-            # data frame
-            result.to_be_deleted = joined_df.filter("fromPayload IS NULL").select(
-                "cache.*"
-            )
-        else:
-            # up to databricks 9.1 the key columns need to be selected separately,
-            # since they are not returned by the cache.*
-            result.to_be_deleted = joined_df.filter("fromPayload IS NULL").select(
-                *self.params.key_cols, "cache.*"
-            )
+        # the deleted rows have the columns of the cache, in the order of the cache
+        result.to_be_deleted = reduced.filter(f.col(_ACTION) == _DELETE).select(
+            *[
+                col if col in key_cols else f.col(_CACHE_PREFIX + col).alias(col)
+                for col in cache_columns
+            ]
+        )
 
         return result
@@ -0,0 +1,85 @@
+from contextvars import ContextVar
+from functools import reduce
+from typing import List, Optional
+
+import pyspark.sql.functions as f
+from pyspark.sql import DataFrame, Window
+
+from spetlr.delta.merge_builder import DeltaMergeBuilder
+
+from .CachedLoaderParameters import CachedLoaderParameters
+
+_active_batches: ContextVar[tuple] = ContextVar(
+    "spetlr_cached_loader_batches", default=()
+)
+
+_SEQUENCE = "__batch_sequence"
+
+
+class CachedLoaderBatch:
+    """
+    Lets several CachedLoaders over the same cache table share one snapshot of the
+    cache, and one MERGE of all their cache updates, while the batch is active:
+
+        with CachedLoaderBatch(params):
+            loader1.save(df1)
+            loader2.save(df2)
+
+    The snapshot version is taken by the first loader. The cache updates are merged
+    when the batch ends, also if a loader failed, so that the rows that were written
+    before the failure are kept in the cache. If several updates have the same key,
+    the last one is merged. The updates are small, since they only hold the
+    cache columns, and stay persisted until the batch ends.
+    """
+
+    def __init__(self, params: CachedLoaderParameters):
+        self.cache_table_name = params.cache_table_name
+        self.key_cols = params.key_cols
+        self.version: Optional[int] = None
+        self._updates: List[DataFrame] = []
+
+    @staticmethod
+    def get_active(cache_table_name: str) -> Optional["CachedLoaderBatch"]:
+        for batch in reversed(_active_batches.get()):
+            if batch.cache_table_name == cache_table_name:
+                return batch
+        return None
+
+    def __enter__(self) -> "CachedLoaderBatch":
+        self._token = _active_batches.set(_active_batches.get() + (self,))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _active_batches.reset(self._token)
+        self.flush()
+
+    def add(self, cache_update: DataFrame) -> None:
+        """Collect a cache update, to be merged when the batch ends.
+        The update is materialized right away, so that the merge neither
+        recomputes the reduction of the loader against the cache, nor sees
+        other rows than those that were written."""
+        cache_update = cache_update.withColumn(
+            _SEQUENCE, f.lit(len(self._updates))
+        ).persist()
+        cache_update.count()
+        self._updates.append(cache_update)
+
+    def flush(self) -> None:
+        """Merge all collected cache updates into the cache table."""
+        if not self._updates:
+            return
+        updates, self._updates = self._updates, []
+
+        # keep the last update of each key
+        last = Window.partitionBy(*self.key_cols).orderBy(f.col(_SEQUENCE).desc())
+        merged = (
+            reduce(lambda a, b: a.unionByName(b), updates)
+            .withColumn("__row_number", f.row_number().over(last))
+            .filter(f.col("__row_number") == 1)
+            .drop("__row_number", _SEQUENCE)
+        )
+        try:
+            DeltaMergeBuilder(self.cache_table_name, self.key_cols).execute(merged)
+        finally:
+            for update in updates:
+                update.unpersist()
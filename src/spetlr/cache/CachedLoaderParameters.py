@@ -11,6 +11,7 @@ class CachedLoaderParameters:
         cache_id_cols: List[str] = None,
         *,
         do_nothing_if_more_rows_than: int = None,
+        prune_cache: bool = False,
     ):
         """
         Args:
@@ -21,6 +22,10 @@ class CachedLoaderParameters:
             do_nothing_if_more_rows_than: if the input data set contains more rows than
                the specified number of rows, nothing will be written or deleted.
                Instead, the method too_many_rows() will be called.
+            prune_cache: only read the part of the cache that can contain the keys
+               of the input data set. Deleted rows cannot be detected in this way,
+               so save() does not call delete_operation(). Instead, call
+               delete_missing() with the full data set on a separate schedule.
 
         The table cache_table_name must exist and must have the following schema:
         (
@@ -42,3 +47,4 @@ class CachedLoaderParameters:
         self.loadedTime = "loadedTime"
         self.deletedTime = "deletedTime"
         self.do_nothing_if_more_rows_than = do_nothing_if_more_rows_than
+        self.prune_cache = prune_cache
@@ -2,7 +2,7 @@ import argparse
 
 from spetlr.exceptions.cli_exceptions import SpetlrCliException
 
-from . import generate_keys_file
+from . import compile_bundle, generate_keys_file
 
 
 class ConfiguratorCli:
@@ -39,11 +39,19 @@ class ConfiguratorCli:
             The option -o has the side-effect of return an exit code 1 if the file was
             updated. This allows you to check for a correctly updated keys file in your
             CICD pipleine.
+
+        - compile-bundle -o output_file [-c]
+            Compiles all resource paths that were added to the configurator into a
+            single bundle file. Load it with .use_bundle(output_file) before adding
+            the resource paths to skip parsing the yaml and sql files at startup.
+            Files that changed since the bundle was compiled are parsed as usual.
+            The option -c only checks that the bundle file is up to date.
         """
         parser = argparse.ArgumentParser()
         subp = parser.add_subparsers(help="actions")
 
         generate_keys_file.setup_parser(subp.add_parser("generate-keys-file"))
+        compile_bundle.setup_parser(subp.add_parser("compile-bundle"))
         # add further parsers here
 
         options = parser.parse_args()
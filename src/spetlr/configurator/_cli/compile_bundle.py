@@ -0,0 +1,52 @@
+import argparse
+import os.path
+
+from spetlr.exceptions.cli_exceptions import SpetlrCliCheckFailed
+from spetlr.exceptions.configurator_exceptions import SpetlrConfiguratorException
+
+
+def setup_parser(parser: argparse.ArgumentParser):
+    parser.set_defaults(func=compile_bundle)
+    parser.add_argument("-o", "--output-file", type=str, required=True)
+    parser.add_argument(
+        "-c",
+        "--check-only",
+        dest="check",
+        action="store_true",
+        help="Only check, don't update the output file",
+    )
+    parser.set_defaults(check=False)
+
+
+def compile_bundle(options):
+    """Compile the resource paths of the configurator into a bundle file.
+    The arguments are as follows:
+        - options is a SimpleNamespace, expected to contain these attributes
+            - output_file - str - the name of the bundle file
+            - check True/False, don't compile the file, verify an existing one.
+    """
+    from spetlr import Configurator  # prevent circular import
+    from spetlr.configurator.bundle import ConfigurationBundle
+
+    bundle = Configurator().compile_bundle()
+
+    output_file = options.output_file.replace("\\", "/")
+
+    if not options.check:
+        bundle.save(output_file)
+        return
+
+    if not os.path.exists(output_file):
+        raise SpetlrCliCheckFailed(f"Output file {output_file} does not exist.")
+
+    try:
+        old_bundle = ConfigurationBundle.load(output_file)
+    except SpetlrConfiguratorException:
+        old_bundle = None
+    if old_bundle != bundle:
+        raise SpetlrCliCheckFailed(
+            f"Output file {output_file} does not have correct contents."
+        )
+
+    # all checks passed. Return without error.
+    return
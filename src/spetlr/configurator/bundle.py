@@ -0,0 +1,80 @@
+import pickle
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from spetlr.configurator.resources import (
+    EXTENSIONS,
+    get_resource_hashes,
+    get_resource_name,
+    parse_resource,
+)
+from spetlr.exceptions.configurator_exceptions import SpetlrConfiguratorException
+
+
+@dataclass
+class BundledResource:
+    """The parsed details of one resource path, and the hashes of its files."""
+
+    hashes: Dict[str, str]
+    details: List[Tuple[str, Any]]
+
+
+@dataclass
+class ConfigurationBundle:
+    """
+    The pre-parsed contents of the resource paths of a Configurator,
+    so that yaml and sql files do not need to be parsed at every startup.
+
+    Every resource path is stored with the sha256 of each of its files. The
+    bundled details are only used while the files still have the same contents.
+    """
+
+    version = 1
+
+    resources: Dict[Tuple[str, str], BundledResource] = field(default_factory=dict)
+
+    def add(self, kind: str, resource_path: Union[str, ModuleType]) -> None:
+        """Parse the resource path and add its details to the bundle."""
+        self.resources[(kind, get_resource_name(resource_path))] = BundledResource(
+            hashes=get_resource_hashes(resource_path, EXTENSIONS[kind]),
+            details=parse_resource(kind, resource_path),
+        )
+
+    def get(
+        self, kind: str, resource_path: Union[str, ModuleType]
+    ) -> Optional[List[Tuple[str, Any]]]:
+        """The bundled details of the resource path,
+        or None if it is not bundled or its files have changed."""
+        bundled = self.resources.get((kind, get_resource_name(resource_path)))
+        if bundled is None:
+            return None
+        if bundled.hashes != get_resource_hashes(resource_path, EXTENSIONS[kind]):
+            return None
+        return bundled.details
+
+    def dumps(self) -> bytes:
+        return pickle.dumps((self.version, self.resources))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "ConfigurationBundle":
+        """Only load bundles from trusted sources,
+        since they are unpickled."""
+        try:
+            version, resources = pickle.loads(data)
+        except Exception as e:
+            raise SpetlrConfiguratorException("Invalid configuration bundle.") from e
+        if version != cls.version:
+            raise SpetlrConfiguratorException(
+                f"Unsupported configuration bundle version {version}."
+            )
+        return cls(resources)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(self.dumps())
+
+    @classmethod
+    def load(cls, path: str) -> "ConfigurationBundle":
+        with open(path, "rb") as f:
+            return cls.loads(f.read())
@@ -1,15 +1,24 @@
-import importlib.resources
+import copy
+import itertools
+import threading
 import uuid
-from pathlib import Path
+import warnings
+from contextlib import contextmanager
+from functools import lru_cache
 from string import Formatter
 from types import ModuleType
-from typing import Any, Dict, Set, Union
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple, Union
 
-import yaml
 from deprecated import deprecated
 
 from spetlr.configurator._cli.ConfiguratorCli import ConfiguratorCli
-from spetlr.configurator.sql import _parse_sql_to_config
+from spetlr.configurator.bundle import ConfigurationBundle
+from spetlr.configurator.resources import (
+    SQL_RESOURCE,
+    YAML_RESOURCE,
+    get_resource_name,
+    parse_resources,
+)
 from spetlr.exceptions import NoSuchValueException
 from spetlr.functions import json_hash
 
@@ -18,6 +27,17 @@ TcDetails = Dict[str, Union[str, "TcDetails"]]
 TcValue = Union[str, TcDetails]
 
 
+# a process wide counter, so that a version is never repeated, not even after
+# the configurations are cleared
+_versions = itertools.count()
+
+
+@lru_cache(maxsize=None)
+def _get_format_keys(raw_string: str) -> FrozenSet[str]:
+    """All keys used in the raw_string, such as using {MyDb} will get "MyDb"."""
+    return frozenset(i[1] for i in Formatter().parse(raw_string) if i[1] is not None)
+
+
 class ConfiguratorSingleton(type):
     """The reason that we do not use spetlr.singleton here,
     is that the behavior of that metaclass depends on the classname.
@@ -39,20 +59,46 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
     _unique_id: str
     _raw_resource_details: TcDetails
     _is_debug: bool
+    _version: int
 
     # this dict contains all details for all resources
     table_details: Dict[str, str]
 
+    # Resolved properties are cached together with the raw keys that were read to
+    # resolve them. When a key is registered, only the cached properties and details
+    # that depend on that key are invalidated.
+    _resolved: Dict[Tuple[str, str], Tuple[Any, FrozenSet[str]]]
+    _resolved_dependents: Dict[str, Set[Tuple[str, str]]]
+    _details_by_key: Dict[str, Dict[str, str]]
+    _details_dependents: Dict[str, Set[str]]
+    _stale_details: Set[str]
+
+    # attribute -> value -> {key: registration position} of all raw items,
+    # built by the first lookup through key_of or keys_where.
+    _value_index: Optional[Dict[str, Dict[Any, Dict[str, int]]]]
+    _key_positions: Dict[str, int]
+
+    # the resource paths that were added, and the bundle to load them from
+    _resource_paths: List[Tuple[str, Union[str, ModuleType]]]
+    _bundle: Optional[ConfigurationBundle]
+
     def __init__(
         self,
         resource_path: Union[str, ModuleType] = None,
     ):
         self._unique_id = uuid.uuid4().hex
+        self._local = threading.local()
         self.clear_all_configurations()
 
         if resource_path:
             self.add_resource_path(resource_path)
 
+    def get_version(self) -> int:
+        """A number that changes whenever a value is registered, cleared,
+        or the debug mode changes. Use it to invalidate your own caches
+        of resolved values."""
+        return self._version
+
     def all_keys(self):
         """All keys that appear in the configuration files."""
         return list(self._raw_resource_details.keys())
@@ -60,7 +106,10 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
     def clear_all_configurations(self):
         self._raw_resource_details = dict()
         self._is_debug = False
-        self.table_details = dict()
+        self._clear_caches()
+        self._clear_value_index()
+        self._resource_paths = []
+        self._bundle = None
         self._set_extras()
 
     def verify_consistency(self):
@@ -69,6 +118,99 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
         self.table_details = dict()
         return self.get_all_details()
 
+    ############################################
+    # resolution cache
+    ############################################
+
+    def _clear_caches(self):
+        self._version = next(_versions)
+        self.table_details = dict()
+        self._resolved = dict()
+        self._resolved_dependents = dict()
+        self._details_by_key = dict()
+        self._details_dependents = dict()
+        self._stale_details = set()
+
+    def _invalidate(self, key: str) -> None:
+        """Forget everything that was resolved using the raw value of the key."""
+        self._version = next(_versions)
+        for cache_key in self._resolved_dependents.pop(key, ()):
+            self._resolved.pop(cache_key, None)
+        self._stale_details |= self._details_dependents.pop(key, set())
+        self._stale_details.add(key)
+
+    ############################################
+    # reverse index of attribute values
+    ############################################
+
+    def _clear_value_index(self):
+        self._value_index = None
+        self._key_positions = dict()
+        self._positions = itertools.count()
+
+    def _get_value_index(self) -> Dict[str, Dict[Any, Dict[str, int]]]:
+        if self._value_index is None:
+            self._value_index = dict()
+            for key in self._raw_resource_details.keys():
+                self._index_key(key)
+        return self._value_index
+
+    def _index_key(self, key: str) -> None:
+        if key not in self._key_positions:
+            self._key_positions[key] = next(self._positions)
+        value = self._raw_resource_details[key]
+        if not isinstance(value, dict):
+            return
+        for attribute, attribute_value in value.items():
+            try:
+                by_value = self._value_index.setdefault(attribute, dict())
+                by_value.setdefault(attribute_value, dict())[key] = self._key_positions[
+                    key
+                ]
+            except TypeError:
+                # unhashable values, like lists, are not indexed
+                continue
+
+    def _unindex_key(self, key: str) -> None:
+        value = self._raw_resource_details.get(key)
+        if not isinstance(value, dict):
+            return
+        for attribute, attribute_value in value.items():
+            try:
+                matches = self._value_index[attribute][attribute_value]
+            except (KeyError, TypeError):
+                continue
+            matches.pop(key, None)
+            if not matches:
+                del self._value_index[attribute][attribute_value]
+
+    def _dependency_stack(self) -> List[Set[str]]:
+        # the stack is per thread, since the configurator is a shared singleton
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    @contextmanager
+    def _collect_dependencies(self) -> Iterator[Set[str]]:
+        """Collect all raw keys that are read inside the context.
+        The keys are also added to any enclosing collection."""
+        stack = self._dependency_stack()
+        keys = set()
+        stack.append(keys)
+        try:
+            yield keys
+        finally:
+            stack.pop()
+            if stack:
+                stack[-1] |= keys
+
+    def _add_dependencies(self, keys: Union[Set[str], FrozenSet[str]]) -> None:
+        stack = self._dependency_stack()
+        if stack:
+            stack[-1] |= keys
+
     ############################################
     # the core logic of this class is contained
     # in the following methods
@@ -120,6 +262,7 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
         # this stack allows us to detect alias loops
         stack = {table_id}
 
+        self._add_dependencies(stack)
         value: TcValue = self._raw_resource_details[table_id]
 
         while True:
@@ -141,6 +284,7 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
                     if new_id in stack:
                         raise ValueError(f"Alias loop at key {new_id}")
                     stack.add(new_id)
+                    self._add_dependencies({new_id})
                     value = self._raw_resource_details[new_id]
                     continue
                 else:
@@ -168,6 +312,28 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
         self, table_id: str, property: str, _forbidden_keys: Set[str] = None
     ) -> str:
         """Get the full item property, fully resolved and substituted."""
+        # A successful resolution cannot contain a reference loop, so cached values
+        # are safe to use also inside the resolution of other properties.
+        cache_key = (table_id, property)
+        try:
+            value, keys = self._resolved[cache_key]
+        except KeyError:
+            pass
+        else:
+            self._add_dependencies(keys)
+            return value
+
+        with self._collect_dependencies() as keys:
+            value = self._resolve_item_property(table_id, property, _forbidden_keys)
+
+        self._resolved[cache_key] = (value, frozenset(keys))
+        for key in keys:
+            self._resolved_dependents.setdefault(key, set()).add(cache_key)
+        return value
+
+    def _resolve_item_property(
+        self, table_id: str, property: str, _forbidden_keys: Set[str] = None
+    ) -> str:
         raw_string = self._get_unsubstituted_item_property(table_id, property)
 
         # some items are not strings, then the rest of this function makes no sense
@@ -175,9 +341,7 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
             return raw_string
 
         # get all keys used in the raw_string, such as using {MyDb} will get "MyDb"
-        format_keys = set(
-            i[1] for i in Formatter().parse(raw_string) if i[1] is not None
-        )
+        format_keys = _get_format_keys(raw_string)
 
         # the forbidden-keys logic allows us to detect reference loops.
         # no key that is in the upstream of a property is allowed in the string
@@ -233,28 +397,69 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
         # exception for any missing key, which will give a meaningful error to the user.
         return raw_string.format(**replacements)
 
+    def use_bundle(self, bundle_path: str) -> None:
+        """Use a configuration bundle, as generated by the cli action
+        compile-bundle, for all following calls to add_resource_path and
+        add_sql_resource_path. Resource paths that are not in the bundle, or whose
+        files have changed since the bundle was compiled, are parsed as usual."""
+        self._bundle = ConfigurationBundle.load(bundle_path)
+
+    def _get_resource_details(
+        self,
+        kind: str,
+        resource_paths: List[Union[str, ModuleType]],
+        max_workers: int = 1,
+    ) -> List[Tuple[str, Any]]:
+        """The key-value pairs of all resource paths, in the order of registration.
+        Resource paths that are not taken from the bundle are parsed together."""
+        details = [None] * len(resource_paths)
+        unbundled = []
+        for i, resource_path in enumerate(resource_paths):
+            if self._bundle is not None:
+                bundled = self._bundle.get(kind, resource_path)
+                if bundled is not None:
+                    # the bundle is not modified by later registrations
+                    details[i] = copy.deepcopy(bundled)
+                    continue
+                warnings.warn(
+                    f"The {kind} resource path {get_resource_name(resource_path)} "
+                    "is not in the configuration bundle or has changed since "
+                    "the bundle was compiled. Parsing it instead."
+                )
+            unbundled.append(i)
+
+        if unbundled:
+            parsed = parse_resources(
+                kind, [resource_paths[i] for i in unbundled], max_workers
+            )
+            for i, updates in zip(unbundled, parsed):
+                details[i] = updates
+
+        return [item for updates in details for item in updates]
+
     def add_resource_path(
         self, resource_path: Union[str, ModuleType], consistency_check=True
     ) -> None:
-        self.table_details = dict()
+        self.add_resource_paths(
+            resource_path, consistency_check=consistency_check, max_workers=1
+        )
+
+    def add_resource_paths(
+        self,
+        *resource_paths: Union[str, ModuleType],
+        consistency_check=True,
+        max_workers: int = 1,
+    ) -> None:
+        """Add several resource paths as if they were added one after the other.
+        By default, the yaml and json files are parsed in this process. With
+        max_workers larger than 1, or None for one per processor, they are parsed
+        concurrently on a process pool instead, which pays off for many files."""
         backup_details = self._raw_resource_details.copy()
         try:
-            for file_name in importlib.resources.contents(resource_path):
-                extension = Path(file_name).suffix
-                if extension not in [".json", ".yaml", ".yml"]:
-                    continue
-                with importlib.resources.path(resource_path, file_name) as file_path:
-                    with open(file_path) as file:
-                        # just use yaml since json is a subset of yaml
-                        update = yaml.load(file, Loader=yaml.FullLoader)
-
-                        if not isinstance(update, dict):
-                            raise ValueError(f"document in {file_path} is no dict.")
-
-                        for key, value in update.items():
-                            # we now support all bare value types in yaml.
-                            # no further checking
-                            self.register(key, value)
+            for key, value in self._get_resource_details(
+                YAML_RESOURCE, list(resource_paths), max_workers
+            ):
+                self.register(key, value)
 
             # try re-building all details
             if consistency_check:
@@ -263,34 +468,73 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
             # this piece makes it so that the Configurator can still be used
             # if any exception raised by the above code is caught.
             self._raw_resource_details = backup_details
+            self._clear_caches()
+            self._clear_value_index()
             raise
+        for resource_path in resource_paths:
+            self._resource_paths.append((YAML_RESOURCE, resource_path))
 
     def add_sql_resource_path(
         self, resource_path: Union[str, ModuleType], consistency_check=True
     ) -> None:
-        self.table_details = dict()
-        for key, value in _parse_sql_to_config(resource_path).items():
+        self.add_sql_resource_paths(
+            resource_path, consistency_check=consistency_check, max_workers=1
+        )
+
+    def add_sql_resource_paths(
+        self,
+        *resource_paths: Union[str, ModuleType],
+        consistency_check=True,
+        max_workers: int = 1,
+    ) -> None:
+        """Add several sql resource paths as if they were added one after the other.
+        The sql files can be parsed concurrently, see add_resource_paths."""
+        for key, value in self._get_resource_details(
+            SQL_RESOURCE, list(resource_paths), max_workers
+        ):
             self.register(key, value)
+        for resource_path in resource_paths:
+            self._resource_paths.append((SQL_RESOURCE, resource_path))
 
         if consistency_check:
             self.verify_consistency()
 
+    def compile_bundle(self) -> ConfigurationBundle:
+        """Compile all resource paths that were added to this configurator
+        into a configuration bundle."""
+        bundle = ConfigurationBundle()
+        for kind, resource_path in self._resource_paths:
+            bundle.add(kind, resource_path)
+        return bundle
+
     def key_of(self, attribute: str, value: str) -> str:
         """Obtain the key of the first registered item that has a given attribute
         set to a given value. Uniqueness of the match is the responsibility of
         the library user.
 
-        This function is slow as it performs a linear search. It is intended for use in
-        setup code.
+        The lookup uses an index of all attribute values,
+        which is built on first use and kept up to date by .register().
         """
-        for key, object in self._raw_resource_details.items():
-            try:
-                if object[attribute] == value:
-                    return key
-            except (KeyError, TypeError):
-                continue
-        else:
+        keys = self.keys_where(attribute, value)
+        if not keys:
             raise KeyError(f"No key with attribute {attribute}={repr(value)}")
+        return keys[0]
+
+    def keys_where(self, attribute: str, value: Any) -> List[str]:
+        """Obtain the keys of all registered items that have a given attribute
+        set to a given value, in the order of registration."""
+        try:
+            matches = self._get_value_index().get(attribute, {}).get(value, {})
+        except TypeError:
+            # unhashable values are not indexed, fall back to a linear search
+            return [
+                key
+                for key, object in self._raw_resource_details.items()
+                if isinstance(object, dict)
+                and attribute in object
+                and object[attribute] == value
+            ]
+        return sorted(matches, key=matches.get)
 
     ############################################
     # all methods below are interface and convenience methods
@@ -315,7 +559,7 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
 
     def __reset(self, debug: bool) -> None:
         self._is_debug = debug
-        self.table_details = dict()
+        self._clear_caches()
 
     def reset(self, *, debug: bool = False):
         """
@@ -346,6 +590,10 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
         If both the new and old items are dictionaries, their contents are merged.
         Supply value=None to clear a key.
         """
+        indexed = self._value_index is not None
+        if indexed:
+            self._unindex_key(key)
+
         if value is None:
             self._raw_resource_details.pop(key, None)
         elif isinstance(value, dict) and isinstance(
@@ -355,7 +603,13 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
             self._raw_resource_details[key].update(value)
         else:
             self._raw_resource_details[key] = value
-        self.table_details = dict()
+
+        if indexed:
+            if value is None:
+                self._key_positions.pop(key, None)
+            else:
+                self._index_key(key)
+        self._invalidate(key)
         return key
 
     def define(self, **kwargs) -> str:
@@ -440,35 +694,60 @@ class Configurator(ConfiguratorCli, metaclass=ConfiguratorSingleton):
         all substitutions will be fully resolved.
         """
         if not self.table_details:
-            self.table_details = dict()
+            # the details were cleared, rebuild all of them
+            self._stale_details = set(self._raw_resource_details.keys())
+
+        if self._stale_details:
+            details_by_key = dict(self._details_by_key)
+            for table_id in self._stale_details:
+                details_by_key.pop(table_id, None)
+                if table_id not in self._raw_resource_details:
+                    continue
+                with self._collect_dependencies() as keys:
+                    details_by_key[table_id] = self._get_details(table_id)
+                for key in keys:
+                    self._details_dependents.setdefault(key, set()).add(table_id)
+
+            self._details_by_key = details_by_key
+            self._stale_details = set()
 
+            # keep the order of the registered keys
+            self.table_details = dict()
             for table_id in self._raw_resource_details.keys():
-                # add the name as the bare key
-                try:
-                    self.table_details[table_id] = self.get(table_id)
-                    continue  # if it was a bare string, we can stop here
-                except NoSuchValueException:
-                    pass
-
-                try:
-                    self.table_details[table_id] = self.get(table_id, "name")
-                except NoSuchValueException:
-                    pass
-
-                # add every property as a _property part
-                for property_name in set(self._get_item(table_id).keys()):
-                    try:
-                        item = self.get(table_id, property_name)
-                    except NoSuchValueException:
-                        continue
-                    # if the dict values are dicts, stop here,
-                    # not supported for direct substitution
-                    # this will take care of definitions of schema and similar.
-                    if not isinstance(item, dict):
-                        self.table_details[f"{table_id}_{property_name}"] = str(item)
+                self.table_details.update(self._details_by_key[table_id])
 
         return self.table_details
 
+    def _get_details(self, table_id: str) -> Dict[str, str]:
+        """All details of a single key, see get_all_details"""
+        details = dict()
+
+        # add the name as the bare key
+        try:
+            details[table_id] = self.get(table_id)
+            return details  # if it was a bare string, we can stop here
+        except NoSuchValueException:
+            pass
+
+        try:
+            details[table_id] = self.get(table_id, "name")
+        except NoSuchValueException:
+            pass
+
+        # add every property as a _property part
+        for property_name in set(self._get_item(table_id).keys()):
+            try:
+                item = self.get(table_id, property_name)
+            except NoSuchValueException:
+                continue
+            # if the dict values are dicts, stop here,
+            # not supported for direct substitution
+            # this will take care of definitions of schema and similar.
+            if not isinstance(item, dict):
+                details[f"{table_id}_{property_name}"] = str(item)
+
+        return details
+
     def regenerate_unique_id_and_clear_conf(self):
         self._unique_id = uuid.uuid4().hex
         self.clear_all_configurations()
@@ -0,0 +1,122 @@
+import hashlib
+import importlib.resources
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import yaml
+
+from spetlr.configurator.sql.parse_sql import parse_sql_code_to_config
+
+YAML_RESOURCE = "yaml"
+SQL_RESOURCE = "sql"
+
+EXTENSIONS = {
+    YAML_RESOURCE: [".json", ".yaml", ".yml"],
+    SQL_RESOURCE: [".sql"],
+}
+
+# the C implementation of the loader is only available if pyyaml
+# was built against libyaml. Both load the same documents.
+YamlLoader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+
+
+def get_resource_name(resource_path: Union[str, ModuleType]) -> str:
+    """The importable name of the resource package."""
+    if isinstance(resource_path, ModuleType):
+        return resource_path.__name__
+    return resource_path
+
+
+def get_resource_files(
+    resource_path: Union[str, ModuleType], extensions: Iterable[str]
+) -> List[str]:
+    """The names of all files in the resource package with the given extensions."""
+    return [
+        file_name
+        for file_name in importlib.resources.contents(resource_path)
+        if Path(file_name).suffix in extensions
+    ]
+
+
+def get_resource_hashes(
+    resource_path: Union[str, ModuleType], extensions: Iterable[str]
+) -> Dict[str, str]:
+    """The sha256 of the contents of each file with the given extensions."""
+    return {
+        file_name: hashlib.sha256(
+            importlib.resources.read_binary(resource_path, file_name)
+        ).hexdigest()
+        for file_name in get_resource_files(resource_path, extensions)
+    }
+
+
+def parse_resource_file(
+    kind: str, resource_path: Union[str, ModuleType], file_name: str
+) -> List[Tuple[str, Any]]:
+    """All key-value pairs of a single yaml, json or sql file."""
+    with importlib.resources.path(resource_path, file_name) as file_path:
+        with open(file_path) as file:
+            if kind == SQL_RESOURCE:
+                return list(parse_sql_code_to_config(file.read()).items())
+
+            # just use yaml since json is a subset of yaml
+            update = yaml.load(file, Loader=YamlLoader)
+
+            if not isinstance(update, dict):
+                raise ValueError(f"document in {file_path} is no dict.")
+
+            # we now support all bare value types in yaml.
+            # no further checking
+            return list(update.items())
+
+
+def _parse_resource_file(task: Tuple[str, Union[str, ModuleType], str]):
+    return parse_resource_file(*task)
+
+
+def parse_resources(
+    kind: str,
+    resource_paths: List[Union[str, ModuleType]],
+    max_workers: int = 1,
+) -> List[List[Tuple[str, Any]]]:
+    """All key-value pairs of each resource path,
+    in the order that they are to be registered.
+
+    With max_workers larger than 1, or None for the number of processors,
+    the files are parsed concurrently on a process pool. The result does not
+    depend on the number of workers.
+    """
+    tasks = []
+    for i, resource_path in enumerate(resource_paths):
+        if max_workers != 1:
+            # modules cannot be sent to other processes, their names can
+            resource_path = get_resource_name(resource_path)
+        for file_name in get_resource_files(resource_path, EXTENSIONS[kind]):
+            tasks.append((i, (kind, resource_path, file_name)))
+
+    if max_workers != 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            parsed = list(pool.map(_parse_resource_file, [task for _, task in tasks]))
+    else:
+        parsed = [_parse_resource_file(task) for _, task in tasks]
+
+    results = [[] for _ in resource_paths]
+    for (i, _), updates in zip(tasks, parsed):
+        results[i].extend(updates)
+
+    if kind == SQL_RESOURCE:
+        # a key that is defined in several sql files of one resource path
+        # keeps the details of the last file
+        results = [list(dict(updates).items()) for updates in results]
+
+    return results
+
+
+def parse_resource(
+    kind: str, resource_path: Union[str, ModuleType]
+) -> List[Tuple[str, Any]]:
+    """All key-value pairs that a resource path of the given kind registers."""
+    (updates,) = parse_resources(kind, [resource_path])
+    return updates
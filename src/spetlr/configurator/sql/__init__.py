@@ -1 +0,0 @@
-from .parse_sql import _parse_sql_to_config  # noqa
@@ -1,15 +1,12 @@
 """
-This function searches through .sql files and looks for statements to create tables
-or databases:
+This function parses the sql code of a .sql file and looks for statements to
+create tables or databases:
 https://spark.apache.org/docs/3.0.0-preview/sql-ref-syntax-ddl-create-database.html
 https://spark.apache.org/docs/latest/sql-ref-syntax-ddl-create-table-datasource.html
 and returns a dictionary of configuration details.
 """
 
-import importlib.resources
-from pathlib import Path
-from types import ModuleType
-from typing import Dict, Union
+from typing import Dict
 
 from spetlr.configurator.sql.comments import _extract_comment_attributes
 from spetlr.configurator.sql.create import _walk_create_statement
@@ -63,16 +60,3 @@ def parse_single_sql_statement(sql_code: str) -> dict:
 
     comment_attributes.update(object_details)
     return comment_attributes
-
-
-def _parse_sql_to_config(resource_path: Union[str, ModuleType]) -> Dict:
-    details = {}
-    for file_name in importlib.resources.contents(resource_path):
-        extension = Path(file_name).suffix
-        if not extension == ".sql":
-            continue
-        with importlib.resources.path(resource_path, file_name) as file_path:
-            with open(file_path) as file:
-                sql_code = file.read()
-                details.update(parse_sql_code_to_config(sql_code))
-    return details
@@ -1,2 +1,5 @@
+from .batch_writer import DeltaBatchWriteException, DeltaBatchWriter  # noqa: F401
 from .db_handle import DbHandle  # noqa: F401
 from .delta_handle import DeltaHandle  # noqa: F401
+from .merge_builder import DeltaMergeBuilder  # noqa: F401
+from .table_metadata import TableMetadata, TableMetadataCache  # noqa: F401
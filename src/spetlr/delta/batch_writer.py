@@ -0,0 +1,110 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+from pyspark.sql import DataFrame
+
+from spetlr.delta.delta_handle import DeltaHandle, DeltaHandleException
+
+
+@dataclass
+class BatchWrite:
+    """One write of a DeltaBatchWriter, and its outcome after the batch is written."""
+
+    handle: DeltaHandle
+    df: DataFrame
+    mode: str
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    seconds: Optional[float] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def table_name(self) -> str:
+        return self.handle.get_tablename()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.seconds is not None and self.error is None
+
+
+class DeltaBatchWriteException(DeltaHandleException):
+    def __init__(self, writes: List[BatchWrite]):
+        self.writes = writes
+        failed = [write for write in writes if write.error is not None]
+        super().__init__(
+            f"{len(failed)} of {len(writes)} writes failed: "
+            + "; ".join(f"{write.table_name}: {write.error!r}" for write in failed)
+        )
+
+
+class DeltaBatchWriter:
+    """
+    Writes DataFrames to many Delta tables concurrently, on a thread pool of
+    max_workers threads. Small tables are dominated by the latency of the commit,
+    so writing them concurrently shortens the total time considerably.
+
+    All writes are attempted, even if some of them fail. Afterwards, the
+    outcome of every write is returned, or if any write failed and raise_on_error
+    is set, a DeltaBatchWriteException with the outcomes of all writes is raised,
+    which names the failed tables and is chained to the first error.
+
+    Usage:
+        DeltaBatchWriter(max_workers=8).add(dh1, df1).add(dh2, df2, "append").write()
+    or
+        DeltaBatchWriter().write({dh1: df1, dh2: df2})
+    """
+
+    modes = {"overwrite", "append", "upsert"}
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        mode: str = "overwrite",
+        raise_on_error: bool = True,
+    ):
+        self.max_workers = max_workers
+        self.mode = mode
+        self.raise_on_error = raise_on_error
+        self._writes: List[BatchWrite] = []
+
+    def add(
+        self, handle: DeltaHandle, df: DataFrame, mode: str = None, **kwargs
+    ) -> "DeltaBatchWriter":
+        """Add a write to the batch. The keyword arguments are passed on to the
+        write method of the handle, such as mergeSchema, or join_cols for upserts."""
+        mode = (mode or self.mode).lower()
+        if mode not in self.modes:
+            raise ValueError(f"Unknown write mode {mode}.")
+        self._writes.append(BatchWrite(handle=handle, df=df, mode=mode, kwargs=kwargs))
+        return self
+
+    def _execute(self, write: BatchWrite) -> None:
+        start = time.perf_counter()
+        try:
+            getattr(write.handle, write.mode)(write.df, **write.kwargs)
+        finally:
+            write.seconds = time.perf_counter() - start
+
+    def write(self, writes: Mapping[DeltaHandle, DataFrame] = None) -> List[BatchWrite]:
+        """Execute all added writes, and those in the mapping with the default mode.
+        The batch is empty afterwards."""
+        for handle, df in (writes or {}).items():
+            self.add(handle, df)
+
+        batch, self._writes = self._writes, []
+        # with a single worker, the writes are executed one after the other
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as pool:
+            futures = [
+                pool.submit(copy_context().run, self._execute, write) for write in batch
+            ]
+            for write, future in zip(batch, futures):
+                # kept with its table, and re-raised after the other writes,
+                # see DeltaBatchWriteException
+                write.error = future.exception()
+
+        errors = [write.error for write in batch if write.error is not None]
+        if self.raise_on_error and errors:
+            raise DeltaBatchWriteException(batch) from errors[0]
+        return batch
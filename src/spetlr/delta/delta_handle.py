@@ -2,16 +2,26 @@ from datetime import date, datetime
 from typing import Any, Dict, List, Optional, Union
 
 import pyspark.sql.types as T
-from pyspark.sql import DataFrame
+from pyspark.sql import DataFrame, DataFrameReader
 
 from spetlr.configurator.configurator import Configurator
+from spetlr.delta.delta_log import get_snapshot_version
+from spetlr.delta.merge_builder import DeltaMergeBuilder
+from spetlr.delta.table_metadata import TableMetadata, TableMetadataCache
+from spetlr.delta.upsert_strategy import (
+    APPEND,
+    FULL_MERGE,
+    OVERWRITE,
+    UpsertPlan,
+    get_source_predicate,
+    plan_upsert,
+)
 from spetlr.exceptions import SpetlrException
-from spetlr.functions import get_unique_tempview_name, init_dbutils
+from spetlr.functions import init_dbutils
 from spetlr.schema_manager import SchemaManager
 from spetlr.spark import Spark
 from spetlr.tables.TableHandle import TableHandle
 from spetlr.utils.CheckDfMerge import CheckDfMerge
-from spetlr.utils.GetMergeStatement import GetMergeStatement
 
 
 class DeltaHandleException(SpetlrException):
@@ -60,8 +70,7 @@ class DeltaHandle(TableHandle):
         self._schema = schema
         self._data_format = data_format
 
-        self._partitioning: Optional[List[str]] = None
-        self._cluster: Optional[List[str]] = None
+        self.last_upsert_plan: Optional[UpsertPlan] = None
         self._validate()
 
         if options_dict is None or options_dict == "":
@@ -151,7 +160,8 @@ class DeltaHandle(TableHandle):
         if overwritePartitions:
             writer = writer.option("partitionOverwriteMode", "dynamic")
 
-        return writer.saveAsTable(self._name)
+        writer.saveAsTable(self._name)
+        self._invalidate_metadata()
 
     def overwrite(
         self,
@@ -174,9 +184,11 @@ class DeltaHandle(TableHandle):
 
     def truncate(self) -> None:
         Spark.get().sql(f"TRUNCATE TABLE {self._name};")
+        self._invalidate_metadata()
 
     def drop(self) -> None:
         Spark.get().sql(f"DROP TABLE IF EXISTS {self._name};")
+        self._invalidate_metadata()
 
     def drop_and_delete(self) -> None:
         self.drop()
@@ -188,11 +200,20 @@ class DeltaHandle(TableHandle):
         if self._location:
             sql += f" USING DELTA LOCATION '{self._location}'"
         Spark.get().sql(sql)
+        self._invalidate_metadata()
 
     def recreate_hive_table(self):
         self.drop()
         self.create_hive_table()
 
+    def get_metadata(self) -> TableMetadata:
+        """The result of DESCRIBE DETAIL tablename,
+        from the process-wide TableMetadataCache."""
+        return TableMetadataCache().get(self.get_tablename())
+
+    def _invalidate_metadata(self) -> None:
+        TableMetadataCache().invalidate(self.get_tablename())
+
     def get_partitioning(self):
         """The result of DESCRIBE DETAIL tablename is like this:
         +------+--------------------+--------------------+----------------+-------+
@@ -203,14 +224,7 @@ class DeltaHandle(TableHandle):
         but this method return the partitioning in the form ['mycolA'],
         if there is no partitioning, an empty list is returned.
         """
-        if self._partitioning is None:
-            self._partitioning = (
-                Spark.get()
-                .sql(f"DESCRIBE DETAIL {self.get_tablename()}")
-                .select("partitionColumns")
-                .collect()[0][0]
-            )
-        return self._partitioning
+        return self.get_metadata().partition_columns
 
     def get_cluster(self):
         """The result of DESCRIBE DETAIL tablename is like this:
@@ -222,14 +236,7 @@ class DeltaHandle(TableHandle):
         but this method return the cluster in the form ['mycolA'],
         if there is no cluster, an empty list is returned.
         """
-        if self._cluster is None:
-            self._cluster = (
-                Spark.get()
-                .sql(f"DESCRIBE DETAIL {self.get_tablename()}")
-                .select("clusteringColumns")
-                .collect()[0][0]
-            )
-        return self._cluster
+        return self.get_metadata().clustering_columns
 
     def get_tablename(self) -> str:
         return self._name
@@ -248,45 +255,63 @@ class DeltaHandle(TableHandle):
             " will be discarded before load."
         )
 
+        target_table_name = self.get_tablename()
         df_target = self.read()
 
-        # If the target is empty, always do faster full load
-        if len(df_target.take(1)) == 0:
-            return self.write_or_append(df, mode="overwrite")
-
-        # Find records that need to be updated in the target (happens seldom)
+        plan = plan_upsert(df, join_cols, target_table_name, df_target.schema)
+        if plan is None:
+            # The statistics of the table are not available,
+            # compare the source with the target instead.
+            # If the target is empty, always do faster full load
+            if len(df_target.take(1)) == 0:
+                plan = UpsertPlan(OVERWRITE, "the target table is empty")
+            else:
+                # Find records that need to be updated in the target
+                # (happens seldom)
+                df, merge_required = CheckDfMerge(
+                    df=df,
+                    df_target=df_target,
+                    join_cols=join_cols,
+                    avoid_cols=[],
+                )
+                plan = (
+                    UpsertPlan(FULL_MERGE, "the source updates rows of the target")
+                    if merge_required
+                    else UpsertPlan(APPEND, "the source only has new rows")
+                )
 
-        # Define the column to be used for checking for new rows
-        # Checking the null-ness of one right row is sufficient to mark the row as new,
-        # since null keys are disallowed.
+        self.last_upsert_plan = plan
 
-        df, merge_required = CheckDfMerge(
-            df=df,
-            df_target=df_target,
-            join_cols=join_cols,
-            avoid_cols=[],
-        )
+        if plan.strategy == OVERWRITE:
+            return self.write_or_append(df, mode="overwrite")
 
-        if not merge_required:
+        if plan.strategy == APPEND:
             return self.write_or_append(df, mode="append")
 
-        temp_view_name = get_unique_tempview_name()
-        df.createOrReplaceGlobalTempView(temp_view_name)
-
-        target_table_name = self.get_tablename()
-        non_join_cols = [col for col in df.columns if col not in join_cols]
-
-        merge_sql_statement = GetMergeStatement(
-            merge_statement_type="delta",
-            target_table_name=target_table_name,
-            source_table_name="global_temp." + temp_view_name,
-            join_cols=join_cols,
-            insert_cols=df.columns,
-            update_cols=non_join_cols,
-            special_update_set="",
+        # restate the join keys of the source as literals, so that Delta can prune
+        # the target files to the partitions and clustering ranges of the source
+        source_predicate = get_source_predicate(
+            df,
+            join_cols,
+            self.get_partitioning(),
+            self.get_cluster(),
+            key_ranges=plan.key_ranges,
+        )
+        target_predicate = " AND ".join(
+            predicate
+            for predicate in [plan.target_predicate, source_predicate]
+            if predicate
         )
 
-        Spark.get().sql(merge_sql_statement)
+        # matched rows that are unchanged are not rewritten
+        DeltaMergeBuilder(
+            target_table_name,
+            join_cols,
+            update_cols=[col for col in df.columns if col not in join_cols],
+            insert_cols=df.columns,
+            target_predicate=target_predicate or None,
+            update_only_changed=True,
+        ).execute(df)
 
         print("Incremental Base - incremental load with merge")
 
@@ -306,6 +331,117 @@ class DeltaHandle(TableHandle):
             f" WHERE {comparison_col} {comparison_operator} {limit};"
         )
         Spark.get().sql(sql_str)
+        self._invalidate_metadata()
+
+    def read_changes(
+        self,
+        starting_version: int = None,
+        ending_version: int = None,
+        *,
+        starting_timestamp: Union[datetime, str] = None,
+        ending_timestamp: Union[datetime, str] = None,
+    ) -> DataFrame:
+        """Read the change data feed of the table between the given versions,
+        or timestamps, both inclusive. The rows have the additional columns
+        _change_type, _commit_version and _commit_timestamp.
+        The change data feed must be enabled on the table."""
+        reader = Spark.get().read.format(self._data_format)
+        reader = reader.option("readChangeFeed", "true")
+        options = {
+            "startingVersion": starting_version,
+            "endingVersion": ending_version,
+            "startingTimestamp": starting_timestamp,
+            "endingTimestamp": ending_timestamp,
+        }
+        if starting_version is None and starting_timestamp is None:
+            options["startingVersion"] = 0
+        for key, value in options.items():
+            if isinstance(value, datetime):
+                value = value.strftime("%Y-%m-%d %H:%M:%S.%f")
+            if value is not None:
+                reader = reader.option(key, str(value))
+
+        return self._load(reader)
+
+    def read_version(self, version: int) -> DataFrame:
+        """Read the table as of the given version."""
+        reader = Spark.get().read.format(self._data_format)
+        return self._load(reader.option("versionAsOf", str(version)))
+
+    def _load(self, reader: DataFrameReader) -> DataFrame:
+        """Load with the reader by name, like read does."""
+        if self._location and "." not in (self._name or ""):
+            return reader.load(self._location)
+        return reader.table(self._name)
+
+    def get_latest_version(self) -> int:
+        """The version of the latest commit to the table, from the transaction
+        log if it can be accessed directly, otherwise from the table history."""
+        version = get_snapshot_version(self._location or self.get_metadata().location)
+        if version is None:
+            version = (
+                Spark.get()
+                .sql(f"DESCRIBE HISTORY {self._name} LIMIT 1")
+                .select("version")
+                .collect()[0][0]
+            )
+        return version
+
+    def enable_change_data_feed(self) -> None:
+        Spark.get().sql(
+            f"ALTER TABLE {self._name} "
+            "SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true')"
+        )
+        self._invalidate_metadata()
+
+    def optimize(self, zorder_by: List[str] = None, where: str = None) -> DataFrame:
+        """Compact the small files of the table, optionally only in the partitions
+        that fulfill the where condition, and co-locate the rows by the zorder_by
+        columns. Returns the metrics of the operation."""
+        sql_str = f"OPTIMIZE {self._name}"
+        if where:
+            sql_str += f" WHERE {where}"
+        if zorder_by:
+            sql_str += f" ZORDER BY ({', '.join(zorder_by)})"
+        metrics = Spark.get().sql(sql_str)
+        self._invalidate_metadata()
+        return metrics
+
+    def vacuum(self, retain_hours: float = None) -> None:
+        """Delete the files that are no longer referenced by the table and older
+        than the retention period, by default that of the table (7 days)."""
+        sql_str = f"VACUUM {self._name}"
+        if retain_hours is not None:
+            sql_str += f" RETAIN {retain_hours} HOURS"
+        Spark.get().sql(sql_str)
+
+    def compute_statistics(self, columns: List[str] = None) -> None:
+        """Compute the statistics of the table for the optimizer,
+        including column statistics for the given columns, or all columns
+        if an empty list is given."""
+        sql_str = f"ANALYZE TABLE {self._name} COMPUTE STATISTICS"
+        if columns:
+            sql_str += f" FOR COLUMNS {', '.join(columns)}"
+        elif columns is not None:
+            sql_str += " FOR ALL COLUMNS"
+        Spark.get().sql(sql_str)
+
+    def set_auto_compact(
+        self, auto_compact: bool = True, optimize_write: bool = None
+    ) -> None:
+        """Set whether small files are compacted after each write, and optionally
+        whether writes are shuffled to produce fewer, larger files."""
+        properties = {"delta.autoOptimize.autoCompact": auto_compact}
+        if optimize_write is not None:
+            properties["delta.autoOptimize.optimizeWrite"] = optimize_write
+        Spark.get().sql(
+            f"ALTER TABLE {self._name} SET TBLPROPERTIES ("
+            + ", ".join(
+                f"'{key}' = '{str(value).lower()}'" for key, value in properties.items()
+            )
+            + ")"
+        )
+        self._invalidate_metadata()
 
     def read_stream(self) -> DataFrame:
         return (
@@ -0,0 +1,86 @@
+"""
+Direct access to the transaction log of Delta tables through the JVM.
+
+Reading the current snapshot from the log only runs on the driver, and the log is
+cached in the JVM, so only the commits since the last access are read. Where the log
+cannot be accessed, such as on Spark Connect, the functions return None, and the
+callers fall back to SQL.
+"""
+
+from typing import Any, Optional
+
+from py4j.java_gateway import JavaClass
+from py4j.protocol import Py4JError, Py4JNetworkError
+from pyspark.sql import DataFrame
+
+from spetlr.spark import Spark
+
+# the Delta log class of open source Delta, and of Databricks runtimes
+_DELTA_LOG_CLASSES = [
+    "org.apache.spark.sql.delta.DeltaLog",
+    "com.databricks.sql.transaction.tahoe.DeltaLog",
+]
+
+
+def _get_delta_log(location: str) -> Any:
+    """The Delta log of the location, or None if no Delta log class is available,
+    such as on Spark Connect, where there is no JVM."""
+    if not location:
+        return None
+    spark = Spark.get()
+    try:
+        jvm = spark._jvm
+    except AttributeError:
+        return None
+    if jvm is None:
+        return None
+    for class_name in _DELTA_LOG_CLASSES:
+        delta_log_class = jvm
+        for part in class_name.split("."):
+            delta_log_class = getattr(delta_log_class, part)
+        # a class that does not exist is a JavaPackage instead
+        if isinstance(delta_log_class, JavaClass):
+            return delta_log_class.forTable(spark._jsparkSession, location)
+    return None
+
+
+def get_snapshot(location: str) -> Any:
+    """The current snapshot of the Delta table at the location, as a JVM object,
+    or None if the transaction log cannot be accessed or brought up to date."""
+    delta_log = _get_delta_log(location)
+    if delta_log is None:
+        return None
+    none = Spark.get()._jvm.scala.Option.empty()
+    # the signature of update differs between Delta versions
+    for args in [(False, none, none), (False, none)]:
+        try:
+            snapshot = delta_log.update(*args)
+        except Py4JNetworkError:
+            raise
+        except Py4JError as e:
+            if "does not exist" not in str(e):
+                raise
+            continue
+        # there is no Delta table at the location
+        return snapshot if snapshot.version() >= 0 else None
+    # the last loaded snapshot may be stale, so it is never used
+    return None
+
+
+def get_snapshot_version(location: str) -> Optional[int]:
+    """The current version of the Delta table at the location,
+    or None if the transaction log cannot be accessed."""
+    snapshot = get_snapshot(location)
+    if snapshot is None:
+        return None
+    return int(snapshot.version())
+
+
+def get_snapshot_files(location: str) -> Optional[DataFrame]:
+    """The add actions of the current snapshot of the Delta table at the location,
+    with the columns path, partitionValues, size and stats.
+    Returns None if the transaction log cannot be accessed."""
+    snapshot = get_snapshot(location)
+    if snapshot is None:
+        return None
+    return DataFrame(snapshot.allFiles().toDF(), Spark.get())
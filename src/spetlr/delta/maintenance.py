@@ -0,0 +1,108 @@
+"""
+Selection of the Delta tables of the Configurator that need to be optimized.
+
+A table needs to be optimized when it has many files that are small on average,
+which is typical for tables that receive frequent small appends, such as from streams.
+The figures are taken from DESCRIBE DETAIL, so no data is read.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from pyspark.sql.utils import AnalysisException
+
+from spetlr.configurator.configurator import Configurator
+from spetlr.delta.delta_handle import DeltaHandle
+from spetlr.delta.table_metadata import TableMetadataCache
+
+# the default thresholds
+MIN_NUM_FILES = 50
+MIN_AVG_FILE_SIZE = 32 * 1024**2
+
+
+@dataclass
+class OptimizeCandidate:
+    """A table that needs to be optimized, and the figures that show it."""
+
+    table_id: str
+    table_name: str
+    num_files: int
+    size_in_bytes: int
+
+    @property
+    def avg_file_size(self) -> float:
+        return self.size_in_bytes / self.num_files
+
+
+def get_delta_table_ids() -> List[str]:
+    """The ids of all Delta tables of the Configurator.
+    Databases are recognized by their names, which are not qualified."""
+    tc = Configurator()
+    return [
+        table_id
+        for table_id in tc.all_keys()
+        if "." in str(tc.get(table_id, "name", ""))
+        and tc.get(table_id, "format", "delta") == "delta"
+    ]
+
+
+def find_tables_to_optimize(
+    table_ids: Iterable[str] = None,
+    *,
+    min_num_files: int = MIN_NUM_FILES,
+    min_avg_file_size: int = MIN_AVG_FILE_SIZE,
+) -> List[OptimizeCandidate]:
+    """The tables that have at least min_num_files files, with an average size
+    below min_avg_file_size bytes, those with the most files first. By default,
+    all Delta tables of the Configurator are considered. Tables that do not exist
+    are skipped."""
+    if table_ids is None:
+        table_ids = get_delta_table_ids()
+
+    candidates = []
+    for table_id in table_ids:
+        table_name = DeltaHandle.from_tc(table_id).get_tablename()
+        try:
+            metadata = TableMetadataCache().refresh(table_name)
+        except AnalysisException:
+            continue
+
+        if not metadata.num_files or metadata.num_files < min_num_files:
+            continue
+        candidate = OptimizeCandidate(
+            table_id=table_id,
+            table_name=table_name,
+            num_files=metadata.num_files,
+            size_in_bytes=metadata.size_in_bytes or 0,
+        )
+        if candidate.avg_file_size < min_avg_file_size:
+            candidates.append(candidate)
+
+    return sorted(candidates, key=lambda candidate: -candidate.num_files)
+
+
+def optimize_tables(
+    table_ids: Iterable[str] = None,
+    *,
+    zorder_by: Dict[str, List[str]] = None,
+    vacuum_retain_hours: float = None,
+    min_num_files: int = MIN_NUM_FILES,
+    min_avg_file_size: int = MIN_AVG_FILE_SIZE,
+) -> List[OptimizeCandidate]:
+    """Optimize the tables that need it, see find_tables_to_optimize, with the
+    z-order columns given by table id, and vacuum them afterwards if
+    vacuum_retain_hours is given. Returns the optimized tables."""
+    zorder_by = zorder_by or {}
+    candidates = find_tables_to_optimize(
+        table_ids, min_num_files=min_num_files, min_avg_file_size=min_avg_file_size
+    )
+    for candidate in candidates:
+        dh = DeltaHandle.from_tc(candidate.table_id)
+        print(
+            f"Optimizing {candidate.table_name}: {candidate.num_files} files "
+            f"of {candidate.avg_file_size / 1024**2:.1f} MiB on average."
+        )
+        dh.optimize(zorder_by=zorder_by.get(candidate.table_id))
+        if vacuum_retain_hours is not None:
+            dh.vacuum(vacuum_retain_hours)
+    return candidates
@@ -0,0 +1,220 @@
+"""
+A MERGE of a DataFrame into a Delta table.
+
+The merge is executed with the DeltaTable.merge API of the delta-spark library where it
+is available with a classic Spark session. Otherwise, the DataFrame is registered as a
+global temporary view and the equivalent MERGE statement is executed.
+"""
+
+from typing import List, Optional
+
+from pyspark.sql import DataFrame
+
+from spetlr.delta.table_metadata import TableMetadataCache
+from spetlr.functions import get_unique_tempview_name
+from spetlr.spark import Spark
+
+
+def _get_delta_table_class():
+    try:
+        from delta.tables import DeltaTable
+    except (ImportError, ModuleNotFoundError):
+        return None
+    return DeltaTable
+
+
+class DeltaMergeBuilder:
+    def __init__(
+        self,
+        target_table_name: str,
+        join_cols: List[str],
+        *,
+        update_cols: List[str] = None,
+        insert_cols: List[str] = None,
+        target_predicate: str = None,
+        update_only_changed: bool = False,
+        delete_not_matched_by_source: bool = False,
+        merge_schema: bool = False,
+        use_api: bool = True,
+    ):
+        """
+        target_table_name: The name of the Delta table to merge into.
+        join_cols: The columns that identify a row in source and target.
+        update_cols (optional): The columns to update for matched rows.
+                        Default: all columns of the source.
+                        An empty list disables the update of matched rows.
+        insert_cols (optional): The columns to insert for new rows.
+                        Default: all columns of the source.
+                        An empty list disables the insert of new rows.
+        target_predicate (optional): A condition on the target columns,
+                        which all target rows that can match a source row fulfill.
+                        It lets Delta skip the target files outside of it.
+        update_only_changed (optional): Only update matched rows where
+                        an update column differs, so that unchanged rows
+                        are not rewritten. If merge_schema adds columns,
+                        all matched rows are updated.
+        delete_not_matched_by_source (optional): Delete the target rows that do not
+                        match any source row. With a target_predicate, only the
+                        target rows that fulfill it are deleted.
+        merge_schema (optional): Add new columns of the source to the target.
+        use_api (optional): Use the DeltaTable.merge API where available.
+        """
+        self.target_table_name = target_table_name
+        self.join_cols = join_cols
+        self.update_cols = update_cols
+        self.insert_cols = insert_cols
+        self.target_predicate = target_predicate
+        self.update_only_changed = update_only_changed
+        self.delete_not_matched_by_source = delete_not_matched_by_source
+        self.merge_schema = merge_schema
+        self.use_api = use_api
+
+    def get_merge_condition(self) -> str:
+        conditions = [f"(source.{col} = target.{col})" for col in self.join_cols]
+        if self.target_predicate:
+            conditions.append(f"({self.target_predicate})")
+        return " AND ".join(conditions)
+
+    def get_update_cols(self, df: DataFrame) -> List[str]:
+        if self.update_cols is None:
+            return df.columns
+        return self.update_cols
+
+    def get_insert_cols(self, df: DataFrame) -> List[str]:
+        if self.insert_cols is None:
+            return df.columns
+        return self.insert_cols
+
+    def get_update_condition(self, df: DataFrame) -> Optional[str]:
+        """A condition that is true for matched rows where an update column
+        differs, or None if all matched rows are updated."""
+        if not self.update_only_changed:
+            return None
+
+        update_cols = self.get_update_cols(df)
+        if self.merge_schema:
+            # new columns only exist in the target after the merge,
+            # and every matched row changes when they are added
+            target_cols = {
+                col.lower() for col in Spark.get().table(self.target_table_name).columns
+            }
+            if any(col.lower() not in target_cols for col in update_cols):
+                return None
+
+        types = dict(df.dtypes)
+        conditions = []
+        for col in update_cols:
+            if col in self.join_cols:
+                continue
+            if types.get(col, "").startswith("map"):
+                # maps cannot be compared, compare their string representations
+                conditions.append(
+                    f"NOT (CAST(target.{col} AS string)"
+                    f" <=> CAST(source.{col} AS string))"
+                )
+            else:
+                conditions.append(f"NOT (target.{col} <=> source.{col})")
+
+        # an update of only the join columns never changes anything
+        return " OR ".join(conditions) or "false"
+
+    def get_delete_condition(self) -> Optional[str]:
+        return self.target_predicate or None
+
+    def get_sql(self, df: DataFrame, source_table_name: str) -> str:
+        """The MERGE statement with the given name of the source."""
+        schema_evolution = "WITH SCHEMA EVOLUTION " if self.merge_schema else ""
+        sql = (
+            f"MERGE {schema_evolution}INTO {self.target_table_name} AS target "
+            f"USING {source_table_name} AS source "
+            f"ON {self.get_merge_condition()} "
+        )
+
+        update_cols = self.get_update_cols(df)
+        if update_cols:
+            update_condition = self.get_update_condition(df)
+            sql += "WHEN MATCHED "
+            if update_condition:
+                sql += f"AND ({update_condition}) "
+            sql += "THEN UPDATE SET " + ", ".join(
+                f"target.{col} = source.{col}" for col in update_cols
+            )
+            sql += " "
+
+        insert_cols = self.get_insert_cols(df)
+        if insert_cols:
+            sql += (
+                "WHEN NOT MATCHED THEN "
+                f"INSERT ({', '.join(insert_cols)}) "
+                f"VALUES ({', '.join(f'source.{col}' for col in insert_cols)}) "
+            )
+
+        if self.delete_not_matched_by_source:
+            delete_condition = self.get_delete_condition()
+            sql += "WHEN NOT MATCHED BY SOURCE "
+            if delete_condition:
+                sql += f"AND ({delete_condition}) "
+            sql += "THEN DELETE "
+
+        return sql.strip() + ";"
+
+    def _get_api_merge(self, df: DataFrame):
+        """The merge as built with the DeltaTable API of the delta-spark library,
+        or None if the library or the needed features are not available."""
+        if not self.use_api:
+            return None
+
+        DeltaTable = _get_delta_table_class()
+        spark = Spark.get()
+        if DeltaTable is None or getattr(spark, "_jsparkSession", None) is None:
+            return None
+
+        merge = (
+            DeltaTable.forName(spark, self.target_table_name)
+            .alias("target")
+            .merge(df.alias("source"), self.get_merge_condition())
+        )
+
+        if self.merge_schema:
+            if not hasattr(merge, "withSchemaEvolution"):
+                return None
+            merge = merge.withSchemaEvolution()
+
+        if self.delete_not_matched_by_source and not hasattr(
+            merge, "whenNotMatchedBySourceDelete"
+        ):
+            return None
+
+        update_cols = self.get_update_cols(df)
+        if update_cols:
+            merge = merge.whenMatchedUpdate(
+                condition=self.get_update_condition(df),
+                set={col: f"source.{col}" for col in update_cols},
+            )
+
+        insert_cols = self.get_insert_cols(df)
+        if insert_cols:
+            merge = merge.whenNotMatchedInsert(
+                values={col: f"source.{col}" for col in insert_cols}
+            )
+
+        if self.delete_not_matched_by_source:
+            merge = merge.whenNotMatchedBySourceDelete(
+                condition=self.get_delete_condition()
+            )
+
+        return merge
+
+    def execute(self, df: DataFrame) -> None:
+        merge = self._get_api_merge(df)
+        if merge is not None:
+            merge.execute()
+        else:
+            temp_view_name = get_unique_tempview_name()
+            df.createOrReplaceGlobalTempView(temp_view_name)
+            try:
+                Spark.get().sql(self.get_sql(df, "global_temp." + temp_view_name))
+            finally:
+                Spark.get().catalog.dropGlobalTempView(temp_view_name)
+
+        TableMetadataCache().invalidate(self.target_table_name)
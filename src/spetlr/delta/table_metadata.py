@@ -0,0 +1,105 @@
+"""
+Process-wide cache of the metadata of Delta tables.
+
+Every entry is the result of one DESCRIBE DETAIL query and is kept for a limited
+time (ttl_seconds). Writes through DeltaHandle invalidate the entries of the table,
+so only changes made outside of spetlr can go unnoticed until the entry expires.
+"""
+
+import copy
+import time
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from spetlr.singleton import Singleton
+from spetlr.spark import Spark
+
+
+@dataclass
+class TableMetadata:
+    """The result of DESCRIBE DETAIL for a table."""
+
+    name: str
+    format: Optional[str] = None
+    location: Optional[str] = None
+    partition_columns: List[str] = field(default_factory=list)
+    clustering_columns: List[str] = field(default_factory=list)
+    size_in_bytes: Optional[int] = None
+    num_files: Optional[int] = None
+    properties: Dict[str, str] = field(default_factory=dict)
+    # all columns of DESCRIBE DETAIL, including those above
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_detail(cls, name: str, detail: Dict[str, Any]) -> "TableMetadata":
+        return cls(
+            name=name,
+            format=detail.get("format"),
+            location=detail.get("location"),
+            partition_columns=list(detail.get("partitionColumns") or []),
+            clustering_columns=list(detail.get("clusteringColumns") or []),
+            size_in_bytes=detail.get("sizeInBytes"),
+            num_files=detail.get("numFiles"),
+            properties=dict(detail.get("properties") or {}),
+            detail=detail,
+        )
+
+
+def _get_key(name: str) -> str:
+    name = name.strip()
+    # paths are case sensitive, table names are not
+    return name if "`" in name else name.lower()
+
+
+def _same_table(a: str, b: str) -> bool:
+    """True if one name is the other with more qualifying parts,
+    such as db.tbl and catalog.db.tbl."""
+    if len(a) > len(b):
+        a, b = b, a
+    return a == b or b.endswith("." + a)
+
+
+class TableMetadataCache(metaclass=Singleton):
+    """
+    Caches DESCRIBE DETAIL for each table name, so that handles, specifications
+    and orchestrators that touch the same tables share one query per table.
+    The returned metadata are copies, and can be changed by the caller.
+    """
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, TableMetadata]] = {}
+        self._lock = Lock()
+
+    def set_ttl(self, ttl_seconds: float) -> None:
+        """Set the time that entries are kept. A value of 0 disables the cache."""
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, name: str) -> TableMetadata:
+        """The metadata of the table, from the cache if it has not expired."""
+        key = _get_key(name)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            return copy.deepcopy(entry[1])
+        return self.refresh(name)
+
+    def refresh(self, name: str) -> TableMetadata:
+        """Query the metadata of the table and replace the entry in the cache."""
+        detail = Spark.get().sql(f"DESCRIBE DETAIL {name}").collect()[0].asDict()
+        metadata = TableMetadata.from_detail(name, detail)
+        with self._lock:
+            self._entries[_get_key(name)] = (time.monotonic(), metadata)
+        return copy.deepcopy(metadata)
+
+    def invalidate(self, name: str = None) -> None:
+        """Remove the entries of the table, under any qualification of its name,
+        or all entries if no name is given."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                return
+            key = _get_key(name)
+            for cached in [k for k in self._entries if _same_table(k, key)]:
+                del self._entries[cached]
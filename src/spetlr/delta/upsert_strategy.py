@@ -0,0 +1,260 @@
+"""
+Choice of the cheapest way to upsert a DataFrame into a Delta table.
+
+The choice is made from the metadata of the target table and the key ranges of the
+source, without reading any data of the target:
+- DESCRIBE DETAIL shows whether the target is empty,
+- the min/max statistics of each file in the transaction log, or its partition
+  values, show which files could contain rows with keys in the source key ranges.
+If no file can contain any of the source keys, the source is appended. Otherwise,
+the MERGE is restricted to the partitions of those files, if that prunes anything.
+"""
+
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Dict, List, Optional, Tuple
+
+import pyspark.sql.functions as f
+import pyspark.sql.types as T
+from pyspark.sql import Column, DataFrame
+
+from spetlr.delta.delta_log import get_snapshot_files
+from spetlr.delta.table_metadata import TableMetadataCache
+
+OVERWRITE = "overwrite"
+APPEND = "append"
+PARTITION_MERGE = "partition_merge"
+FULL_MERGE = "full_merge"
+
+# partition pruning in the MERGE statement is only used up to this many values
+MAX_PRUNING_VALUES = 1000
+
+_TIMESTAMP_TYPES = (T.TimestampType, T.TimestampNTZType)
+
+
+@dataclass
+class UpsertPlan:
+    """The strategy chosen for an upsert, and the figures that it is based on."""
+
+    strategy: str
+    reason: str
+    target_files: Optional[int] = None
+    candidate_files: Optional[int] = None
+    target_predicate: Optional[str] = None
+    # the (min, max) of each join column of the source, see get_key_ranges
+    key_ranges: Optional[Dict[str, Tuple[Any, Any]]] = None
+
+
+def get_key_ranges(
+    df: DataFrame, join_cols: List[str]
+) -> Tuple[int, Dict[str, Tuple[Any, Any]]]:
+    """The number of rows and the (min, max) of each join column, in one pass."""
+    row = df.agg(
+        f.count(f.lit(1)).alias("count"),
+        *[f.min(col).alias(f"min_{i}") for i, col in enumerate(join_cols)],
+        *[f.max(col).alias(f"max_{i}") for i, col in enumerate(join_cols)],
+    ).collect()[0]
+    return row["count"], {
+        col: (row[f"min_{i}"], row[f"max_{i}"]) for i, col in enumerate(join_cols)
+    }
+
+
+def _lit(value: Any, data_type: T.DataType) -> Column:
+    return f.lit(value).cast(data_type)
+
+
+def get_candidate_condition(
+    join_cols: List[str],
+    key_ranges: Dict[str, Tuple[Any, Any]],
+    schema: T.StructType,
+    partition_cols: List[str],
+) -> Column:
+    """A condition on the snapshot files, which is true for all files that can
+    contain a row with keys inside the key ranges. Missing statistics are taken
+    to allow any value."""
+    stats_cols = [col for col in join_cols if col not in partition_cols]
+    stats_schema = T.StructType(
+        [
+            T.StructField("numRecords", T.LongType()),
+            T.StructField("minValues", T.StructType([schema[c] for c in stats_cols])),
+            T.StructField("maxValues", T.StructType([schema[c] for c in stats_cols])),
+        ]
+    )
+    stats = f.from_json("stats", stats_schema)
+
+    # files without any rows, such as from writing an empty DataFrame, never match
+    conditions = [f.coalesce(stats["numRecords"] != 0, f.lit(True))]
+    for col in join_cols:
+        data_type = schema[col].dataType
+        low, high = key_ranges[col]
+        if col in partition_cols:
+            value = f.col("partitionValues").getItem(col).cast(data_type)
+            # null keys never match, so files in the null partition never do either
+            conditions.append(
+                f.coalesce(
+                    value.between(_lit(low, data_type), _lit(high, data_type)),
+                    f.lit(False),
+                )
+            )
+        else:
+            max_value = stats["maxValues"][col]
+            if isinstance(data_type, _TIMESTAMP_TYPES):
+                # the statistics of timestamps are truncated to milliseconds
+                max_value = max_value + f.expr("INTERVAL 1 MILLISECOND")
+            conditions.append(
+                f.coalesce(max_value >= _lit(low, data_type), f.lit(True))
+                & f.coalesce(
+                    stats["minValues"][col] <= _lit(high, data_type), f.lit(True)
+                )
+            )
+    return reduce(lambda a, b: a & b, conditions)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("'", "\\'")
+
+
+def get_partition_predicate(
+    partition_values: List[Dict[str, Optional[str]]],
+    schema: T.StructType,
+    partition_cols: List[str],
+) -> str:
+    """A condition on the target, which is true for all rows in the given
+    partitions. The partition values are strings, as in the transaction log."""
+    conditions = []
+    for col in partition_cols:
+        type_name = schema[col].dataType.simpleString()
+        values = sorted({values[col] for values in partition_values} - {None})
+        terms = []
+        if values:
+            literals = ", ".join(
+                "CAST('{}' AS {})".format(_escape(value), type_name) for value in values
+            )
+            terms.append(f"target.{col} IN ({literals})")
+        if any(values[col] is None for values in partition_values):
+            terms.append(f"target.{col} IS NULL")
+        conditions.append("(" + " OR ".join(terms) + ")")
+    return " AND ".join(conditions)
+
+
+def get_source_predicate(
+    df: DataFrame,
+    join_cols: List[str],
+    partition_cols: List[str],
+    cluster_cols: List[str],
+    key_ranges: Dict[str, Tuple[Any, Any]] = None,
+) -> Optional[str]:
+    """A condition on the target, which restricts the MERGE to the partition
+    values and the ranges of the clustering columns that occur in the source.
+    Only join columns are used, since the MERGE condition requires them to be
+    equal in source and target anyway. The ranges are taken from key_ranges,
+    such as those of the UpsertPlan, and only aggregated from the source
+    without them."""
+    schema = df.schema
+    partition_keys = [col for col in partition_cols if col in join_cols]
+    cluster_keys = [
+        col for col in cluster_cols if col in join_cols and col not in partition_keys
+    ]
+
+    conditions = []
+    if partition_keys:
+        rows = (
+            df.select(*[f.col(col).cast("string").alias(col) for col in partition_keys])
+            .distinct()
+            .limit(MAX_PRUNING_VALUES + 1)
+            .collect()
+        )
+        if 0 < len(rows) <= MAX_PRUNING_VALUES:
+            conditions.append(
+                get_partition_predicate(
+                    [row.asDict() for row in rows], schema, partition_keys
+                )
+            )
+
+    if cluster_keys:
+        if key_ranges is None:
+            _, key_ranges = get_key_ranges(df, cluster_keys)
+        for col in cluster_keys:
+            low, high = key_ranges[col]
+            if low is None:
+                continue
+            type_name = schema[col].dataType.simpleString()
+            conditions.append(
+                f"(target.{col} BETWEEN CAST('{_escape(str(low))}' AS {type_name})"
+                f" AND CAST('{_escape(str(high))}' AS {type_name}))"
+            )
+
+    return " AND ".join(conditions) or None
+
+
+def plan_upsert(
+    df: DataFrame,
+    join_cols: List[str],
+    table_name: str,
+    schema: T.StructType,
+) -> Optional[UpsertPlan]:
+    """Choose the strategy for upserting df into the Delta table.
+    Returns None if the statistics of the table are not available."""
+    # always query the current state, which also refreshes the cached metadata
+    metadata = TableMetadataCache().refresh(table_name)
+    if metadata.num_files == 0:
+        return UpsertPlan(OVERWRITE, "the target table is empty", target_files=0)
+
+    count, key_ranges = get_key_ranges(df, join_cols)
+    if count == 0:
+        return UpsertPlan(APPEND, "the source is empty", key_ranges=key_ranges)
+
+    files = get_snapshot_files(metadata.location)
+    if files is None:
+        return None
+
+    partition_cols = metadata.partition_columns
+    files = files.withColumn(
+        "is_candidate",
+        get_candidate_condition(join_cols, key_ranges, schema, partition_cols),
+    )
+    counts = files.agg(
+        f.count(f.lit(1)).alias("files"),
+        f.coalesce(f.sum(f.col("is_candidate").cast("int")), f.lit(0)).alias(
+            "candidates"
+        ),
+    ).collect()[0]
+    target_files, candidate_files = counts["files"], counts["candidates"]
+
+    if candidate_files == 0:
+        return UpsertPlan(
+            APPEND,
+            "no file of the target can contain any of the source keys",
+            target_files=target_files,
+            candidate_files=0,
+            key_ranges=key_ranges,
+        )
+
+    if partition_cols and candidate_files < target_files:
+        partition_values = [
+            row["partitionValues"]
+            for row in files.filter("is_candidate")
+            .select("partitionValues")
+            .distinct()
+            .limit(MAX_PRUNING_VALUES + 1)
+            .collect()
+        ]
+        if len(partition_values) <= MAX_PRUNING_VALUES:
+            return UpsertPlan(
+                PARTITION_MERGE,
+                f"{len(partition_values)} partitions can contain the source keys",
+                target_files=target_files,
+                candidate_files=candidate_files,
+                target_predicate=get_partition_predicate(
+                    partition_values, schema, partition_cols
+                ),
+                key_ranges=key_ranges,
+            )
+
+    return UpsertPlan(
+        FULL_MERGE,
+        "the source keys can match rows in the whole target",
+        target_files=target_files,
+        candidate_files=candidate_files,
+        key_ranges=key_ranges,
+    )
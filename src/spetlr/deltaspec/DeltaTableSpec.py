@@ -6,6 +6,7 @@ from pyspark.sql.utils import AnalysisException
 from spetlr import Configurator
 from spetlr.configurator.sql.parse_sql import parse_single_sql_statement
 from spetlr.delta import DeltaHandle
+from spetlr.delta.table_metadata import TableMetadataCache
 from spetlr.deltaspec.DeltaTableSpecBase import (
     DeltaTableSpecBase,
     _DEFAULT_blankedPropertyKeys,
@@ -98,7 +99,8 @@ class DeltaTableSpec(DeltaTableSpecBase):
         that describes the table of the given name."""
         spark = Spark.get()
         try:
-            details = spark.sql(f"DESCRIBE DETAIL {in_name}").collect()[0].asDict()
+            # the spec is compared with storage, so it must be up to date
+            details = TableMetadataCache().refresh(in_name).detail
 
         except AnalysisException as e:
             raise NoTableAtTarget(str(e))
@@ -213,6 +215,8 @@ class DeltaTableSpec(DeltaTableSpecBase):
             ):
                 print(f"Executing SQL: {statement}")
                 spark.sql(statement)
+            # the statements may rename or move the table
+            TableMetadataCache().invalidate()
 
     def ensure_df_schema(self, df: DataFrame):
         # check if the df can be selected down into the schema of this table
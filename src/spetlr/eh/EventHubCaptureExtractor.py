@@ -1,13 +1,16 @@
 import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-import py4j.protocol
-import pyspark.sql.utils
 from pyspark.sql import DataFrame
 from pyspark.sql import functions as f
+from pyspark.sql.types import IntegerType, StructField, StructType
 
 from spetlr.configurator.configurator import Configurator
+from spetlr.functions import init_dbutils
 from spetlr.spark import Spark
 
 utc = datetime.timezone.utc
@@ -24,6 +27,18 @@ class EventHubCaptureExtractor:
     path: str
     partitioning: str
 
+    # listings of completed partitions, shared by all extractors.
+    # The files of a completed partition no longer change, but they may be
+    # removed by retention, so the listings expire after a while.
+    listing_ttl_seconds: float = 3600
+    # capture writes the files of a period up to one capture window after the
+    # period ended. A partition is only completed after this grace period,
+    # which must be at least the capture window (at most 15 minutes).
+    listing_grace_seconds: float = 15 * 60
+    listing_max_workers: int = 16
+    _listings: Dict[str, Tuple[float, List[str]]] = {}
+    _listings_lock = threading.Lock()
+
     @classmethod
     def from_tc(cls, tbl_id: str):
         tc = Configurator()
@@ -37,6 +52,7 @@ class EventHubCaptureExtractor:
         self.path = path
         self.partitioning = partitioning.lower()
         assert self.partitioning in ["ymd", "ymdh"]
+        self._schema: Optional[StructType] = None
 
     def _validate_timestamp(self, stamp: dt):
         """Check that the given timestamp is an edge
@@ -52,23 +68,18 @@ class EventHubCaptureExtractor:
             return False
         return True
 
-    def _add_columns(self, df: DataFrame) -> DataFrame:
-        # here we extract the partition description from the input filename
-        # partitions are saved in folders like .../y=2022/m=09/d=23/h=02/...
-        # there are many ways to extract these parts. We use a single regular expression
-        # the parts are ordered by assumption (validated in manual tests)
-        # but this ordering is not verified in order to prioritize performance
-        df = df.withColumn(
-            "_parts",
-            f.expr('regexp_extract_all(input_file_name(),"[ymdh]=([0-9]+)/",1)'),
-        )
-        df = df.withColumn("y", f.element_at("_parts", 1).cast("INTEGER"))
-        df = df.withColumn("m", f.element_at("_parts", 2).cast("INTEGER"))
-        df = df.withColumn("d", f.element_at("_parts", 3).cast("INTEGER"))
-        if "h" in self.partitioning:
-            df = df.withColumn("h", f.element_at("_parts", 4).cast("INTEGER"))
+    def _partition_schema(self) -> StructType:
+        return StructType([StructField(c, IntegerType()) for c in self.partitioning])
 
-        # unfortunately, regexp_extract_all and make_timestamp are not exposed
+    def _add_columns(self, df: DataFrame) -> DataFrame:
+        # the partition columns are discovered by spark from the folders
+        # like .../y=2022/m=09/d=23/h=02/... so they are set once per file
+        # instead of being parsed from the file name of every row.
+        # The cast is a no-op when the reader was given the partition schema.
+        for c in self.partitioning:
+            df = df.withColumn(c, f.col(c).cast("INTEGER"))
+
+        # unfortunately, make_timestamp is not exposed
         # in the pyspark wrapper library
         df = df.withColumn(
             "pdate",
@@ -78,11 +89,11 @@ class EventHubCaptureExtractor:
                 + '0,0,"UTC")'
             ),
         )
-        df = df.drop("_parts")
 
         # for some bizarre reason, the built-in string timestamp uses
         # a localized date-time format and not a standardized one.
-        # add a standardized timestamp
+        # add a standardized timestamp. Spark prunes the parsing
+        # if the column is not selected further on.
         df = df.withColumn(
             "EnqueuedTimestamp",
             f.to_timestamp(f.col("EnqueuedTimeUtc"), "M/d/yyyy h:mm:ss a"),
@@ -186,25 +197,137 @@ class EventHubCaptureExtractor:
             raise Exception("The loading logic failed. Contact the maintainer.")
         return parts_to_load
 
-    def _load_union_of_parts(self, parts_to_load: List[str]) -> DataFrame:
-        spark = Spark.get()
-        df = None
-        for part in parts_to_load:
-            try:
-                part_df = spark.read.format("avro").load(self.path + "/" + part)
-            except (pyspark.sql.utils.AnalysisException, py4j.protocol.Py4JError):
-                print(
-                    f"WARNING: part {part} caused an analysis exception. "
-                    "The partition is probably empty."
+    @staticmethod
+    def _part_end(part: str) -> dt:
+        """The end of the period that a part such as "y=2022/m=05/" covers."""
+        values = dict(item.split("=") for item in part.strip("/").split("/"))
+        start = dt(
+            int(values["y"]),
+            int(values.get("m", 1)),
+            int(values.get("d", 1)),
+            int(values.get("h", 0)),
+            tzinfo=utc,
+        )
+        if "h" in values:
+            return start + datetime.timedelta(hours=1)
+        if "d" in values:
+            return start + datetime.timedelta(days=1)
+        if "m" in values:
+            return (start + datetime.timedelta(days=32)).replace(day=1)
+        return start.replace(year=start.year + 1)
+
+    @staticmethod
+    def _ls(dbutils, path: str) -> list:
+        """The items in a directory. A missing directory is empty."""
+        try:
+            return dbutils.fs.ls(path)
+        except Exception as e:
+            if "FileNotFoundException" not in str(e):
+                raise
+            return []
+
+    def _list_parts(self, parts: List[str]) -> List[str]:
+        """All avro files of the parts. The directory tree is walked one level
+        at a time, where all directories of a level are listed in parallel.
+        Completed parts with files are cached for listing_ttl_seconds."""
+        files_by_part: Dict[str, List[str]] = {}
+        with self._listings_lock:
+            for part in parts:
+                listed, files = self._listings.get(self.path + "/" + part, (0, None))
+                if time.time() - listed < self.listing_ttl_seconds:
+                    files_by_part[part] = files
+
+        to_list = [part for part in parts if part not in files_by_part]
+        if to_list:
+            dbutils = init_dbutils()
+            listed_files: Dict[str, List[str]] = {part: [] for part in to_list}
+            level = [(part, self.path + "/" + part) for part in to_list]
+            with ThreadPoolExecutor(max_workers=self.listing_max_workers) as pool:
+                while level:
+                    listings = pool.map(lambda item: self._ls(dbutils, item[1]), level)
+                    next_level = []
+                    for (part, _), infos in zip(level, listings):
+                        for info in infos:
+                            if info.name.endswith("/"):
+                                next_level.append((part, info.path))
+                            elif info.name.endswith(".avro"):
+                                listed_files[part].append(info.path)
+                    level = next_level
+
+            completed = self._now_utc() - datetime.timedelta(
+                seconds=self.listing_grace_seconds
+            )
+            with self._listings_lock:
+                for part, files in listed_files.items():
+                    files_by_part[part] = sorted(files)
+                    if not files:
+                        print(
+                            f"WARNING: part {part} contains no files. "
+                            "The partition is probably empty."
+                        )
+                    # the current partition is still being written to,
+                    # and an empty partition may just not have been written yet
+                    if files and self._part_end(part) <= completed:
+                        self._listings[self.path + "/" + part] = (
+                            time.time(),
+                            files_by_part[part],
+                        )
+
+        return [file for part in parts for file in files_by_part[part]]
+
+    @classmethod
+    def clear_listing_cache(cls) -> None:
+        with cls._listings_lock:
+            cls._listings.clear()
+
+    def _find_file(self) -> Optional[str]:
+        """Any avro file of the capture, found by descending into the
+        first directory at each level."""
+        dbutils = init_dbutils()
+        directories = [self.path]
+        while directories:
+            infos = self._ls(dbutils, directories.pop())
+            for info in infos:
+                if info.name.endswith(".avro"):
+                    return info.path
+            # visit the directories in order
+            directories.extend(
+                sorted(
+                    (info.path for info in infos if info.name.endswith("/")),
+                    reverse=True,
                 )
-                continue
-            if df is None:
-                df = self._add_columns(part_df)
-            else:
-                df = df.unionByName(self._add_columns(part_df))
+            )
+        return None
+
+    def _get_schema(self, files: List[str] = None) -> StructType:
+        """The avro schema of the capture files, which is read once, from one file."""
+        if self._schema is None:
+            file = files[0] if files else self._find_file()
+            self._schema = (
+                Spark.get().read.format("avro").load(file or self.path).schema
+            )
+        return self._schema
+
+    def _get_read_schema(self, files: List[str] = None) -> StructType:
+        """The avro schema followed by the partition columns."""
+        return StructType(
+            self._get_schema(files).fields + self._partition_schema().fields
+        )
 
-        # Note: return value can be None!
-        return df
+    def _load_union_of_parts(self, parts_to_load: List[str]) -> DataFrame:
+        files = self._list_parts(parts_to_load)
+        if not files:
+            # Note: return value can be None!
+            return None
+
+        # with the basePath, the partition columns are discovered from the folders
+        return self._add_columns(
+            Spark.get()
+            .read.format("avro")
+            .option("basePath", self.path)
+            .schema(self._get_read_schema(files))
+            .load(files)
+        )
 
     def read(
         self,
@@ -243,8 +366,9 @@ class EventHubCaptureExtractor:
             from_partition, to_partition
         )
 
-        # data is grouped to use as few spark.read.load commands as possible
-        # while still respecting the given limits exactly
+        # the slice is broken into as few parts as possible,
+        # while still respecting the given limits exactly.
+        # The files of all parts are then loaded together.
         parts_to_load = self._break_into_partitioning_parts(
             from_partition, to_partition
         )
@@ -255,8 +379,10 @@ class EventHubCaptureExtractor:
 
         df = self._load_union_of_parts(parts_to_load)
         if df is None:
-            schema = Spark.get().read.format("avro").load(self.path).schema
-            df = Spark.get().createDataFrame([], schema)
+            # an empty result with the same columns as a non-empty one
+            df = self._add_columns(
+                Spark.get().createDataFrame([], self._get_read_schema())
+            )
 
         return df
 
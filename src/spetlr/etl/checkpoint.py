@@ -0,0 +1,102 @@
+from typing import Optional
+
+from pyspark.sql import DataFrame
+from pyspark.sql.utils import AnalysisException
+
+from spetlr.exceptions import SpetlrException
+from spetlr.spark import Spark
+
+from .types import dataset_group
+
+
+class CheckpointException(SpetlrException):
+    pass
+
+
+class StepCheckpoints:
+    """
+    Materializes the complete dataset group after selected orchestrator steps,
+    so that a failed run can be resumed after the last completed checkpoint.
+
+    The checkpoint of step i of a run is stored under
+    `{location}/{run_id}/step_{i}/`, with one table per dataset and a manifest
+    of the dataset keys. The manifest is written last, so only complete
+    checkpoints are ever loaded.
+
+    Only DataFrames (and None) with string keys can be checkpointed. Streaming
+    DataFrames are not supported.
+    """
+
+    manifest_schema = "position INT, key STRING, is_none BOOLEAN"
+
+    def __init__(self, location: str, run_id: str, data_format: str = "delta"):
+        self.location = location.rstrip("/")
+        self.run_id = run_id
+        self.data_format = data_format
+
+    def _step_path(self, step_index: int) -> str:
+        return f"{self.location}/{self.run_id}/step_{step_index}"
+
+    def _dataset_path(self, step_index: int, position: int) -> str:
+        return f"{self._step_path(step_index)}/dataset_{position}"
+
+    def _manifest_path(self, step_index: int) -> str:
+        return f"{self._step_path(step_index)}/_manifest"
+
+    def save(self, step_index: int, datasets: dataset_group) -> dataset_group:
+        """Writes the datasets and returns them as read back from the checkpoint."""
+        manifest = []
+        for position, (key, df) in enumerate(datasets.items()):
+            if not isinstance(key, str):
+                raise CheckpointException(
+                    f"The dataset key {key!r} is not a string "
+                    "and cannot be checkpointed."
+                )
+            if df is None:
+                manifest.append((position, key, True))
+                continue
+            if not isinstance(df, DataFrame) or df.isStreaming:
+                raise CheckpointException(
+                    f"The dataset {key} is not a batch DataFrame "
+                    "and cannot be checkpointed."
+                )
+            (
+                df.write.format(self.data_format)
+                .mode("overwrite")
+                .option("overwriteSchema", "true")
+                .save(self._dataset_path(step_index, position))
+            )
+            manifest.append((position, key, False))
+
+        (
+            Spark.get()
+            .createDataFrame(manifest, schema=self.manifest_schema)
+            .coalesce(1)
+            .write.mode("overwrite")
+            .json(self._manifest_path(step_index))
+        )
+
+        return self.load(step_index)
+
+    def load(self, step_index: int) -> Optional[dataset_group]:
+        """Returns the checkpointed datasets,
+        or None if the step has no complete checkpoint in this run."""
+        spark = Spark.get()
+        try:
+            manifest = (
+                spark.read.schema(self.manifest_schema)
+                .json(self._manifest_path(step_index))
+                .collect()
+            )
+        except AnalysisException:
+            return None
+
+        datasets = {}
+        for row in sorted(manifest, key=lambda r: r.position):
+            if row.is_none:
+                datasets[row.key] = None
+            else:
+                datasets[row.key] = spark.read.format(self.data_format).load(
+                    self._dataset_path(step_index, row.position)
+                )
+        return datasets
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pyspark import StorageLevel
+
+from .step_graph import get_step_footprint
+from .types import EtlBase, dataset_group
+
+# the producer index of the datasets that are given as inputs to the orchestrator
+INPUTS = -1
+
+
+@dataclass(eq=False)
+class DatasetVersion:
+    """One value of a dataset key, from the step that produces it
+    until the step that removes or replaces it."""
+
+    key: str
+    producer: int
+    consumers: Set[int] = field(default_factory=set)
+    derived: List["DatasetVersion"] = field(default_factory=list)
+
+    def get_users(self) -> Set[int]:
+        """All steps that evaluate this version, either directly
+        or through a lazily derived dataset."""
+        users = set(self.consumers)
+        for version in self.derived:
+            users |= version.get_users()
+        return users
+
+
+def get_dataset_versions(
+    steps: List[EtlBase], input_keys: Iterable[str]
+) -> List[DatasetVersion]:
+    """Follows the dataset keys through the steps, and records who reads each
+    value. Values that pass through a step with an unknown footprint
+    are no longer followed."""
+    current = {key: DatasetVersion(key, INPUTS) for key in input_keys}
+    versions = list(current.values())
+
+    for i, step in enumerate(steps):
+        footprint = get_step_footprint(step)
+
+        if footprint.reads is None:
+            read_versions = list(current.values())
+        else:
+            read_versions = [current[key] for key in current if key in footprint.reads]
+        for version in read_versions:
+            version.consumers.add(i)
+
+        if footprint.writes is None:
+            current = {}
+        else:
+            for key in footprint.writes:
+                current.pop(key, None)
+
+        if footprint.outputs is None:
+            current = {}
+            continue
+
+        for key in footprint.outputs:
+            version = DatasetVersion(key, i)
+            for read_version in read_versions:
+                read_version.derived.append(version)
+            current[key] = version
+            versions.append(version)
+
+    return versions
+
+
+class DatasetPersister:
+    """
+    Persists the datasets that are read by more than one step of an orchestrator,
+    so that their lineage is not recomputed by every step. Each dataset is
+    unpersisted once all steps that use it, directly or through datasets
+    derived from it, have completed.
+
+    Datasets that are already cached when they are produced are left untouched.
+    """
+
+    def __init__(
+        self,
+        steps: List[EtlBase],
+        inputs: dataset_group,
+        storage_level: StorageLevel = None,
+    ):
+        self.storage_level = storage_level
+        self._shared: Dict[int, List[DatasetVersion]] = {}
+        self._remaining: Dict[DatasetVersion, Set[int]] = {}
+        self._persisted: Dict[DatasetVersion, Any] = {}
+
+        for version in get_dataset_versions(steps, inputs.keys()):
+            if len(version.consumers) > 1:
+                self._shared.setdefault(version.producer, []).append(version)
+                self._remaining[version] = version.get_users()
+
+        self._persist(INPUTS, inputs)
+
+    def step_completed(self, i: int, outputs: dataset_group) -> None:
+        """To be called after step i has completed,
+        with a dataset group that contains the outputs of the step."""
+        for version, df in list(self._persisted.items()):
+            remaining = self._remaining[version]
+            remaining.discard(i)
+            if not remaining:
+                del self._persisted[version]
+                df.unpersist()
+
+        self._persist(i, outputs)
+
+    def release(self) -> None:
+        """Unpersist all datasets, also those that still have remaining users."""
+        for df in self._persisted.values():
+            df.unpersist()
+        self._persisted = {}
+
+    def _persist(self, producer: int, datasets: dataset_group) -> None:
+        for version in self._shared.get(producer, []):
+            df = datasets.get(version.key)
+            if not self._can_persist(df):
+                continue
+            if self.storage_level is None:
+                df.persist()
+            else:
+                df.persist(self.storage_level)
+            self._persisted[version] = df
+
+    @staticmethod
+    def _can_persist(df: Optional[Any]) -> bool:
+        return (
+            df is not None
+            and hasattr(df, "persist")
+            and not getattr(df, "is_cached", False)
+        )
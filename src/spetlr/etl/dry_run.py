@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
+
+from pyspark.sql import DataFrame
+
+from .types import EtlBase
+
+_active_report: ContextVar[Optional["DryRunReport"]] = ContextVar(
+    "spetlr_dry_run_report", default=None
+)
+
+
+@dataclass
+class PlannedSave:
+    """The plans of a DataFrame that a loader would have saved."""
+
+    loader_name: str
+    dataset_key: str
+    analyzed_plan: Optional[str] = None
+    optimized_plan: Optional[str] = None
+    physical_plan: Optional[str] = None
+    size_in_bytes: Optional[int] = None
+    row_count: Optional[int] = None
+
+
+class DryRunReport:
+    """
+    Collects the plans of all DataFrames that loaders would have saved
+    while the report is active. See Orchestrator.etl(dry_run=True).
+
+    The plans and the size estimates of the optimizer are read from the query
+    execution of each DataFrame. This does not execute the query, but it requires
+    a classic Spark session, otherwise only the dataset keys are recorded.
+    """
+
+    def __init__(self):
+        self._saves: List[PlannedSave] = []
+        self._lock = Lock()
+
+    @staticmethod
+    def get_active() -> Optional["DryRunReport"]:
+        return _active_report.get()
+
+    @contextmanager
+    def activate(self) -> Iterator["DryRunReport"]:
+        token = _active_report.set(self)
+        try:
+            yield self
+        finally:
+            _active_report.reset(token)
+
+    def add(self, loader: EtlBase, dataset_key: str, df: DataFrame) -> None:
+        planned = PlannedSave(
+            loader_name=type(loader).__name__, dataset_key=str(dataset_key)
+        )
+        jdf = getattr(df, "_jdf", None)
+        if jdf is not None:
+            query_execution = jdf.queryExecution()
+            planned.analyzed_plan = query_execution.analyzed().toString()
+            optimized_plan = query_execution.optimizedPlan()
+            planned.optimized_plan = optimized_plan.toString()
+            planned.physical_plan = query_execution.executedPlan().toString()
+
+            stats = optimized_plan.stats()
+            planned.size_in_bytes = int(stats.sizeInBytes().toString())
+            if stats.rowCount().isDefined():
+                planned.row_count = int(stats.rowCount().get().toString())
+
+        with self._lock:
+            self._saves.append(planned)
+
+    def get_saves(self) -> List[PlannedSave]:
+        with self._lock:
+            return list(self._saves)
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        return [asdict(planned) for planned in self.get_saves()]
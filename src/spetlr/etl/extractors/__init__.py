@@ -1,3 +1,4 @@
+from .change_feed_extractor import ChangeFeedExtractor
 from .check_schema_extractor import CheckSchemaExtractor
 from .incremental_extractor import IncrementalExtractor
 from .lazy_extractor import LazyExtractor
@@ -7,6 +8,7 @@ from .simple_extractor import SimpleExtractor
 from .stream_extractor import StreamExtractor
 
 __all__ = [
+    "ChangeFeedExtractor",
     "CheckSchemaExtractor",
     "IncrementalExtractor",
     "LazyExtractor",
@@ -0,0 +1,129 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+import pyspark.sql.functions as f
+import pyspark.sql.types as T
+from pyspark.sql import DataFrame
+from pyspark.sql.utils import AnalysisException
+
+from spetlr.delta import DeltaHandle
+from spetlr.etl import Extractor
+from spetlr.etl.dry_run import DryRunReport
+from spetlr.etl.types import EtlBase, dataset_group
+from spetlr.spark import Spark
+
+
+class ChangeFeedExtractor(Extractor):
+    """This extractor reads the commits to a Delta table since the last run,
+    from the change data feed of the table. The change data feed must be enabled,
+    see DeltaHandle.enable_change_data_feed.
+
+    The last consumed version of the table is kept per consumer_id in the
+    bookkeeping table, which is created on the first commit. The first run of a
+    consumer reads the current content of the table, as inserts.
+    Runs without new commits return an empty DataFrame.
+
+    The version is only stored by commit(), which should be called once the
+    extracted data is loaded. In an orchestrator, add commit_step() after the
+    loaders:
+
+        extractor = ChangeFeedExtractor(source_dh, "silver", bookkeeping_dh)
+        Orchestrator()
+        .extract_from(extractor)
+        .load_into(SimpleLoader(target_dh, mode="upsert", join_cols=["id"]))
+        .step(extractor.commit_step())
+
+    All rows have the columns _change_type, _commit_version and _commit_timestamp.
+    """
+
+    bookkeeping_schema = T.StructType(
+        [
+            T.StructField("consumer_id", T.StringType()),
+            T.StructField("table_name", T.StringType()),
+            T.StructField("version", T.LongType()),
+            T.StructField("committed", T.TimestampType()),
+        ]
+    )
+
+    def __init__(
+        self,
+        handle: DeltaHandle,
+        consumer_id: str,
+        bookkeeping_handle: DeltaHandle,
+        dataset_key: str = None,
+    ):
+        super().__init__(dataset_key=dataset_key)
+        self.handle = handle
+        self.consumer_id = consumer_id
+        self.bookkeeping_handle = bookkeeping_handle
+        self.pending_version: Optional[int] = None
+
+    def get_last_version(self) -> Optional[int]:
+        """The last version of the table that the consumer has committed."""
+        try:
+            bookkeeping = self.bookkeeping_handle.read()
+        except AnalysisException:
+            # the table is created on the first commit
+            return None
+        return (
+            bookkeeping.filter(
+                (f.col("consumer_id") == self.consumer_id)
+                & (f.col("table_name") == self.handle.get_tablename())
+            )
+            .agg(f.max("version"))
+            .collect()[0][0]
+        )
+
+    def _read_snapshot(self, version: int) -> DataFrame:
+        return (
+            self.handle.read_version(version)
+            .withColumn("_change_type", f.lit("insert"))
+            .withColumn("_commit_version", f.lit(version).cast("long"))
+            .withColumn("_commit_timestamp", f.lit(None).cast("timestamp"))
+        )
+
+    def read(self) -> DataFrame:
+        last_version = self.get_last_version()
+        latest_version = self.handle.get_latest_version()
+        self.pending_version = latest_version
+
+        if last_version is None:
+            return self._read_snapshot(latest_version)
+        if last_version >= latest_version:
+            return self._read_snapshot(latest_version).limit(0)
+        return self.handle.read_changes(last_version + 1, latest_version)
+
+    def commit(self) -> None:
+        """Store the version that the last read extracted up to."""
+        if self.pending_version is None:
+            return
+        self.bookkeeping_handle.append(
+            Spark.get().createDataFrame(
+                [
+                    (
+                        self.consumer_id,
+                        self.handle.get_tablename(),
+                        self.pending_version,
+                        datetime.now(timezone.utc),
+                    )
+                ],
+                self.bookkeeping_schema,
+            )
+        )
+        self.pending_version = None
+
+    def commit_step(self) -> EtlBase:
+        """An orchestrator step that commits this extractor."""
+        return _ChangeFeedCommit(self)
+
+
+class _ChangeFeedCommit(EtlBase):
+    def __init__(self, extractor: ChangeFeedExtractor):
+        super().__init__()
+        self.extractor = extractor
+
+    def etl(self, inputs: dataset_group) -> dataset_group:
+        # nothing was loaded in a dry run
+        if DryRunReport.get_active() is None:
+            self.extractor.commit()
+        return inputs
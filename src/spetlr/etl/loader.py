@@ -2,6 +2,7 @@ from typing import List, Union
 
 from pyspark.sql import DataFrame
 
+from .dry_run import DryRunReport
 from .types import EtlBase, dataset_group
 
 
@@ -12,6 +13,9 @@ class Loader(EtlBase):
 
     In regards to the etl step, a loader USES the input dataset(s)
     and does not consume or change it.
+
+    While a DryRunReport is active, save and save_many are not called,
+    instead the plans of the datasets are added to the report.
     """
 
     def __init__(
@@ -29,25 +33,43 @@ class Loader(EtlBase):
     def etl(self, inputs: dataset_group) -> dataset_group:
         if len(self.dataset_input_key_list) > 0:
             if len(self.dataset_input_key_list) == 1:
-                df = inputs[self.dataset_input_key_list[0]]
+                key = self.dataset_input_key_list[0]
+                df = inputs[key]
                 if df is not None:
-                    self.save(df)
+                    self._save(key, df)
             else:
                 datasetFilteret = {
                     datasetKey: df
                     for datasetKey, df in inputs.items()
                     if datasetKey in self.dataset_input_key_list
                 }
-                self.save_many(datasetFilteret)
+                self._save_many(datasetFilteret)
         elif len(inputs) == 1:
-            df = next(iter(inputs.values()))
+            key, df = next(iter(inputs.items()))
             if df is not None:
-                self.save(df)
+                self._save(key, df)
         else:
-            self.save_many(inputs)
+            self._save_many(inputs)
 
         return inputs
 
+    # during a dry run, the plans are recorded instead of saving the data
+    def _save(self, key: str, df: DataFrame) -> None:
+        report = DryRunReport.get_active()
+        if report is None:
+            self.save(df)
+        else:
+            report.add(self, key, df)
+
+    def _save_many(self, datasets: dataset_group) -> None:
+        report = DryRunReport.get_active()
+        if report is None:
+            self.save_many(datasets)
+        else:
+            for key, df in datasets.items():
+                if df is not None:
+                    report.add(self, key, df)
+
     def save(self, df: DataFrame) -> None:
         raise NotImplementedError()
 
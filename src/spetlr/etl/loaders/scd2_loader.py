@@ -3,10 +3,9 @@ from typing import List
 from pyspark.sql import DataFrame
 
 from spetlr.delta import DeltaHandle
+from spetlr.delta.merge_builder import DeltaMergeBuilder
 from spetlr.etl import Loader
 from spetlr.etl.transformers import ValidFromToTransformer
-from spetlr.functions import get_unique_tempview_name
-from spetlr.utils import GetMergeStatement
 from spetlr.utils.Md5HashColumn import Md5HashColumn
 
 
@@ -87,25 +86,16 @@ class ValidFromToUpsertLoader(Loader):
             time_col=self.time_col, wnd_cols=self.join_cols
         ).process(df_ready)
 
-        # Save the data as a view such that the merge statement
-        # can pick it up
-        temp_view_name = get_unique_tempview_name()
-        df.createOrReplaceGlobalTempView(temp_view_name)  # The correct solution
-
-        # Create the upsert (merge) statement
-        _sink_table_name = self.sink_handle.get_tablename()
+        # Merge on the hash-value, only rewriting the rows whose SCD2 values change
         _sink_cols = self.sink_handle.read().columns
 
-        _merge_statement = GetMergeStatement(
-            merge_statement_type="delta",
-            target_table_name=_sink_table_name,
-            source_table_name="global_temp." + temp_view_name,
-            insert_cols=_sink_cols,
+        DeltaMergeBuilder(
+            self.sink_handle.get_tablename(),
             join_cols=[self.hash_value_col],
             update_cols=_sink_cols,
-        )
-
-        df._jdf.sparkSession().sql(_merge_statement)
+            insert_cols=_sink_cols,
+            update_only_changed=True,
+        ).execute(df)
 
 
 SCD2UpsertLoader = ValidFromToUpsertLoader
@@ -1,9 +1,16 @@
+from datetime import datetime
 from typing import List
 from uuid import uuid4
 
+import pyspark.sql.functions as F
+from pyspark.sql import DataFrame
+from pyspark.sql.types import TimestampType
+
 from spetlr.etl import EtlBase, Orchestrator, dataset_group
+from spetlr.etl.dry_run import DryRunReport
 from spetlr.etl.loaders import SimpleLoader
 from spetlr.etl.loaders.simple_loader import Appendable
+from spetlr.etl.profiling import StepProfiler
 from spetlr.etl.transformers import UnionTransformer
 
 from .log_transformer import LogTransformer
@@ -27,6 +34,11 @@ class LogOrchestrator(Orchestrator):
         suppress_composition_warning (bool, optional):
             Whether to suppress warnings about potential changes in the composition of
             the ETL process. Defaults to False.
+        max_parallel_steps (int, optional): The number of independent steps that
+            may run concurrently. Defaults to 1, which executes the steps in sequence.
+        profile_steps (bool, optional): Whether to record the wall time, dataset keys
+            and Spark jobs of every step. The step profiles are appended to the
+            handles after the execution. Defaults to False.
 
     Methods:
         step(etl: EtlBase) -> LogOrchestrator:
@@ -36,17 +48,23 @@ class LogOrchestrator(Orchestrator):
         step_log(log_transformers: LogTransformer) -> LogOrchestrator:
             Adds LogTransformers to the orchestrator. It has the alias 'log_with'. This
             step should be used when wanting to add a logging step.
-        etl(inputs: dataset_group) ->dataset_group:
-            Executes the ETL process. It has the alias 'execute'.
+        etl(inputs: dataset_group, dry_run: bool, run_id: str) ->dataset_group:
+            Executes the ETL process. It has the alias 'execute'. With dry_run, the
+            loaders only record the plans of their datasets. With run_id, the run
+            can be resumed from its checkpoints, see Orchestrator.
     """
 
     def __init__(
         self,
         handles: List[Appendable],
         suppress_composition_warning=False,
+        max_parallel_steps=1,
+        profile_steps=False,
     ):
         self.handles = handles
-        super().__init__(suppress_composition_warning)
+        super().__init__(
+            suppress_composition_warning, max_parallel_steps, profile_steps
+        )
         self.log_transformers_output_keys = []
 
     def step_log(
@@ -69,14 +87,14 @@ class LogOrchestrator(Orchestrator):
 
     log_with = step_log
 
-    def step(self, etl: EtlBase) -> "LogOrchestrator":
-        return super().step(etl)
+    def step(self, etl: EtlBase, checkpoint: bool = False) -> "LogOrchestrator":
+        return super().step(etl, checkpoint)
 
     extract_from = step
     transform_with = step
     load_into = step
 
-    def etl(self, inputs: dataset_group = None) -> dataset_group:
+    def _etl(self, inputs: dataset_group, run_id: str = None) -> dataset_group:
         # First check if any log transformers have been added.
         # Note that if no log transformers have been added the LogOrchestrator will
         # behave just like a normal orchestrator.
@@ -111,6 +129,23 @@ class LogOrchestrator(Orchestrator):
                 )
 
         # finally execute the orchestrator as usual
-        return super().etl(inputs)
+        datasets = super()._etl(inputs, run_id)
 
-    execute = etl
+        # the step profiles are loaded after all steps, including the log loaders,
+        # have been measured. Nothing is loaded in a dry run.
+        if self.step_profiler is not None and DryRunReport.get_active() is None:
+            df_profile = self._create_profile_log()
+            for handle in self.handles:
+                handle.append(df_profile)
+
+        return datasets
+
+    def _create_profile_log(self) -> DataFrame:
+        df = self.step_profiler.as_dataframe()
+        return df.select(
+            F.lit(str(uuid4())).alias("LogId"),
+            F.lit(type(self).__name__).alias("LogName"),
+            F.lit(datetime.utcnow()).cast(TimestampType()).alias("LogTimestamp"),
+            F.lit(StepProfiler.__name__).alias("LogMethodName"),
+            *df.columns,
+        )
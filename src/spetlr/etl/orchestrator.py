@@ -1,6 +1,21 @@
 import warnings
-from typing import List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Dict, List, Optional, Set
 
+from pyspark import StorageLevel
+
+from .checkpoint import StepCheckpoints
+from .dataset_persister import DatasetPersister
+from .dry_run import DryRunReport
+from .profiling import StepProfiler
+from .step_graph import (
+    RecordingGroup,
+    StepResult,
+    get_step_dependencies,
+    get_step_footprint,
+    select_inputs,
+)
 from .types import EtlBase, dataset_group
 
 
@@ -9,14 +24,63 @@ class Orchestrator(EtlBase):
     It is up to the user of this library that extractors,
     transformers and loaders live up to their names and are not
     used in a wrong order.
+
+    With max_parallel_steps larger than 1, steps that do not depend on each
+    other through their dataset keys are executed concurrently on a thread pool
+    of that size. Steps whose keys cannot be determined, such as nested
+    orchestrators or steps with a custom etl method, wait for all earlier steps
+    and block all later steps. Extractors are given an empty dataset group in
+    this mode, so extractors that use self.previous_extractions need the
+    default sequential execution.
+
+    With profile_steps, every execution records the wall time, the dataset keys
+    and the Spark jobs of each step in a StepProfiler, available afterwards
+    as self.step_profiler.
+
+    With persist_shared_datasets, datasets that are read by more than one step
+    are persisted with the given storage level (default: the DataFrame default)
+    and unpersisted as soon as all steps using them have completed.
+
+    With etl(dry_run=True), extractors and transformers are executed as usual,
+    but loaders only record the plans and size estimates of the datasets they
+    would have saved in a DryRunReport, available afterwards as
+    self.dry_run_report. Steps that are not Loaders are executed as usual.
+
+    Steps added with checkpoint=True materialize the complete dataset group
+    below checkpoint_location when they complete in a run with a run_id,
+    etl(run_id=...). A later run with the same run_id skips all steps up to
+    the last completed checkpoint and continues from the reloaded datasets.
+    Checkpointed runs are executed sequentially, and no checkpoints are
+    written or read in a dry run.
     """
 
-    def __init__(self, suppress_composition_warning=False):
+    def __init__(
+        self,
+        suppress_composition_warning=False,
+        max_parallel_steps=1,
+        profile_steps=False,
+        persist_shared_datasets=False,
+        persist_storage_level: StorageLevel = None,
+        checkpoint_location: str = None,
+        checkpoint_format: str = "delta",
+    ):
         super().__init__()
         self.steps: List[EtlBase] = []
         self.suppress_composition_warning = suppress_composition_warning
+        self.max_parallel_steps = max_parallel_steps
+        self.profile_steps = profile_steps
+        self.step_profiler: Optional[StepProfiler] = None
+        self.persist_shared_datasets = persist_shared_datasets
+        self.persist_storage_level = persist_storage_level
+        self._dataset_persister: Optional[DatasetPersister] = None
+        self.dry_run_report: Optional[DryRunReport] = None
+        self.checkpoint_location = checkpoint_location
+        self.checkpoint_format = checkpoint_format
+        self.checkpoint_steps: Set[int] = set()
 
-    def step(self, etl: EtlBase) -> "Orchestrator":
+    def step(self, etl: EtlBase, checkpoint: bool = False) -> "Orchestrator":
+        if checkpoint:
+            self.checkpoint_steps.add(len(self.steps))
         self.steps.append(etl)
         return self
 
@@ -25,16 +89,84 @@ class Orchestrator(EtlBase):
     transform_with = step
     load_into = step
 
-    def etl(self, inputs: dataset_group = None) -> dataset_group:
+    def etl(
+        self,
+        inputs: dataset_group = None,
+        dry_run: bool = False,
+        run_id: str = None,
+    ) -> dataset_group:
         inputs = inputs or {}
 
-        # make a shallow copy of the inputs for waring after the first step
-        datasets = inputs.copy()
         if not self.steps:
             raise NotImplementedError("The orchestrator has no steps.")
 
-        # treat the fist step differently to warn in case the input was not handled
-        datasets = self.steps[0].etl(datasets)
+        if dry_run:
+            self.dry_run_report = DryRunReport()
+            with self.dry_run_report.activate():
+                return self._etl(inputs, run_id)
+        return self._etl(inputs, run_id)
+
+    execute = etl
+
+    def _etl(self, inputs: dataset_group, run_id: str = None) -> dataset_group:
+        checkpoints = None
+        if run_id is not None and DryRunReport.get_active() is None:
+            if not self.checkpoint_location:
+                raise ValueError("A run_id requires a checkpoint_location.")
+            if self.max_parallel_steps > 1:
+                raise ValueError("Checkpointed runs cannot run steps in parallel.")
+            checkpoints = StepCheckpoints(
+                self.checkpoint_location, run_id, self.checkpoint_format
+            )
+
+        self.step_profiler = StepProfiler() if self.profile_steps else None
+        self._dataset_persister = (
+            DatasetPersister(self.steps, inputs, self.persist_storage_level)
+            if self.persist_shared_datasets and DryRunReport.get_active() is None
+            else None
+        )
+
+        try:
+            if self.max_parallel_steps > 1:
+                return self._etl_parallel(inputs)
+            return self._etl_sequential(inputs, checkpoints)
+        finally:
+            if self._dataset_persister is not None:
+                self._dataset_persister.release()
+
+    def _etl_sequential(
+        self, inputs: dataset_group, checkpoints: StepCheckpoints = None
+    ) -> dataset_group:
+        # make a shallow copy of the inputs for waring after the first step
+        datasets = inputs.copy()
+        start = 0
+
+        if checkpoints is not None:
+            # resume after the last completed checkpoint of the run
+            for i in sorted(self.checkpoint_steps, reverse=True):
+                resumed = checkpoints.load(i)
+                if resumed is not None:
+                    datasets = resumed
+                    start = i + 1
+                    break
+            for i in range(start):
+                self._step_completed(i, datasets)
+
+        for i in range(start, len(self.steps)):
+            datasets = self._execute_step(i, datasets)
+
+            # treat the fist step differently to warn
+            # in case the input was not handled
+            if i == 0:
+                self._check_composition(inputs, datasets)
+
+            if checkpoints is not None and i in self.checkpoint_steps:
+                datasets = checkpoints.save(i, datasets)
+
+            self._step_completed(i, datasets)
+        return datasets
+
+    def _check_composition(self, inputs: dataset_group, datasets: dataset_group):
         if len(inputs) and (len(inputs) + 1 == len(datasets)):
             # There were inputs to the orchestrator,
             # and the first step did not clean them up.
@@ -56,8 +188,69 @@ class Orchestrator(EtlBase):
                     "write extractors that clean up in self.previous_extractions"
                 )
 
-        for step in self.steps[1:]:
-            datasets = step.etl(datasets)
-        return datasets
+    def _execute_step(self, i: int, datasets: dataset_group) -> dataset_group:
+        if self.step_profiler is None:
+            return self.steps[i].etl(datasets)
+        return self.step_profiler.run_step(self.steps[i], datasets, i)
 
-    execute = etl
+    def _step_completed(self, i: int, outputs: dataset_group) -> None:
+        if self._dataset_persister is not None:
+            self._dataset_persister.step_completed(i, outputs)
+
+    def _run_step(self, i: int, datasets: RecordingGroup) -> StepResult:
+        return StepResult.from_etl(datasets, self._execute_step(i, datasets))
+
+    def _etl_parallel(self, inputs: dataset_group) -> dataset_group:
+        dependencies = get_step_dependencies(self.steps)
+        footprints = [get_step_footprint(step) for step in self.steps]
+
+        pending = set(range(len(self.steps)))
+        running = {}
+        results: Dict[int, StepResult] = {}
+        errors: Dict[int, BaseException] = {}
+
+        def replay(until: int) -> dataset_group:
+            # All steps that write a key that step `until` reads are completed.
+            # Replaying the completed earlier steps in order therefore gives
+            # the same values, in the same order, as the sequential execution.
+            datasets = inputs.copy()
+            for i in sorted(results):
+                if i < until:
+                    results[i].apply(datasets)
+            return datasets
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel_steps) as pool:
+            while pending or running:
+                if not errors:
+                    for i in sorted(pending):
+                        if dependencies[i] <= results.keys():
+                            pending.remove(i)
+                            step_inputs = select_inputs(replay(i), footprints[i].reads)
+                            future = pool.submit(
+                                copy_context().run, self._run_step, i, step_inputs
+                            )
+                            running[future] = i
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    if future.exception() is not None:
+                        errors[i] = future.exception()
+                        continue
+                    results[i] = future.result()
+                    self._step_completed(i, results[i].apply({}))
+
+        if errors:
+            # raise the error that the sequential execution would have met first
+            raise errors[min(errors)]
+
+        datasets = inputs.copy()
+        for i in range(len(self.steps)):
+            datasets = results[i].apply(datasets)
+            if i == 0:
+                self._check_composition(inputs, datasets)
+
+        return datasets
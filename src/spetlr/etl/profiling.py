@@ -0,0 +1,164 @@
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from pyspark import SparkContext
+from pyspark.sql import DataFrame
+from pyspark.sql.types import (
+    ArrayType,
+    DoubleType,
+    IntegerType,
+    StringType,
+    StructField,
+    StructType,
+    TimestampType,
+)
+
+from spetlr.spark import Spark
+
+from .step_graph import get_step_footprint
+from .types import EtlBase, dataset_group
+
+_JOB_GROUP_ID = "spark.jobGroup.id"
+_JOB_DESCRIPTION = "spark.job.description"
+
+
+@dataclass
+class StepProfile:
+    """Measurements of a single execution of an etl step."""
+
+    step_index: int
+    step_name: str
+    start_time: datetime
+    duration_seconds: float
+    dataset_input_keys: List[str] = field(default_factory=list)
+    dataset_output_keys: List[str] = field(default_factory=list)
+    dataset_removed_keys: List[str] = field(default_factory=list)
+    spark_job_ids: List[int] = field(default_factory=list)
+    spark_stage_ids: List[int] = field(default_factory=list)
+
+
+class StepProfiler:
+    """
+    Records the wall time, the dataset keys read and written, and the Spark jobs
+    and stages triggered by each etl step that is executed through `run_step`.
+
+    Spark jobs are attributed to a step by running the step in its own job group
+    and looking the group up in the status tracker afterwards. This requires a
+    classic Spark context, without one (e.g. on Spark Connect) the job and stage
+    ids are left empty.
+
+    The report is available from `get_report`, `as_dicts` and `as_dataframe`.
+    """
+
+    schema = StructType(
+        [
+            StructField("StepIndex", IntegerType(), True),
+            StructField("StepName", StringType(), True),
+            StructField("StartTime", TimestampType(), True),
+            StructField("DurationSeconds", DoubleType(), True),
+            StructField("DatasetInputKeys", ArrayType(StringType()), True),
+            StructField("DatasetOutputKeys", ArrayType(StringType()), True),
+            StructField("DatasetRemovedKeys", ArrayType(StringType()), True),
+            StructField("SparkJobIds", ArrayType(IntegerType()), True),
+            StructField("SparkStageIds", ArrayType(IntegerType()), True),
+        ]
+    )
+
+    def __init__(self):
+        self._profiles: List[StepProfile] = []
+        self._lock = Lock()
+
+    def run_step(
+        self, step: EtlBase, datasets: dataset_group, step_index: int = None
+    ) -> dataset_group:
+        if step_index is None:
+            step_index = len(self._profiles)
+        step_name = type(step).__name__
+
+        reads = get_step_footprint(step).reads
+        input_keys = [str(key) for key in datasets if reads is None or key in reads]
+        before = dict(datasets)
+
+        sc = SparkContext._active_spark_context
+        job_group = f"spetlr-step-{step_index}-{uuid.uuid4().hex}"
+        if sc is not None:
+            previous_group = sc.getLocalProperty(_JOB_GROUP_ID)
+            previous_description = sc.getLocalProperty(_JOB_DESCRIPTION)
+            sc.setJobGroup(job_group, f"{step_index}: {step_name}")
+
+        start_time = datetime.utcnow()
+        start = time.perf_counter()
+        try:
+            datasets = step.etl(datasets)
+        finally:
+            duration = time.perf_counter() - start
+            if sc is not None:
+                sc.setLocalProperty(_JOB_GROUP_ID, previous_group)
+                sc.setLocalProperty(_JOB_DESCRIPTION, previous_description)
+
+        job_ids, stage_ids = self._get_spark_jobs(sc, job_group)
+
+        profile = StepProfile(
+            step_index=step_index,
+            step_name=step_name,
+            start_time=start_time,
+            duration_seconds=duration,
+            dataset_input_keys=input_keys,
+            dataset_output_keys=[
+                str(key)
+                for key, df in datasets.items()
+                if key not in before or before[key] is not df
+            ],
+            dataset_removed_keys=[str(key) for key in before if key not in datasets],
+            spark_job_ids=job_ids,
+            spark_stage_ids=stage_ids,
+        )
+        with self._lock:
+            self._profiles.append(profile)
+
+        return datasets
+
+    @staticmethod
+    def _get_spark_jobs(sc: Optional[SparkContext], job_group: str):
+        if sc is None:
+            return [], []
+
+        tracker = sc.statusTracker()
+        job_ids = sorted(tracker.getJobIdsForGroup(job_group))
+        stage_ids = []
+        for job_id in job_ids:
+            info = tracker.getJobInfo(job_id)
+            if info is not None:
+                stage_ids.extend(info.stageIds)
+        return job_ids, sorted(stage_ids)
+
+    def get_report(self) -> List[StepProfile]:
+        """The step profiles in the order of the steps."""
+        with self._lock:
+            return sorted(self._profiles, key=lambda p: p.step_index)
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        return [asdict(profile) for profile in self.get_report()]
+
+    def as_dataframe(self) -> DataFrame:
+        return Spark.get().createDataFrame(
+            [
+                (
+                    p.step_index,
+                    p.step_name,
+                    p.start_time,
+                    p.duration_seconds,
+                    p.dataset_input_keys,
+                    p.dataset_output_keys,
+                    p.dataset_removed_keys,
+                    p.spark_job_ids,
+                    p.spark_stage_ids,
+                )
+                for p in self.get_report()
+            ],
+            schema=self.schema,
+        )
@@ -0,0 +1,167 @@
+"""
+Dependency analysis of orchestrator steps.
+
+Every step of an orchestrator reads and writes a set of keys in the dataset group.
+For the standard Extractor, Transformer and Loader classes these sets can be
+derived from their dataset keys. Any other step, or any subclass that overrides
+the etl method, is treated as reading and writing everything, so that it acts as a
+barrier between the steps before and after it.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .extractor import Extractor
+from .loader import Loader
+from .transformer import Transformer
+from .types import EtlBase, dataset_group
+
+# None is used as the universal set of dataset keys
+KeySet = Optional[Set[str]]
+
+
+@dataclass(frozen=True)
+class StepFootprint:
+    """The dataset keys that a step reads and writes (including removal),
+    and the keys among the writes that get a new value from the step.
+    A value of None means that the step may touch any key."""
+
+    reads: KeySet
+    writes: KeySet
+    outputs: KeySet
+
+
+def get_step_footprint(step: EtlBase) -> StepFootprint:
+    etl_method = getattr(type(step), "etl", None)
+
+    if etl_method is Extractor.etl:
+        return StepFootprint(
+            reads=set(), writes={step.dataset_key}, outputs={step.dataset_key}
+        )
+
+    if etl_method is Transformer.etl:
+        outputs = {step.dataset_output_key}
+        if not step.dataset_input_keys:
+            return StepFootprint(
+                reads=None,
+                writes=None if step.consume_inputs else outputs,
+                outputs=outputs,
+            )
+        reads = set(step.dataset_input_keys)
+        writes = set(outputs)
+        if step.consume_inputs:
+            writes |= reads
+        return StepFootprint(reads=reads, writes=writes, outputs=outputs)
+
+    if etl_method is Loader.etl:
+        if not step.dataset_input_key_list:
+            return StepFootprint(reads=None, writes=set(), outputs=set())
+        return StepFootprint(
+            reads=set(step.dataset_input_key_list), writes=set(), outputs=set()
+        )
+
+    return StepFootprint(reads=None, writes=None, outputs=None)
+
+
+def _overlaps(a: KeySet, b: KeySet) -> bool:
+    if a is None:
+        return b is None or len(b) > 0
+    if b is None:
+        return len(a) > 0
+    return not a.isdisjoint(b)
+
+
+def conflicts(earlier: StepFootprint, later: StepFootprint) -> bool:
+    """True if the later step has to wait for the earlier step."""
+    return (
+        # the later step reads or overwrites something the earlier step writes
+        _overlaps(earlier.writes, later.reads)
+        or _overlaps(earlier.writes, later.writes)
+        # the later step changes something the earlier step still needs to read
+        or _overlaps(earlier.reads, later.writes)
+    )
+
+
+def get_step_dependencies(steps: List[EtlBase]) -> Dict[int, Set[int]]:
+    """Returns, for each step index, the indices of the earlier steps
+    that must be completed before the step can run."""
+    footprints = [get_step_footprint(step) for step in steps]
+    return {
+        i: {j for j in range(i) if conflicts(footprints[j], footprints[i])}
+        for i in range(len(steps))
+    }
+
+
+_REMOVED = object()
+_CLEARED = object()
+
+
+class RecordingGroup(dict):
+    """A dataset group that records every change made to it,
+    so that the changes can be replayed in the same order on another group."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.changes: List[Tuple[Any, Any]] = []
+
+    def __setitem__(self, key, value):
+        self.changes.append((key, value))
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.changes.append((key, _REMOVED))
+
+    def pop(self, key, *default):
+        if key in self:
+            self.changes.append((key, _REMOVED))
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.changes.append((key, _REMOVED))
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        self.changes.append((None, _CLEARED))
+        super().clear()
+
+
+@dataclass
+class StepResult:
+    """The changes that a single step made to the dataset group, in order."""
+
+    changes: List[Tuple[Any, Any]]
+
+    @classmethod
+    def from_etl(cls, inputs: RecordingGroup, outputs: dataset_group):
+        if outputs is inputs:
+            return cls(changes=list(inputs.changes))
+        # the step returned a new group, which replaces the old one entirely
+        return cls(changes=[(None, _CLEARED)] + list(outputs.items()))
+
+    def apply(self, datasets: dataset_group) -> dataset_group:
+        for key, value in self.changes:
+            if value is _CLEARED:
+                datasets.clear()
+            elif value is _REMOVED:
+                datasets.pop(key, None)
+            else:
+                datasets[key] = value
+        return datasets
+
+
+def select_inputs(datasets: dataset_group, reads: KeySet) -> RecordingGroup:
+    """The part of the datasets that a step with the given reads can see."""
+    if reads is None:
+        return RecordingGroup(datasets)
+    return RecordingGroup({key: df for key, df in datasets.items() if key in reads})
@@ -6,6 +6,7 @@ from pyspark.sql import DataFrame
 from pyspark.sql import functions as f
 
 from spetlr.delta import DeltaHandle
+from spetlr.delta.table_metadata import TableMetadataCache
 from spetlr.eh.EventHubCaptureExtractor import EventHubCaptureExtractor
 from spetlr.etl import Extractor
 from spetlr.exceptions import EhJsonToDeltaException
@@ -67,15 +68,14 @@ class EhJsonToDeltaExtractor(Extractor):
         # So finally this uses a DELETE FROM in the hope that Spark can optimize this
         # to efficiently remove the partition
         Spark.get().sql(f"DELETE FROM {tbl_name} WHERE {' AND '.join(conditions)}")
+        TableMetadataCache().invalidate(tbl_name)
 
-    def _read_ymd_ymdh_partitioned(self) -> DataFrame:
+    def _read_ymd_ymdh_partitioned(self, dh_parts: List[str]) -> DataFrame:
         """get the highest partition, piece by piece,
         truncate it,
         construct the datetime that the pieces correspond to,
         read the event hub from that datetime"""
 
-        dh_parts = self.dh.get_partitioning()
-
         # this df will be filtered stepwise
         df = self.dh.read()
 
@@ -127,6 +127,6 @@ class EhJsonToDeltaExtractor(Extractor):
             return self._read_pdate_partitioned()
         if dh_parts == eh_parts:
             # its ymd or ymdh
-            return self._read_ymd_ymdh_partitioned()
+            return self._read_ymd_ymdh_partitioned(dh_parts)
         else:
             raise EhJsonToDeltaException("Delta table has bad partitioning")
@@ -1,3 +1,4 @@
+import itertools
 import json
 from string import Formatter
 from typing import Any, Dict
@@ -14,6 +15,9 @@ from spetlr.exceptions import (
 from spetlr.schema_manager.spark_schema import get_schema
 from spetlr.singleton import Singleton
 
+# shared by all instances, so that clearing never hands out an old version again
+_versions = itertools.count()
+
 
 class SchemaManager(metaclass=Singleton):
     _DEFAULT = object()
@@ -25,9 +29,16 @@ class SchemaManager(metaclass=Singleton):
 
     def clear_all_configurations(self):
         self._registered_schemas = dict()
+        self._version = next(_versions)
 
     def register_schema(self, schema_name: str, schema: T.StructType) -> None:
         self._registered_schemas[schema_name] = schema
+        self._version = next(_versions)
+
+    def get_version(self) -> int:
+        """A number that changes whenever a schema is registered
+        or the schemas are cleared."""
+        return self._version
 
     def get_schema(
         self,
@@ -1,13 +1,12 @@
+import copy
 import re
 from ast import literal_eval
-from typing import Optional
+from functools import lru_cache
+from typing import Iterator, Optional
 
 from more_itertools import peekable
 from pyspark.sql import types as t
 
-from spetlr.configurator.sql.init_sqlparse import parse
-from spetlr.configurator.sql.utils import _meaningful_token_iter
-
 
 class SchemaExtractionError(Exception):
     pass
@@ -18,14 +17,64 @@ def get_schema(sql: str) -> t.StructType:
     sql = sql.strip()
     if sql[0] == "(":
         sql = sql[1:-1]
-    parsed_schema = parse(sql)
-    if not len(parsed_schema) == 1:
-        raise SchemaExtractionError("multiple statements")
-    (tokenlist,) = parsed_schema
 
-    iter = peekable(_meaningful_token_iter(tokenlist.flatten()))
+    # the cached schema must not be modified by the caller
+    return copy.deepcopy(_get_cached_schema(sql))
+
+
+@lru_cache(maxsize=1024)
+def _get_cached_schema(sql: str) -> t.StructType:
+    return _get_schema(peekable(_tokenize(sql)))
+
+
+class _Token:
+    """A single meaningful token of a column definition list."""
+
+    __slots__ = ["value"]
+
+    def __init__(self, value: str):
+        self.value = value
 
-    return _get_schema(iter)
+    def __str__(self):
+        return self.value
+
+    def __repr__(self):
+        return f"<{self.value}>"
+
+
+# The column definition lists of table schemas only need a small part of sql.
+# This tokenizer splits the string into the same tokens as the sqlparse lexer
+# would for such lists, but without the grouping of the full sql parser.
+# Comments and whitespace are dropped right away.
+_TOKEN_REGEX = re.compile(
+    r"""
+    (?P<skip>
+        \s+
+        | --[^\r\n]*
+        | \#\s[^\r\n]*
+        | /\*.*?\*/
+    )
+    | (?P<token>
+        NOT\s+NULL\b
+        | `(?:``|[^`])*`
+        | '(?:''|\\.|[^'])*'
+        | "(?:""|\\.|[^"])*"
+        | \w+
+        | .
+    )
+    """,
+    re.IGNORECASE | re.DOTALL | re.VERBOSE,
+)
+
+
+def _tokenize(sql: str) -> Iterator[_Token]:
+    for match in _TOKEN_REGEX.finditer(sql):
+        value = match.group("token")
+        if value is None:
+            continue
+        if value == ";":
+            raise SchemaExtractionError("multiple statements")
+        yield _Token(value)
 
 
 # throughout this file, the variable iter represents the following object:
@@ -118,7 +167,7 @@ def _get_nullable(iter) -> Optional[bool]:
     """See if a nullability follows. If it does, return the bool"""
     token = iter.peek()
     if str(token).upper() == "NULL":
-        next(token)
+        next(iter)
         return True
     if re.match(r"NOT\s+NULL", str(token).upper()):
         next(iter)
@@ -1,9 +1,10 @@
 import itertools
 import re
+from functools import lru_cache
 from importlib import resources as ir
 from pathlib import Path
 from types import ModuleType
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import sqlparse
 
@@ -12,11 +13,83 @@ from spetlr.configurator.sql.init_sqlparse import parse
 from spetlr.schema_manager import SchemaManager
 from spetlr.spark import Spark
 from spetlr.sql import BaseExecutor
+from spetlr.sql.statement_graph import execute_concurrently
+
+
+class StatementTemplate:
+    """A single statement of a sql file, before substitution."""
+
+    def __init__(self, sql: str, code: str):
+        self.sql = sql
+        # the statement without comments
+        self.code = code
+        self.has_replacements = "{" in sql or "}" in sql
+
+    def substitute(self, replacements: Dict[str, str]) -> Optional[str]:
+        """Returns the substituted statement,
+        or None if it contains no code after substitution."""
+        if not self.has_replacements:
+            return self.sql
+
+        # skip the statement unless it actually contains code.
+        # spark.sql complains if you only give it comments
+        sql = self.sql.format(**replacements)
+        if not self.code.format(**replacements).strip().strip(";"):
+            return None
+        return sql
+
+
+@lru_cache(maxsize=1024)
+def _get_statement_templates(
+    raw_sql: str, statement_spliter: Optional[Tuple[str, ...]]
+) -> List[StatementTemplate]:
+    """Split the raw contents of a sql file into statements.
+    The result only depends on the file contents, and is cached by them."""
+    if statement_spliter is None:
+        code_parts = [raw_sql]
+    elif ";" not in statement_spliter:
+        code_parts = [raw_sql]
+        for sequence in statement_spliter:
+            code_parts = itertools.chain.from_iterable(
+                part.split(sequence) for part in code_parts
+            )
+
+    else:
+        # if ; is included split the file into sql statements
+        # by using parse, we ensure not to split by escaped or commented
+        # occurrences of ;
+
+        for marker in statement_spliter:
+            if marker != ";":
+                raw_sql = raw_sql.replace(marker, ";")
+
+        code_parts = [
+            "".join(token.value for token in statement) for statement in parse(raw_sql)
+        ]
+
+    templates = []
+    for full_statement in code_parts:
+        code = "".join(
+            token.value
+            for statement in parse(full_statement)
+            for token in statement
+            if token.ttype not in sqlparse.tokens.Comment
+        ).strip()
+        # statements that only contain comments are dropped right away,
+        # unless they need substitutions, which must still succeed
+        template = StatementTemplate(full_statement, code)
+        if code.strip(";") or template.has_replacements:
+            templates.append(template)
+    return templates
 
 
 class SqlExecutor:
     _DEFAULT = object()
 
+    # the replacements from the configurator and the schema manager,
+    # together with the versions that they were collected at
+    _base_replacements: Tuple[Tuple[int, int], Dict[str, str]] = None
+
     def __init__(
         self,
         base_module: Union[str, ModuleType] = None,
@@ -24,6 +97,7 @@ class SqlExecutor:
         statement_spliter: Optional[List[str]] = _DEFAULT,
         *,
         ignore_empty_folder: bool = False,
+        max_parallel_statements: int = 1,
     ):
         """Class to pre-treat sql statements and execute them.
         Replacement sequenced related to the Configurator will be inserted before
@@ -33,7 +107,12 @@ class SqlExecutor:
         Semicolon will be treated correctly when quoted or in comments.
 
         Default behavior supports spark, which will complain if given
-        no actual sql code or on multiple statements."""
+        no actual sql code or on multiple statements.
+
+        With max_parallel_statements larger than 1, execute_sql_file runs
+        statements that do not name the same objects concurrently on a thread pool
+        of that size. Statements like USE or SET, and statements that cannot be
+        analyzed, wait for all earlier statements and block all later ones."""
 
         self.base_module = base_module
         self.server = server
@@ -44,6 +123,7 @@ class SqlExecutor:
             statement_spliter = [";", "-- COMMAND ----------"]
         self.statement_spliter = statement_spliter
         self.ignore_empty_folder = ignore_empty_folder
+        self.max_parallel_statements = max_parallel_statements
 
     def _wildcard_string_to_regexp(self, instr: str) -> str:
         # prepare file pattern:
@@ -82,63 +162,41 @@ class SqlExecutor:
     ):
         """given the raw contents of a sql file, break it down into statements
         and execute all substitutions."""
-        if replacements is None:
-            replacements = {}
-
-        # prepare the full set of replacements
-        schema_replacements = {
-            f"{k}_schema": v
-            for k, v in SchemaManager().get_all_spark_sql_schemas().items()
-        }
-        replacements = {
-            **(Configurator().get_all_details()),
-            **schema_replacements,
-            **replacements,
-        }
-
-        sql_code = raw_sql.format(**replacements)
-
-        if self.statement_spliter is None:
-            code_parts = [sql_code]
-        elif ";" not in self.statement_spliter:
-            code_parts = [sql_code]
-            for sequence in self.statement_spliter:
-                code_parts = itertools.chain.from_iterable(
-                    part.split(sequence) for part in code_parts
-                )
+        replacements = self._get_replacements(replacements)
 
-        else:
-            # if ; is included split the file into sql statements
-            # by using parse, we ensure not to split by escaped or commented
-            # occurrences of ;
-
-            for marker in self.statement_spliter:
-                if marker != ";":
-                    sql_code = sql_code.replace(marker, ";")
-
-            code_parts = [
-                "".join(token.value for token in statement)
-                for statement in parse(sql_code)
-            ]
-
-        for full_statement in code_parts:
-            cleaned_statement = (
-                (
-                    "".join(
-                        token.value
-                        for statement in parse(full_statement)
-                        for token in statement
-                        if token.ttype not in sqlparse.tokens.Comment
-                    )
-                )
-                .strip()
-                .strip(";")
+        statements = []
+        for template in _get_statement_templates(
+            raw_sql,
+            None if self.statement_spliter is None else tuple(self.statement_spliter),
+        ):
+            statement = template.substitute(replacements)
+            if statement is not None:
+                statements.append(statement)
+
+        # all substitutions have succeeded, before the first statement is returned
+        yield from statements
+
+    @classmethod
+    def _get_replacements(cls, replacements: Dict[str, str] = None) -> Dict[str, str]:
+        """the full set of replacements, where the details of the configurator
+        and the schemas are only collected again after they have changed."""
+        version = (Configurator().get_version(), SchemaManager().get_version())
+        if cls._base_replacements is None or cls._base_replacements[0] != version:
+            schema_replacements = {
+                f"{k}_schema": v
+                for k, v in SchemaManager().get_all_spark_sql_schemas().items()
+            }
+            cls._base_replacements = (
+                version,
+                {
+                    **(Configurator().get_all_details()),
+                    **schema_replacements,
+                },
             )
 
-            # skip the statement unless it actually contains code.
-            # spark.sql complains if you only give it comments
-            if cleaned_statement:
-                yield full_statement
+        if not replacements:
+            return cls._base_replacements[1]
+        return {**cls._base_replacements[1], **replacements}
 
     def _get_raw_contents(
         self,
@@ -192,10 +250,18 @@ class SqlExecutor:
 
         statement = None
 
-        for statement in self.get_statements(
-            file_pattern, exclude_pattern, replacements
-        ):
-            executor.sql(statement)
+        if self.max_parallel_statements > 1:
+            statements = list(
+                self.get_statements(file_pattern, exclude_pattern, replacements)
+            )
+            execute_concurrently(executor, statements, self.max_parallel_statements)
+            if statements:
+                statement = statements[-1]
+        else:
+            for statement in self.get_statements(
+                file_pattern, exclude_pattern, replacements
+            ):
+                executor.sql(statement)
 
         if statement is None:
             print(
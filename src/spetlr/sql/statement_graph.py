@@ -0,0 +1,232 @@
+"""
+Dependency analysis of sql statements.
+
+Every statement writes the object that it creates, changes or drops, as well as
+the new name of a renamed object, and reads all other objects that it names.
+Two statements depend on each other if one writes an object that the other reads
+or writes. Since names can be partially qualified,
+two names are taken to refer to the same object if the shorter name is a prefix or
+a suffix of the longer one. In this way, a table also depends on its database.
+
+Statements that change the session, such as USE or SET, and statements of unknown
+kinds act as barriers between the statements before and after them.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+import sqlparse
+from sqlparse.sql import Token
+
+from spetlr.configurator.sql.init_sqlparse import parse
+from spetlr.configurator.sql.utils import _meaningful_token_iter
+from spetlr.sql.BaseExecutor import BaseExecutor
+
+# an object name, as its lower case parts, such as ("my_db", "my_table")
+ObjectName = Tuple[str, ...]
+
+# the statements that have a target object, which follows after the modifiers
+_TARGET_STATEMENTS = {
+    "CREATE",
+    "CREATE OR REPLACE",
+    "DROP",
+    "ALTER",
+    "INSERT",
+    "MERGE",
+    "DELETE",
+    "UPDATE",
+    "TRUNCATE",
+    "OPTIMIZE",
+    "VACUUM",
+    "ANALYZE",
+    "REFRESH",
+    "MSCK REPAIR",
+    "FSCK REPAIR",
+    "COMMENT",
+}
+
+_MODIFIERS = {
+    "TABLE",
+    "VIEW",
+    "DATABASE",
+    "SCHEMA",
+    "FUNCTION",
+    "TEMPORARY",
+    "TEMP",
+    "GLOBAL",
+    "EXTERNAL",
+    "MATERIALIZED",
+    "STREAMING",
+    "LIVE",
+    "IF EXISTS",
+    "IF NOT EXISTS",
+    "INTO",
+    "OVERWRITE",
+    "FROM",
+    "ON",
+}
+
+# keywords after which an object name follows, even if it looks like a keyword
+_OBJECT_KEYWORDS = {"FROM", "USING", "TABLE", "VIEW", "INTO"}
+
+
+@dataclass(frozen=True)
+class StatementFootprint:
+    """The objects that a statement reads and writes.
+    A value of None means that the statement may touch any object."""
+
+    reads: Optional[FrozenSet[ObjectName]]
+    writes: Optional[FrozenSet[ObjectName]]
+
+
+_BARRIER = StatementFootprint(reads=None, writes=None)
+
+
+def _is_word(token: Token) -> bool:
+    return token.ttype in sqlparse.tokens.Name or token.ttype in sqlparse.tokens.Keyword
+
+
+def _read_name(tokens: List[Token], i: int) -> Tuple[ObjectName, int]:
+    """Read the dotted name that starts at position i,
+    return it together with the position after it."""
+    parts = [tokens[i].value.strip("`").lower()]
+    i += 1
+    while i + 1 < len(tokens) and tokens[i].value == "." and _is_word(tokens[i + 1]):
+        parts.append(tokens[i + 1].value.strip("`").lower())
+        i += 2
+    return tuple(parts), i
+
+
+def _get_names(tokens: List[Token]) -> Set[ObjectName]:
+    """All names in the tokens that could refer to an object."""
+    names = set()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        follows_object_keyword = i > 0 and (
+            tokens[i - 1].value.upper() in _OBJECT_KEYWORDS
+            or tokens[i - 1].value.upper().endswith("JOIN")
+        )
+        if token.ttype in sqlparse.tokens.Name or (
+            _is_word(token) and follows_object_keyword
+        ):
+            name, i = _read_name(tokens, i)
+            names.add(name)
+        else:
+            i += 1
+    return names
+
+
+def get_statement_footprint(statement: str) -> StatementFootprint:
+    parsed = parse(statement)
+    if len(parsed) != 1:
+        return _BARRIER
+    tokens = list(_meaningful_token_iter(parsed[0].flatten()))
+    if not tokens:
+        return StatementFootprint(reads=frozenset(), writes=frozenset())
+
+    kind = " ".join(tokens[0].value.upper().split())
+
+    if kind == "SELECT":
+        return StatementFootprint(
+            reads=frozenset(_get_names(tokens)), writes=frozenset()
+        )
+
+    if kind not in _TARGET_STATEMENTS:
+        return _BARRIER
+
+    i = 1
+    while i < len(tokens) and " ".join(tokens[i].value.upper().split()) in _MODIFIERS:
+        i += 1
+    if i >= len(tokens) or not _is_word(tokens[i]):
+        return _BARRIER
+
+    target, end = _read_name(tokens, i)
+    writes = {target}
+    if kind == "ALTER":
+        # ALTER TABLE a RENAME TO b also creates the object b
+        for j in range(end, len(tokens) - 2):
+            if (
+                tokens[j].value.upper() == "RENAME"
+                and tokens[j + 1].value.upper() == "TO"
+                and _is_word(tokens[j + 2])
+            ):
+                writes.add(_read_name(tokens, j + 2)[0])
+
+    reads = _get_names(tokens[end:]) - writes
+    return StatementFootprint(reads=frozenset(reads), writes=frozenset(writes))
+
+
+def _same_object(a: ObjectName, b: ObjectName) -> bool:
+    if len(a) > len(b):
+        a, b = b, a
+    return b[: len(a)] == a or b[len(b) - len(a) :] == a
+
+
+def _overlaps(
+    a: Optional[FrozenSet[ObjectName]], b: Optional[FrozenSet[ObjectName]]
+) -> bool:
+    if a is None:
+        return b is None or len(b) > 0
+    if b is None:
+        return len(a) > 0
+    return any(_same_object(x, y) for x in a for y in b)
+
+
+def conflicts(earlier: StatementFootprint, later: StatementFootprint) -> bool:
+    """True if the later statement has to wait for the earlier statement."""
+    if earlier.reads is None or later.reads is None:
+        # barriers are ordered with respect to everything
+        return True
+    return (
+        _overlaps(earlier.writes, later.reads)
+        or _overlaps(earlier.writes, later.writes)
+        or _overlaps(earlier.reads, later.writes)
+    )
+
+
+def get_statement_dependencies(statements: List[str]) -> Dict[int, Set[int]]:
+    """For each statement, the earlier statements that it has to wait for."""
+    footprints = [get_statement_footprint(statement) for statement in statements]
+    return {
+        i: {j for j in range(i) if conflicts(footprints[j], footprints[i])}
+        for i in range(len(statements))
+    }
+
+
+def execute_concurrently(
+    executor: BaseExecutor, statements: List[str], max_workers: int
+) -> None:
+    """Execute the statements on a thread pool, where every statement waits for
+    the earlier statements that it depends on. After a failure no further
+    statements are started, and the error of the first failed statement is raised.
+    """
+    dependencies = get_statement_dependencies(statements)
+
+    pending = set(range(len(statements)))
+    running = {}
+    completed = set()
+    errors: Dict[int, BaseException] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            if not errors:
+                for i in sorted(pending):
+                    if dependencies[i] <= completed:
+                        pending.remove(i)
+                        running[pool.submit(executor.sql, statements[i])] = i
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = running.pop(future)
+                if future.exception() is not None:
+                    errors[i] = future.exception()
+                    continue
+                completed.add(i)
+
+    if errors:
+        raise errors[min(errors)]
@@ -1,7 +1,23 @@
 from typing import List
 
 import pyspark.sql.functions as f
-from pyspark.sql import DataFrame
+from pyspark.sql import Column, DataFrame
+
+
+def _row_hash(df: DataFrame, cols: List[str]) -> Column:
+    """A 64-bit hash of the given columns of df, where a null value is hashed
+    differently from any other value in the same position.
+    Maps are hashed by their string representation."""
+    types = dict(df.dtypes)
+    parts = []
+    for col in cols:
+        value = df[col]
+        if types[col].startswith("map"):
+            value = value.cast("string")
+        parts += [value.isNull(), value]
+    if not parts:
+        return f.lit(0).cast("long")
+    return f.xxhash64(*parts)
 
 
 def CheckDfMerge(
@@ -10,11 +26,29 @@ def CheckDfMerge(
     df_target: DataFrame,
     join_cols: List[str],
     avoid_cols: List[str],
+    use_hash: bool = False,
+    target_hash_col: str = None,
 ):
     """This logic optimizes data load of dataframe, df, into a target table, df_target.
     it checks whether a merge is needed.
     If it is not needed, a simple insert is executed.
+
+    With use_hash, the rows are compared by one hash of all columns that are
+    not join columns or avoided, instead of column by column. This keeps the plan
+    small for wide tables, and only the join columns and the hash of the target
+    are joined to the source.
+    With target_hash_col, the target hash is read from that column, and the hash of
+    the source is added to df as that column, so that it is saved with the rows.
+    Hash collisions can hide a changed row, with a probability of about 2^-64.
     """
+    if use_hash or target_hash_col:
+        return _check_df_merge_by_hash(
+            df=df,
+            df_target=df_target,
+            join_cols=join_cols,
+            avoid_cols=avoid_cols,
+            target_hash_col=target_hash_col,
+        )
 
     key_col = join_cols[-1]
 
@@ -22,7 +56,7 @@ def CheckDfMerge(
     filter_string = f"b.{key_col} IS NULL"
     for col, col_typ in df.dtypes:
         if col not in join_cols + avoid_cols:
-            if col_typ == "map":
+            if col_typ.startswith("map"):
                 filter_string += (
                     f" OR (CAST(a.{col} AS varchar) <> CAST(b.{col} AS varchar))"
                 )
@@ -59,3 +93,50 @@ def CheckDfMerge(
     df = df.drop("is_new")
 
     return df, merge_required
+
+
+def _check_df_merge_by_hash(
+    *,
+    df: DataFrame,
+    df_target: DataFrame,
+    join_cols: List[str],
+    avoid_cols: List[str],
+    target_hash_col: str = None,
+):
+    source_hash_col = target_hash_col or "__source_hash"
+    hash_cols = [
+        col
+        for col in df.columns
+        if col not in join_cols + avoid_cols + [source_hash_col]
+    ]
+
+    df = df.withColumn(source_hash_col, _row_hash(df, hash_cols))
+    target_hash = (
+        f.col(target_hash_col) if target_hash_col else _row_hash(df_target, hash_cols)
+    )
+
+    # only the join columns and the hash of the target are needed
+    df_target = df_target.select(
+        *join_cols,
+        f.lit(True).alias("__in_target"),
+        target_hash.alias("__target_hash"),
+    )
+
+    df = (
+        df.join(df_target, on=join_cols, how="left")
+        .filter(
+            f.col("__in_target").isNull()
+            | ~f.col(source_hash_col).eqNullSafe(f.col("__target_hash"))
+        )
+        .withColumn("is_new", f.col("__in_target").isNull())
+        .select(*df.columns, "is_new")
+        .cache()
+    )
+
+    # see CheckDfMerge
+    merge_required = len(df.filter(~f.col("is_new")).take(1)) > 0
+    df = df.drop("is_new")
+    if not target_hash_col:
+        df = df.drop(source_hash_col)
+
+    return df, merge_required
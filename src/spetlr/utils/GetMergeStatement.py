@@ -10,14 +10,22 @@ def GetMergeStatement(
     insert_cols: List[str] = None,
     update_cols: List[str] = None,
     special_update_set: str = None,
+    target_predicate: str = None,
 ) -> str:
+    """target_predicate (optional): a condition on the target columns, which all
+    target rows that can match a source row fulfill. It is added to the ON clause,
+    so that the MERGE only needs to read the target rows that fulfill it."""
     assert merge_statement_type in {"delta", "sql"}
 
+    conditions = [f"(source.{col} = target.{col})" for col in join_cols]
+    if target_predicate:
+        conditions.append(f"({target_predicate})")
+
     merge_sql_statement = (
         f"MERGE {'INTO ' if merge_statement_type == 'delta' else ''}"
         f"{target_table_name} AS target "
         f"USING {source_table_name} AS source "
-        f"ON {' AND '.join(f'(source.{col} = target.{col})' for col in join_cols)} "
+        f"ON {' AND '.join(conditions)} "
     )
 
     if update_cols and len(update_cols) > 0:
@@ -5,7 +5,7 @@ from pyspark.sql.dataframe import DataFrame
 from spetlrtools.time import dt_utc
 
 from spetlr import Configurator
-from spetlr.cache import CachedLoader, CachedLoaderParameters
+from spetlr.cache import CachedLoader, CachedLoaderBatch, CachedLoaderParameters
 from spetlr.delta import DbHandle, DeltaHandle
 from spetlr.spark import Spark
 
@@ -240,3 +240,74 @@ class CachedLoaderTests(unittest.TestCase):
         self.assertTrue(self.sut.too_many_rows_was_called)
         self.assertIsNone(self.sut.written)
         self.assertIsNone(self.sut.deleted)
+
+    def test_03_pruned_cache_and_separate_deletes(self):
+        self.sut.written = None
+        self.sut.deleted = None
+
+        cache_dh = DeltaHandle.from_tc("CachedTest")
+        # prime the cache
+        df_old_cache = Spark.get().createDataFrame(
+            self.old_cache, schema=cache_dh.read().schema
+        )
+        cache_dh.overwrite(df_old_cache)
+
+        target_dh = DeltaHandle.from_tc("CachedTestTarget")
+        df_new = Spark.get().createDataFrame(
+            self.new_data, schema=target_dh.read().schema
+        )
+
+        params = CachedLoaderParameters(
+            cache_table_name=self.params.cache_table_name,
+            key_cols=["a", "b"],
+            cache_id_cols=["myId"],
+            prune_cache=True,
+        )
+        sut = ChildCacher(params)
+
+        # the cache rows 8 and 9 are outside of the key range of the data
+        pruned = sut._prune_cache(sut._extract_cache(), df_new)
+        self.assertEqual({row.a for row in pruned.collect()}, {"3", "6", "7"})
+
+        # writes are detected as usual, but nothing is deleted
+        sut.save(df_new)
+        to_be_written_ids = {row.a for row in sut.to_be_written.collect()}
+        self.assertEqual(to_be_written_ids, {"1", "2", "6"})
+        self.assertIsNone(sut.deleted)
+
+        # until the deletes are detected separately
+        sut.delete_missing(df_new)
+        to_be_deleted_ids = {row.a for row in sut.to_be_deleted.collect()}
+        self.assertEqual(to_be_deleted_ids, {"8", "9"})
+        cache = cache_dh.read()
+        del_cache = cache.filter(cache[params.deletedTime].isNotNull())
+        self.assertEqual([row.a for row in del_cache.collect()], ["8"])
+
+    def test_04_batch_merges_cache_once(self):
+        cache_dh = DeltaHandle.from_tc("CachedTest")
+        # prime the cache
+        df_old_cache = Spark.get().createDataFrame(
+            self.old_cache, schema=cache_dh.read().schema
+        )
+        cache_dh.overwrite(df_old_cache)
+        version_before = cache_dh.get_latest_version()
+
+        target_dh = DeltaHandle.from_tc("CachedTestTarget")
+        df_new = Spark.get().createDataFrame(
+            self.new_data, schema=target_dh.read().schema
+        )
+
+        with CachedLoaderBatch(self.params) as batch:
+            self.sut.save(df_new.filter("a = '1'"))
+            self.sut.save(df_new.filter("a = '2'"))
+            # both loaders read the same version of the cache
+            self.assertEqual(batch.version, version_before)
+            # and the cache is not updated until the batch ends
+            self.assertEqual(cache_dh.get_latest_version(), version_before)
+
+        # all updates are merged in one commit
+        self.assertEqual(cache_dh.get_latest_version(), version_before + 1)
+        cache = cache_dh.read()
+        self.assertEqual(
+            {row.a for row in cache.filter("a IN ('1', '2')").collect()}, {"1", "2"}
+        )
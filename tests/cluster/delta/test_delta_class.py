@@ -1,8 +1,10 @@
+from pyspark.sql import functions as f
 from pyspark.sql.utils import AnalysisException
 from spetlrtools.testing import DataframeTestCase
 
 from spetlr import Configurator
 from spetlr.delta import DbHandle, DeltaHandle
+from spetlr.delta.upsert_strategy import APPEND, get_source_predicate
 from spetlr.etl import Orchestrator
 from spetlr.etl.extractors import SimpleExtractor
 from spetlr.etl.extractors.schema_extractor import SchemaExtractor
@@ -233,3 +235,48 @@ class DeltaTests(DataframeTestCase):
         dh.set_schema(None)
 
         self.assertIsNone(dh.get_schema())
+
+    def test_13_upsert_partition_predicate(self):
+        dh = DeltaHandle.from_tc("MyTbl4")
+        dh.overwrite(
+            Spark.get().createDataFrame(
+                [("a", 1, "x"), ("b", 2, "y")], "colA string, colB int, payload string"
+            )
+        )
+        df = Spark.get().createDataFrame(
+            [("a", 1, "z"), ("c", 1, "w")], "colA string, colB int, payload string"
+        )
+
+        self.assertEqual(
+            get_source_predicate(df, ["colA", "colB"], dh.get_partitioning(), []),
+            "(target.colB IN (CAST('1' AS int)))"
+            " AND (target.colA IN (CAST('a' AS string), CAST('c' AS string)))",
+        )
+
+        dh.upsert(df, ["colA", "colB"])
+        self.assertDataframeMatches(
+            dh.read(),
+            None,
+            [("a", 1, "z"), ("b", 2, "y"), ("c", 1, "w")],
+        )
+
+    def test_14_upsert_timestamp_keys(self):
+        # the file statistics truncate the timestamps to milliseconds,
+        # so the stored key is above the max value of its file
+        dh = DeltaHandle(name=DeltaHandle.from_tc("MyTbl5").get_tablename() + "ts")
+        schema = "ts timestamp, payload string"
+        dh.overwrite(
+            Spark.get().sql(
+                "SELECT TIMESTAMP'2024-01-01 12:00:00.000900' AS ts, 'x' AS payload"
+            ),
+            overwriteSchema=True,
+        )
+
+        df = Spark.get().createDataFrame(dh.read().collect(), schema)
+        dh.upsert(df.withColumn("payload", f.lit("y")), ["ts"])
+
+        self.assertNotEqual(dh.last_upsert_plan.strategy, APPEND)
+        self.assertEqual(
+            [row.payload for row in dh.read().collect()],
+            ["y"],
+        )
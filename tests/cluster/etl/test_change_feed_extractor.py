@@ -0,0 +1,78 @@
+import uuid
+
+from spetlrtools.testing import DataframeTestCase
+
+from spetlr.delta import DbHandle, DeltaHandle
+from spetlr.etl import Loader, Orchestrator
+from spetlr.etl.extractors import ChangeFeedExtractor
+from spetlr.spark import Spark
+
+
+class ChangeFeedExtractorTests(DataframeTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.db = DbHandle(f"cdf_test_{uuid.uuid4().hex}")
+        cls.db.create()
+        cls.source = DeltaHandle(f"{cls.db._name}.source")
+        cls.bookkeeping = DeltaHandle(f"{cls.db._name}.bookkeeping")
+
+        Spark.get().sql(
+            f"CREATE TABLE {cls.source.get_tablename()} (id INT, name STRING)"
+        )
+        cls.source.enable_change_data_feed()
+        Spark.get().sql(f"INSERT INTO {cls.source.get_tablename()} VALUES (1, 'a')")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.db.drop_cascade()
+
+    def _run(self):
+        extractor = ChangeFeedExtractor(self.source, "silver", self.bookkeeping)
+        loaded = {}
+
+        class _Loader(Loader):
+            def save(self, df):
+                loaded["df"] = df.select("id", "name", "_change_type")
+                loaded["rows"] = loaded["df"].collect()
+
+        (
+            Orchestrator()
+            .extract_from(extractor)
+            .load_into(_Loader())
+            .step(extractor.commit_step())
+            .execute()
+        )
+        return sorted(tuple(row) for row in loaded["rows"])
+
+    def test_01_consumes_versions(self):
+        # the first run reads the table content
+        self.assertEqual(self._run(), [(1, "a", "insert")])
+
+        # later runs read only the new commits
+        Spark.get().sql(
+            f"INSERT INTO {self.source.get_tablename()} VALUES (2, 'b'), (3, 'c')"
+        )
+        Spark.get().sql(
+            f"UPDATE {self.source.get_tablename()} SET name = 'x' WHERE id = 1"
+        )
+        self.assertEqual(
+            self._run(),
+            [
+                (1, "a", "update_preimage"),
+                (1, "x", "update_postimage"),
+                (2, "b", "insert"),
+                (3, "c", "insert"),
+            ],
+        )
+
+        # and nothing is read without new commits
+        self.assertEqual(self._run(), [])
+
+    def test_02_uncommitted_read_is_repeated(self):
+        extractor = ChangeFeedExtractor(self.source, "gold", self.bookkeeping)
+        first = extractor.read().count()
+
+        # without a commit, the same data is read again
+        self.assertEqual(extractor.read().count(), first)
+        extractor.commit()
+        self.assertEqual(extractor.read().count(), 0)
@@ -4,6 +4,7 @@ from spetlrtools.testing import DataframeTestCase
 
 from spetlr import Configurator
 from spetlr.delta import DbHandle, DeltaHandle
+from spetlr.delta.upsert_strategy import APPEND, FULL_MERGE, OVERWRITE
 from spetlr.utils import DataframeCreator
 from tests.cluster.delta import extras
 from tests.cluster.delta.SparkExecutor import SparkSqlExecutor
@@ -62,6 +63,10 @@ class DeltaUpsertTests(DataframeTestCase):
         self.target_dh_dummy.upsert(df_source, join_cols=self.join_cols)
 
         self.assertDataframeMatches(self.target_dh_dummy.read(), None, self.data1)
+        # overwriting with an empty DataFrame may leave a file without rows
+        self.assertIn(
+            self.target_dh_dummy.last_upsert_plan.strategy, [OVERWRITE, APPEND]
+        )
 
     def test_02_can_perform_overwrite_over_existing(self):
         """The target table is already filled from before.
@@ -94,6 +99,8 @@ class DeltaUpsertTests(DataframeTestCase):
         self.assertDataframeMatches(
             self.target_dh_dummy.read(), None, self.data2 + self.data3
         )
+        # the key (1, 2) is outside the key ranges of all files of the target
+        self.assertEqual(self.target_dh_dummy.last_upsert_plan.strategy, APPEND)
 
     def test_04_can_perform_merge(self):
         """The target table is already filled from before."""
@@ -107,3 +114,4 @@ class DeltaUpsertTests(DataframeTestCase):
         self.target_dh_dummy.upsert(df_source, join_cols=self.join_cols)
 
         self.assertDataframeMatches(self.target_dh_dummy.read(), None, self.data5)
+        self.assertEqual(self.target_dh_dummy.last_upsert_plan.strategy, FULL_MERGE)
@@ -0,0 +1,72 @@
+import unittest
+import uuid
+
+from pyspark.sql import DataFrame
+from spetlrtools.testing import DataframeTestCase
+
+from spetlr.etl import Extractor, Loader, Orchestrator, Transformer
+from spetlr.spark import Spark
+
+
+class OrchestratorCheckpointTests(DataframeTestCase):
+    def test_resume_from_checkpoint(self):
+        location = f"/tmp/spetlr/checkpoints/{uuid.uuid4().hex}"
+        extractor = CountingExtractor(dataset_key="numbers")
+        loader = FlakyLoader(dataset_input_keys="doubled")
+
+        oc = Orchestrator(checkpoint_location=location)
+        oc.extract_from(extractor)
+        oc.transform_with(DoublingTransformer(), checkpoint=True)
+        oc.load_into(loader)
+
+        with self.assertRaises(ValueError):
+            oc.execute(run_id="run1")
+        self.assertEqual(1, extractor.reads)
+
+        # the rerun continues after the checkpoint of the transformer
+        loader.fail = False
+        result = oc.execute(run_id="run1")
+        self.assertEqual(1, extractor.reads)
+        self.assertDataframeMatches(loader.saved, None, [(2,), (4,), (6,)])
+        self.assertEqual(["doubled"], list(result.keys()))
+
+        # a new run starts from the beginning
+        oc.execute(run_id="run2")
+        self.assertEqual(2, extractor.reads)
+
+    def test_run_id_requires_location(self):
+        oc = Orchestrator()
+        oc.extract_from(CountingExtractor(), checkpoint=True)
+
+        with self.assertRaises(ValueError):
+            oc.execute(run_id="run1")
+
+
+class CountingExtractor(Extractor):
+    reads = 0
+
+    def read(self) -> DataFrame:
+        self.reads += 1
+        return Spark.get().createDataFrame([(1,), (2,), (3,)], "id int")
+
+
+class DoublingTransformer(Transformer):
+    def __init__(self):
+        super().__init__(dataset_output_key="doubled")
+
+    def process(self, df: DataFrame) -> DataFrame:
+        return df.selectExpr("id * 2 as id")
+
+
+class FlakyLoader(Loader):
+    fail = True
+    saved = None
+
+    def save(self, df: DataFrame) -> None:
+        if self.fail:
+            raise ValueError("Failed to save")
+        self.saved = df
+
+
+if __name__ == "__main__":
+    unittest.main()
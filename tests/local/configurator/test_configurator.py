@@ -288,3 +288,33 @@ class TestConfigurator(unittest.TestCase):
         # test exception for missing property
         with self.assertRaises(NoSuchValueException):
             c.get("MyTable", "Missing_Property")
+
+    def test_18_keys_where(self):
+        c = Configurator()
+        c.clear_all_configurations()
+
+        c.register("First", {"name": "MyDb.MyTable", "format": "delta"})
+        c.register("Second", {"name": "MyDb.Other", "format": "delta"})
+
+        # the index is built here
+        self.assertEqual(c.key_of("name", "MyDb.Other"), "Second")
+        self.assertEqual(c.keys_where("format", "delta"), ["First", "Second"])
+
+        # and kept up to date by later registrations
+        c.register("Third", {"name": "MyDb.Third", "format": "delta"})
+        c.register("First", {"format": "parquet"})
+        self.assertEqual(c.keys_where("format", "delta"), ["Second", "Third"])
+        self.assertEqual(c.key_of("format", "parquet"), "First")
+
+        c.register("Second", None)
+        self.assertEqual(c.keys_where("format", "delta"), ["Third"])
+        self.assertEqual(c.keys_where("name", "MyDb.Other"), [])
+        with self.assertRaises(KeyError):
+            c.key_of("name", "MyDb.Other")
+
+        # re-registered keys are ordered as the configuration
+        c.register("Second", {"format": "delta"})
+        self.assertEqual(c.keys_where("format", "delta"), ["Third", "Second"])
+
+        c.clear_all_configurations()
+        self.assertEqual(c.keys_where("format", "delta"), [])
@@ -0,0 +1,71 @@
+import unittest
+
+from spetlr import Configurator
+
+
+class TestConfiguratorCache(unittest.TestCase):
+    def setUp(self) -> None:
+        tc = Configurator()
+        tc.clear_all_configurations()
+        tc.register("ENV", "dev")
+        tc.register("MyDb", {"name": "db_{ENV}", "path": "/mnt/{ENV}/db"})
+        tc.register("MyTbl", {"name": "{MyDb}.tbl", "path": "{MyDb_path}/tbl"})
+        tc.register("MyAlias", {"alias": "MyTbl"})
+        tc.register("Other", {"name": "other"})
+
+    def test_register_updates_dependents(self):
+        tc = Configurator()
+        self.assertEqual("db_dev.tbl", tc.get("MyAlias", "name"))
+        self.assertEqual("/mnt/dev/db/tbl", tc.get_all_details()["MyTbl_path"])
+
+        tc.register("ENV", "prod")
+
+        self.assertEqual("db_prod.tbl", tc.get("MyAlias", "name"))
+        self.assertEqual("/mnt/prod/db/tbl", tc.get_all_details()["MyTbl_path"])
+
+    def test_register_alias_target(self):
+        tc = Configurator()
+        self.assertEqual("db_dev.tbl", tc.get("MyAlias", "name"))
+
+        tc.register("MyTbl", {"name": "new"})
+
+        self.assertEqual("new", tc.get("MyAlias", "name"))
+        self.assertEqual("new", tc.get_all_details()["MyAlias"])
+
+    def test_unrelated_details_are_kept(self):
+        tc = Configurator()
+        tc.get_all_details()
+        tbl_details = tc._details_by_key["MyTbl"]
+        other_details = tc._details_by_key["Other"]
+
+        tc.register("Other", {"name": "changed"})
+        details = tc.get_all_details()
+
+        self.assertIs(tbl_details, tc._details_by_key["MyTbl"])
+        self.assertIsNot(other_details, tc._details_by_key["Other"])
+        self.assertEqual("changed", details["Other"])
+        # the order of the details follows the order of registration
+        self.assertEqual(["ID", "MNT", "ENV", "MyDb"], list(details)[:4])
+
+    def test_removed_key(self):
+        tc = Configurator()
+        self.assertIn("Other_name", tc.get_all_details())
+
+        tc.register("Other", None)
+
+        self.assertNotIn("Other_name", tc.get_all_details())
+        self.assertNotIn("Other", tc.get_all_details())
+
+    def test_debug_switch(self):
+        tc = Configurator()
+        tc.register("MyDebugTbl", {"name": "tbl{ID}"})
+        tc.set_prod()
+        self.assertEqual("tbl", tc.get("MyDebugTbl", "name"))
+
+        tc.set_debug()
+        self.assertRegex(tc.get("MyDebugTbl", "name"), "tbl__.*")
+        tc.set_prod()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,13 @@ import sys
 import unittest
 from tempfile import NamedTemporaryFile
 from textwrap import dedent
+from unittest.mock import patch
 
 from spetlr import Configurator
+from spetlr.configurator.bundle import ConfigurationBundle
 from spetlr.exceptions.cli_exceptions import SpetlrCliCheckFailed
 
-from . import tables1
+from . import sql, tables1
 
 
 class TestConfiguratorCli(unittest.TestCase):
@@ -62,3 +64,51 @@ class TestConfiguratorCli(unittest.TestCase):
             with self.assertRaises(SpetlrCliCheckFailed):
                 # file had bad contents
                 c.cli()
+
+    def test_02_compile_bundle(self):
+        c = Configurator()
+        c.clear_all_configurations()
+        c.add_resource_path(tables1)
+        c.add_sql_resource_path(sql)
+        expected = c.get_all_details()
+
+        with NamedTemporaryFile() as nf:
+            name = nf.name
+            nf.close()
+            sys.argv = ["mycliprog", "compile-bundle", "-c", "-o", name]
+            with self.assertRaises(SpetlrCliCheckFailed):
+                # file did not exist. exit code 1
+                c.cli()
+
+            sys.argv = ["mycliprog", "compile-bundle", "-o", name]
+            c.cli()
+
+            sys.argv = ["mycliprog", "compile-bundle", "-c", "-o", name]
+            c.cli()
+
+            # loading from the bundle does not parse any files
+            c.clear_all_configurations()
+            c.use_bundle(name)
+            with patch(
+                "spetlr.configurator.configurator.parse_resources",
+                side_effect=AssertionError("parsed"),
+            ):
+                c.add_resource_path(tables1)
+                c.add_sql_resource_path(sql)
+            self.assertEqual(c.get_all_details(), expected)
+
+            # files that changed since the bundle was compiled are parsed
+            bundle = ConfigurationBundle.load(name)
+            for resource in bundle.resources.values():
+                resource.hashes = {}
+            bundle.save(name)
+
+            sys.argv = ["mycliprog", "compile-bundle", "-c", "-o", name]
+            with self.assertRaises(SpetlrCliCheckFailed):
+                c.cli()
+
+            c.clear_all_configurations()
+            c.use_bundle(name)
+            with self.assertWarns(UserWarning):
+                c.add_resource_path(tables1)
+            self.assertEqual(c.get("MyFirst", "name"), expected["MyFirst"])
@@ -0,0 +1,95 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from spetlr import Configurator
+from spetlr.configurator import resources
+
+from . import sql, tables1, tables2, views
+
+
+class TestConfiguratorParallel(unittest.TestCase):
+    def setUp(self) -> None:
+        Configurator().clear_all_configurations()
+
+    def test_01_same_order_as_sequential(self):
+        c = Configurator()
+        c.register("ENV", "dev")
+        c.add_resource_path(tables1)
+        c.add_resource_path(tables2)
+        c.add_sql_resource_path(sql)
+        c.add_sql_resource_path(views)
+        expected = list(c._raw_resource_details.items())
+
+        c.clear_all_configurations()
+        c.register("ENV", "dev")
+        c.add_resource_paths(tables1, tables2, max_workers=2)
+        c.add_sql_resource_paths(sql, views, max_workers=2)
+
+        self.assertEqual(list(c._raw_resource_details.items()), expected)
+
+    def test_02_errors_are_raised(self):
+        c = Configurator()
+        with self.assertRaises(KeyError):
+            # tables2 needs ENV
+            c.add_resource_paths(tables1, tables2, max_workers=2)
+        self.assertEqual(c.all_keys(), ["ID", "MNT"])
+
+
+class TestConfiguratorManyFiles(unittest.TestCase):
+    """Loads a synthetic configuration of 5000 keys in 50 files,
+    once one file after the other with the python yaml loader,
+    and once with the default yaml loader, also on a process pool."""
+
+    n_files = 50
+    keys_per_file = 100
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        package = Path(cls.tmp.name) / "benchmark_tables"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        for i in range(cls.n_files):
+            (package / f"tables_{i}.yml").write_text(
+                yaml.dump(
+                    {
+                        f"Table{i}_{j}": {
+                            "name": f"Db{i}.Table{j}{{ID}}",
+                            "path": f"/{{MNT}}/db{i}/table{j}",
+                            "format": "delta",
+                            "partitioned_by": ["year", "month"],
+                            "tblproperties": {"delta.appendOnly": "false"},
+                        }
+                        for j in range(cls.keys_per_file)
+                    }
+                )
+            )
+        sys.path.insert(0, cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        sys.path.remove(cls.tmp.name)
+        sys.modules.pop("benchmark_tables", None)
+        cls.tmp.cleanup()
+        Configurator().clear_all_configurations()
+
+    def _load(self, max_workers: int):
+        c = Configurator()
+        c.clear_all_configurations()
+        c.add_resource_paths(
+            "benchmark_tables", consistency_check=False, max_workers=max_workers
+        )
+        return list(c._raw_resource_details.items())
+
+    def test_01_same_details(self):
+        with patch.object(resources, "YamlLoader", yaml.FullLoader):
+            expected = self._load(max_workers=1)
+
+        self.assertEqual(len(expected), self.n_files * self.keys_per_file + 2)
+        self.assertEqual(self._load(max_workers=1), expected)
+        self.assertEqual(self._load(max_workers=4), expected)
@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from spetlr.delta import DeltaBatchWriteException, DeltaBatchWriter
+
+
+def _handle(name: str, fail: bool = False, delay: float = 0.0) -> MagicMock:
+    handle = MagicMock()
+    handle.get_tablename.return_value = name
+    handle.threads = set()
+
+    def write(df, **kwargs):
+        handle.threads.add(threading.get_ident())
+        time.sleep(delay)
+        if fail:
+            raise ValueError(f"cannot write {name}")
+
+    for mode in ["overwrite", "append", "upsert"]:
+        getattr(handle, mode).side_effect = write
+    return handle
+
+
+class TestDeltaBatchWriter(unittest.TestCase):
+    def test_01_writes_all(self):
+        dh1, dh2, dh3 = _handle("db.a"), _handle("db.b"), _handle("db.c")
+        writes = (
+            DeltaBatchWriter(max_workers=4)
+            .add(dh1, "df1")
+            .add(dh2, "df2", "append", mergeSchema=True)
+            .add(dh3, "df3", "upsert", join_cols=["id"])
+            .write()
+        )
+
+        self.assertTrue(all(write.succeeded for write in writes))
+        dh1.overwrite.assert_called_once_with("df1")
+        dh2.append.assert_called_once_with("df2", mergeSchema=True)
+        dh3.upsert.assert_called_once_with("df3", join_cols=["id"])
+
+    def test_02_concurrent(self):
+        handles = [_handle(f"db.t{i}", delay=0.2) for i in range(4)]
+
+        start = time.perf_counter()
+        DeltaBatchWriter(max_workers=4).write({dh: "df" for dh in handles})
+        self.assertLess(time.perf_counter() - start, 0.6)
+
+        threads = set().union(*[dh.threads for dh in handles])
+        self.assertGreater(len(threads), 1)
+
+    def test_03_all_or_report(self):
+        ok, bad1, bad2 = (
+            _handle("db.ok"),
+            _handle("db.bad1", True),
+            _handle("db.bad2", True),
+        )
+
+        with self.assertRaises(DeltaBatchWriteException) as cm:
+            DeltaBatchWriter(max_workers=2).write({bad1: "df", ok: "df", bad2: "df"})
+
+        # the failures do not stop the other writes, and all are reported
+        ok.overwrite.assert_called_once()
+        self.assertEqual(
+            [write.succeeded for write in cm.exception.writes], [False, True, False]
+        )
+        self.assertIn("db.bad1", str(cm.exception))
+        self.assertIn("db.bad2", str(cm.exception))
+        self.assertIs(cm.exception.__cause__, cm.exception.writes[0].error)
+
+        writes = DeltaBatchWriter(raise_on_error=False).write({bad1: "df", ok: "df"})
+        self.assertIsInstance(writes[0].error, ValueError)
+        self.assertTrue(writes[1].succeeded)
+
+    def test_04_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            DeltaBatchWriter().add(_handle("db.a"), "df", "merge")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from py4j.protocol import Py4JError
+
+from spetlr.delta.delta_log import get_snapshot, get_snapshot_version
+
+
+class TestDeltaLog(unittest.TestCase):
+    def setUp(self) -> None:
+        self.delta_log = MagicMock()
+        for target, value in [
+            ("spetlr.delta.delta_log.Spark.get", MagicMock()),
+            ("spetlr.delta.delta_log._get_delta_log", self.delta_log),
+        ]:
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_updated_snapshot(self):
+        self.delta_log.update.return_value.version.return_value = 7
+        self.assertEqual(get_snapshot_version("/mnt/tbl"), 7)
+
+    def test_no_table(self):
+        self.delta_log.update.return_value.version.return_value = -1
+        self.assertIsNone(get_snapshot_version("/mnt/tbl"))
+
+    def test_stale_snapshot_is_not_used(self):
+        self.delta_log.update.side_effect = Py4JError(
+            "Method update([class java.lang.Boolean]) does not exist"
+        )
+        self.assertIsNone(get_snapshot("/mnt/tbl"))
+        self.assertIsNone(get_snapshot_version("/mnt/tbl"))
+        self.delta_log.unsafeVolatileSnapshot.assert_not_called()
+
+    def test_unexpected_errors_propagate(self):
+        self.delta_log.update.side_effect = Py4JError("update failed")
+        with self.assertRaises(Py4JError):
+            get_snapshot("/mnt/tbl")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from pyspark.sql.utils import AnalysisException
+
+from spetlr import Configurator
+from spetlr.delta import DeltaHandle
+from spetlr.delta.maintenance import find_tables_to_optimize, get_delta_table_ids
+from spetlr.delta.table_metadata import TableMetadata
+
+MiB = 1024**2
+
+
+class TestMaintenance(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        tc = Configurator()
+        tc.clear_all_configurations()
+        tc.set_prod()
+        tc.register("MyDb", {"name": "my_db"})
+        tc.register("Streamed", {"name": "my_db.streamed"})
+        tc.register("Compacted", {"name": "my_db.compacted"})
+        tc.register("FewFiles", {"name": "my_db.few_files"})
+        tc.register("Missing", {"name": "my_db.missing"})
+        tc.register("Csv", {"name": "my_db.csv", "format": "csv"})
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        Configurator().clear_all_configurations()
+
+    def test_01_delta_table_ids(self):
+        self.assertEqual(
+            get_delta_table_ids(), ["Streamed", "Compacted", "FewFiles", "Missing"]
+        )
+
+    def test_02_find_tables_to_optimize(self):
+        figures = {
+            "my_db.streamed": (400, 400 * MiB),
+            "my_db.compacted": (100, 100 * 128 * MiB),
+            "my_db.few_files": (10, 10 * MiB),
+        }
+
+        def refresh(name):
+            if name not in figures:
+                raise AnalysisException(f"Table {name} not found")
+            num_files, size = figures[name]
+            return TableMetadata(name=name, num_files=num_files, size_in_bytes=size)
+
+        with patch(
+            "spetlr.delta.maintenance.TableMetadataCache.refresh",
+            side_effect=refresh,
+        ):
+            candidates = find_tables_to_optimize()
+
+        self.assertEqual([c.table_id for c in candidates], ["Streamed"])
+        self.assertEqual(candidates[0].avg_file_size, MiB)
+
+    def test_03_maintenance_statements(self):
+        spark = MagicMock()
+        dh = DeltaHandle("my_db.streamed")
+        with patch("spetlr.delta.delta_handle.Spark.get", return_value=spark):
+            dh.optimize(zorder_by=["a", "b"], where="day >= '2024-01-01'")
+            dh.vacuum(168)
+            dh.compute_statistics(["a"])
+            dh.compute_statistics([])
+            dh.set_auto_compact(True, optimize_write=False)
+
+        self.assertEqual(
+            [call.args[0] for call in spark.sql.call_args_list],
+            [
+                "OPTIMIZE my_db.streamed WHERE day >= '2024-01-01' ZORDER BY (a, b)",
+                "VACUUM my_db.streamed RETAIN 168 HOURS",
+                "ANALYZE TABLE my_db.streamed COMPUTE STATISTICS FOR COLUMNS a",
+                "ANALYZE TABLE my_db.streamed COMPUTE STATISTICS FOR ALL COLUMNS",
+                "ALTER TABLE my_db.streamed SET TBLPROPERTIES ("
+                "'delta.autoOptimize.autoCompact' = 'true', "
+                "'delta.autoOptimize.optimizeWrite' = 'false')",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from spetlr.delta.merge_builder import DeltaMergeBuilder
+
+
+class TestDeltaMergeBuilder(unittest.TestCase):
+    df = MagicMock(
+        columns=["id", "name", "tags"],
+        dtypes=[("id", "int"), ("name", "string"), ("tags", "map<string,string>")],
+    )
+
+    def test_01_default_sql(self):
+        sql = DeltaMergeBuilder("db.tbl", ["id"]).get_sql(self.df, "source_view")
+        self.assertEqual(
+            sql,
+            "MERGE INTO db.tbl AS target USING source_view AS source "
+            "ON (source.id = target.id) "
+            "WHEN MATCHED THEN UPDATE SET target.id = source.id, "
+            "target.name = source.name, target.tags = source.tags "
+            "WHEN NOT MATCHED THEN INSERT (id, name, tags) "
+            "VALUES (source.id, source.name, source.tags);",
+        )
+
+    def test_02_update_only_changed(self):
+        builder = DeltaMergeBuilder(
+            "db.tbl", ["id"], update_cols=["name", "tags"], update_only_changed=True
+        )
+        self.assertEqual(
+            builder.get_update_condition(self.df),
+            "NOT (target.name <=> source.name)"
+            " OR NOT (CAST(target.tags AS string) <=> CAST(source.tags AS string))",
+        )
+        self.assertIn(
+            "WHEN MATCHED AND (NOT (target.name <=> source.name)",
+            builder.get_sql(self.df, "source_view"),
+        )
+
+        # only join columns to update means that nothing ever changes
+        builder = DeltaMergeBuilder(
+            "db.tbl", ["id"], update_cols=["id"], update_only_changed=True
+        )
+        self.assertEqual(builder.get_update_condition(self.df), "false")
+
+    def test_03_delete_and_schema_evolution(self):
+        sql = DeltaMergeBuilder(
+            "db.tbl",
+            ["id"],
+            update_cols=[],
+            insert_cols=[],
+            target_predicate="target.id > 10",
+            delete_not_matched_by_source=True,
+            merge_schema=True,
+        ).get_sql(self.df, "source_view")
+        self.assertEqual(
+            sql,
+            "MERGE WITH SCHEMA EVOLUTION INTO db.tbl AS target "
+            "USING source_view AS source "
+            "ON (source.id = target.id) AND (target.id > 10) "
+            "WHEN NOT MATCHED BY SOURCE AND (target.id > 10) THEN DELETE;",
+        )
+
+    def test_04_update_only_changed_with_schema_evolution(self):
+        builder = DeltaMergeBuilder(
+            "db.tbl", ["id"], update_only_changed=True, merge_schema=True
+        )
+        spark = MagicMock()
+        with patch("spetlr.delta.merge_builder.Spark.get", return_value=spark):
+            # the target does not have the new column tags yet
+            spark.table.return_value.columns = ["id", "name"]
+            self.assertIsNone(builder.get_update_condition(self.df))
+            self.assertIn(
+                "WHEN MATCHED THEN UPDATE SET",
+                builder.get_sql(self.df, "source_view"),
+            )
+
+            # without new columns, only changed rows are updated
+            spark.table.return_value.columns = ["ID", "Name", "Tags"]
+            self.assertEqual(
+                builder.get_update_condition(self.df),
+                "NOT (target.name <=> source.name)"
+                " OR NOT (CAST(target.tags AS string) <=> CAST(source.tags AS string))",
+            )
+        spark.table.assert_called_with("db.tbl")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from spetlr.delta.table_metadata import TableMetadataCache
+
+
+class TestTableMetadataCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = TableMetadataCache()
+        self.cache.invalidate()
+        self.cache.set_ttl(300)
+
+        self.spark = MagicMock()
+        self.spark.sql.return_value.collect.return_value[0].asDict.side_effect = (
+            lambda: {
+                "format": "delta",
+                "location": "/mnt/tbl",
+                "partitionColumns": ["colB"],
+                "clusteringColumns": [],
+                "sizeInBytes": 100,
+                "numFiles": 2,
+                "properties": {"delta.appendOnly": "false"},
+            }
+        )
+        patcher = patch(
+            "spetlr.delta.table_metadata.Spark.get", return_value=self.spark
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.cache.invalidate()
+
+    def test_01_one_query_per_table(self):
+        metadata = self.cache.get("db.tbl")
+        self.assertEqual(metadata.partition_columns, ["colB"])
+        self.assertEqual(metadata.num_files, 2)
+        self.assertEqual(metadata.location, "/mnt/tbl")
+
+        # changes of the caller do not reach the cache
+        metadata.partition_columns.append("colA")
+
+        self.assertEqual(self.cache.get("DB.tbl").partition_columns, ["colB"])
+        self.assertEqual(self.spark.sql.call_count, 1)
+
+        self.cache.get("db.other")
+        self.assertEqual(self.spark.sql.call_count, 2)
+
+    def test_02_invalidate(self):
+        self.cache.get("catalog.db.tbl")
+        self.cache.get("db.other")
+        self.cache.invalidate("db.tbl")
+
+        self.cache.get("catalog.db.tbl")
+        self.cache.get("db.other")
+        self.assertEqual(self.spark.sql.call_count, 3)
+
+    def test_03_ttl(self):
+        self.cache.set_ttl(0)
+        self.cache.get("db.tbl")
+        self.cache.get("db.tbl")
+        self.assertEqual(self.spark.sql.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+
+import pyspark.sql.types as T
+
+from spetlr.delta.upsert_strategy import get_partition_predicate, get_source_predicate
+
+
+class TestUpsertStrategy(unittest.TestCase):
+    schema = T.StructType(
+        [
+            T.StructField("id", T.IntegerType()),
+            T.StructField("day", T.DateType()),
+            T.StructField("country", T.StringType()),
+        ]
+    )
+
+    def test_01_partition_predicate(self):
+        predicate = get_partition_predicate(
+            [
+                {"day": "2024-01-02", "country": "DK"},
+                {"day": "2024-01-01", "country": "DK"},
+                {"day": "2024-01-01", "country": None},
+            ],
+            self.schema,
+            ["day", "country"],
+        )
+        self.assertEqual(
+            predicate,
+            "(target.day IN (CAST('2024-01-01' AS date), CAST('2024-01-02' AS date)))"
+            " AND (target.country IN (CAST('DK' AS string))"
+            " OR target.country IS NULL)",
+        )
+
+    def test_02_partition_predicate_escapes_values(self):
+        predicate = get_partition_predicate(
+            [{"country": "it's"}], self.schema, ["country"]
+        )
+        self.assertEqual(predicate, "(target.country IN (CAST('it\\'s' AS string)))")
+
+    def test_03_source_predicate_from_key_ranges(self):
+        df = MagicMock(schema=self.schema)
+        predicate = get_source_predicate(
+            df,
+            ["id", "day"],
+            [],
+            ["day", "country"],
+            key_ranges={"id": (1, 5), "day": (date(2024, 1, 1), date(2024, 1, 31))},
+        )
+        self.assertEqual(
+            predicate,
+            "(target.day BETWEEN CAST('2024-01-01' AS date)"
+            " AND CAST('2024-01-31' AS date))",
+        )
+        # the source is not read again
+        df.agg.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
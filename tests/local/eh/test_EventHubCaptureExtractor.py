@@ -1,6 +1,8 @@
 import unittest
 from datetime import datetime as dt
 from datetime import timezone
+from types import SimpleNamespace
+from unittest import mock
 
 from spetlr.eh.EventHubCaptureExtractor import EventHubCaptureExtractor
 
@@ -54,3 +56,116 @@ class EventHubCaptureExtractorTests(unittest.TestCase):
                 "y=2022/",
             ],
         )
+
+
+class FakeFs:
+    """A file system of capture files, that counts the listings."""
+
+    def __init__(self, files):
+        self.files = files
+        self.listed = []
+
+    def ls(self, path):
+        self.listed.append(path)
+        path = path.rstrip("/") + "/"
+        names = sorted(
+            {
+                file[len(path) :].split("/")[0]
+                for file in self.files
+                if file.startswith(path)
+            }
+        )
+        if not names:
+            raise Exception(f"java.io.FileNotFoundException: {path}")
+        return [
+            SimpleNamespace(
+                name=name if name.endswith(".avro") else name + "/",
+                path=path + name + ("" if name.endswith(".avro") else "/"),
+            )
+            for name in names
+        ]
+
+
+class EventHubCaptureListingTests(unittest.TestCase):
+    files = [
+        "/cap/y=2022/m=05/d=01/h=00/0.avro",
+        "/cap/y=2022/m=05/d=01/h=00/1.avro",
+        "/cap/y=2022/m=05/d=02/h=13/0.avro",
+        "/cap/y=2022/m=05/d=03/h=01/0.avro",
+        "/cap/y=2022/m=05/d=03/h=02/0.avro",
+    ]
+
+    def setUp(self) -> None:
+        EventHubCaptureExtractor.clear_listing_cache()
+        self.fs = FakeFs(self.files)
+        patcher = mock.patch(
+            "spetlr.eh.EventHubCaptureExtractor.init_dbutils",
+            return_value=SimpleNamespace(fs=self.fs),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.eh = EventHubCaptureExtractor(path="/cap", partitioning="ymdh")
+        self.eh._now_utc = lambda: dt(2022, 5, 3, 2, 10, tzinfo=utc)
+
+    def test_part_end(self):
+        self.assertEqual(
+            EventHubCaptureExtractor._part_end("y=2022/m=12/"),
+            dt(2023, 1, 1, tzinfo=utc),
+        )
+        self.assertEqual(
+            EventHubCaptureExtractor._part_end("y=2022/m=05/d=03/h=23/"),
+            dt(2022, 5, 4, tzinfo=utc),
+        )
+
+    def test_list_parts(self):
+        parts = [
+            "y=2022/m=04/d=30/",
+            "y=2022/m=05/d=01/",
+            "y=2022/m=05/d=02/",
+            "y=2022/m=05/d=03/h=01/",
+            "y=2022/m=05/d=03/h=02/",
+        ]
+        self.assertEqual(
+            self.eh._list_parts(parts),
+            [
+                "/cap/y=2022/m=05/d=01/h=00/0.avro",
+                "/cap/y=2022/m=05/d=01/h=00/1.avro",
+                "/cap/y=2022/m=05/d=02/h=13/0.avro",
+                "/cap/y=2022/m=05/d=03/h=01/0.avro",
+                "/cap/y=2022/m=05/d=03/h=02/0.avro",
+            ],
+        )
+
+        # the completed parts with files are cached, but empty parts,
+        # the current hour and the hour that ended within the grace period
+        # are listed again
+        self.fs.listed.clear()
+        self.assertEqual(len(self.eh._list_parts(parts)), 5)
+        self.assertEqual(
+            sorted(self.fs.listed),
+            [
+                "/cap/y=2022/m=04/d=30/",
+                "/cap/y=2022/m=05/d=03/h=01/",
+                "/cap/y=2022/m=05/d=03/h=02/",
+            ],
+        )
+
+        # once the grace period has passed, the hour is cached
+        self.eh._now_utc = lambda: dt(2022, 5, 3, 2, 30, tzinfo=utc)
+        self.eh._list_parts(parts)
+        self.fs.listed.clear()
+        self.eh._list_parts(parts)
+        self.assertEqual(
+            sorted(self.fs.listed),
+            ["/cap/y=2022/m=04/d=30/", "/cap/y=2022/m=05/d=03/h=02/"],
+        )
+
+    def test_find_file(self):
+        self.assertEqual(self.eh._find_file(), "/cap/y=2022/m=05/d=01/h=00/0.avro")
+
+    def test_partition_schema(self):
+        self.assertEqual(
+            [field.name for field in self.eh._partition_schema().fields],
+            ["y", "m", "d", "h"],
+        )
@@ -159,6 +159,55 @@ class TestLogTransformer(DataframeTestCase):
         self.assertIsNotNone(df_log)
         self.assertEqual(df_log.count(), 4)
 
+    def test_dry_run_does_not_load_logs_04(self) -> None:
+        sink_log_handle = TestHandle()
+        source_handle = TestHandle(self.df)
+
+        log_oc = LogOrchestrator(
+            handles=[sink_log_handle],
+            profile_steps=True,
+        )
+
+        log_oc.extract_from(
+            SimpleExtractor(
+                handle=source_handle,
+                dataset_key="df_test_1",
+            )
+        )
+
+        log_oc.log_with(
+            CountLogTransformer(
+                log_name="log_test_count",
+                dataset_input_keys=["df_test_1"],
+                consume_inputs=False,
+            )
+        )
+
+        log_oc.log_with(
+            NullLogTransformer(
+                log_name="log_test_null",
+                column_name="col_2",
+                dataset_input_keys=["df_test_1"],
+                consume_inputs=False,
+            )
+        )
+
+        log_oc.execute(dry_run=True)
+
+        # the log steps are only added once
+        self.assertEqual(
+            [type(step).__name__ for step in log_oc.steps[-2:]],
+            ["UnionTransformer", "SimpleLoader"],
+        )
+        self.assertEqual(
+            [type(step).__name__ for step in log_oc.steps].count("SimpleLoader"), 1
+        )
+
+        # neither the logs nor the step profiles are loaded
+        self.assertIsNone(sink_log_handle.appended)
+        (planned,) = log_oc.dry_run_report.get_saves()
+        self.assertEqual("SimpleLoader", planned.loader_name)
+
 
 if __name__ == "__main__":
     unittest.main()
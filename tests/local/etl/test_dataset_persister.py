@@ -0,0 +1,121 @@
+import unittest
+
+from pyspark import StorageLevel
+
+from spetlr.etl import Extractor, Loader, Orchestrator, Transformer
+from spetlr.etl.dataset_persister import get_dataset_versions
+
+
+class DatasetPersisterTests(unittest.TestCase):
+    def test_shared_dataset_is_persisted_while_used(self):
+        for parallelism in [1, 4]:
+            events = []
+            oc = Orchestrator(
+                max_parallel_steps=parallelism,
+                persist_shared_datasets=True,
+                persist_storage_level=StorageLevel.DISK_ONLY,
+            )
+            bronze = FakeExtractor(events, "bronze")
+            oc.extract_from(bronze)
+            oc.extract_from(FakeExtractor(events, "other"))
+            oc.load_into(FakeLoader(events, "bronze"))
+            oc.transform_with(FakeTransformer(events, "bronze", "silver"))
+            oc.load_into(FakeLoader(events, "silver"))
+            oc.load_into(FakeLoader(events, "other"))
+            oc.execute()
+
+            bronze_events = [e for e in events if "bronze" in e]
+            self.assertEqual(
+                [
+                    "persist bronze",
+                    "save bronze",
+                    "unpersist bronze",
+                ],
+                [e for e in bronze_events if e != "save silver from bronze"],
+            )
+            # the lazily derived dataset keeps the shared dataset persisted
+            self.assertLess(
+                events.index("save silver from bronze"),
+                events.index("unpersist bronze"),
+            )
+            self.assertEqual(StorageLevel.DISK_ONLY, bronze.df.storage_level)
+            # datasets with a single consumer are not persisted
+            self.assertNotIn("persist other", events)
+
+    def test_cached_dataset_is_untouched(self):
+        events = []
+        extractor = FakeExtractor(events, "bronze", is_cached=True)
+        oc = Orchestrator(persist_shared_datasets=True)
+        oc.extract_from(extractor)
+        oc.load_into(FakeLoader(events, "bronze"))
+        oc.load_into(FakeLoader(events, "bronze"))
+        oc.execute()
+
+        self.assertEqual(["save bronze", "save bronze"], events)
+
+    def test_versions(self):
+        steps = [
+            FakeExtractor([], "a"),
+            FakeLoader([], "a"),
+            FakeTransformer([], "a", "a"),
+            FakeLoader([], "a"),
+        ]
+        versions = get_dataset_versions(steps, [])
+
+        self.assertEqual(
+            [("a", 0, {1, 2}), ("a", 2, {3})],
+            [(v.key, v.producer, v.consumers) for v in versions],
+        )
+        self.assertEqual({1, 2, 3}, versions[0].get_users())
+
+
+class FakeDataFrame:
+    def __init__(self, events: list, name: str, is_cached=False):
+        self.events = events
+        self.name = name
+        self.is_cached = is_cached
+        self.storage_level = None
+
+    def persist(self, storage_level=None):
+        self.events.append(f"persist {self.name}")
+        self.storage_level = storage_level
+        return self
+
+    def unpersist(self):
+        self.events.append(f"unpersist {self.name}")
+        return self
+
+
+class FakeExtractor(Extractor):
+    def __init__(self, events: list, key: str, is_cached=False):
+        super().__init__(dataset_key=key)
+        self.df = FakeDataFrame(events, key, is_cached)
+
+    def read(self):
+        return self.df
+
+
+class FakeTransformer(Transformer):
+    def __init__(self, events: list, input_key: str, output_key: str):
+        super().__init__(
+            dataset_input_keys=[input_key],
+            dataset_output_key=output_key,
+            consume_inputs=False,
+        )
+        self.events = events
+
+    def process(self, df):
+        return FakeDataFrame(self.events, f"{self.dataset_output_key} from {df.name}")
+
+
+class FakeLoader(Loader):
+    def __init__(self, events: list, key: str):
+        super().__init__(dataset_input_keys=key)
+        self.events = events
+
+    def save(self, df):
+        self.events.append(f"save {df.name}")
+
+
+if __name__ == "__main__":
+    unittest.main()
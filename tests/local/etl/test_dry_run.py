@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import MagicMock
+
+from spetlr.etl import Orchestrator
+from spetlr.etl.dry_run import DryRunReport
+from spetlr.etl.extractors import ChangeFeedExtractor
+from spetlr.spark import Spark
+from tests.local.etl.test_parallel_orchestrator import (
+    AppendTransformer,
+    SaveLoader,
+    ValueExtractor,
+)
+
+
+class DryRunTests(unittest.TestCase):
+    def test_loaders_do_not_save(self):
+        for parallelism in [1, 4]:
+            saved = {}
+            oc = Orchestrator(max_parallel_steps=parallelism)
+            oc.extract_from(ValueExtractor("a"))
+            oc.transform_with(AppendTransformer(["a"], "b"))
+            oc.load_into(SaveLoader(saved, "b"))
+
+            result = oc.execute(dry_run=True)
+
+            self.assertEqual({"b": "a+"}, result)
+            self.assertEqual({}, saved)
+            (planned,) = oc.dry_run_report.get_saves()
+            self.assertEqual("SaveLoader", planned.loader_name)
+            self.assertEqual("b", planned.dataset_key)
+            self.assertIsNone(planned.optimized_plan)
+
+            # the report is only active during the dry run
+            self.assertIsNone(DryRunReport.get_active())
+            oc.execute()
+            self.assertEqual({"b": "a+"}, saved)
+
+    def test_nested_orchestrator(self):
+        saved = {}
+        inner = Orchestrator()
+        inner.load_into(SaveLoader(saved, "a"))
+        oc = Orchestrator()
+        oc.extract_from(ValueExtractor("a"))
+        oc.step(inner)
+
+        oc.execute(dry_run=True)
+
+        self.assertEqual({}, saved)
+        self.assertEqual(["a"], [p.dataset_key for p in oc.dry_run_report.get_saves()])
+
+    def test_change_feed_is_not_committed(self):
+        extractor = MagicMock()
+        commit_step = ChangeFeedExtractor.commit_step(extractor)
+        oc = Orchestrator()
+        oc.extract_from(ValueExtractor("a"))
+        oc.step(commit_step)
+
+        oc.execute(dry_run=True)
+        extractor.commit.assert_not_called()
+
+        oc.execute()
+        extractor.commit.assert_called_once()
+
+    def test_plans(self):
+        df = Spark.get().range(10).filter("id > 5")
+        report = DryRunReport()
+        report.add(SaveLoader({}, "a"), "a", df)
+
+        (planned,) = report.as_dicts()
+        self.assertIn("Filter", planned["analyzed_plan"])
+        self.assertIn("Filter", planned["optimized_plan"])
+        self.assertIsNotNone(planned["physical_plan"])
+        self.assertGreater(planned["size_in_bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
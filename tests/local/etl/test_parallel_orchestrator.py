@@ -0,0 +1,145 @@
+import threading
+import unittest
+
+from spetlr.etl import EtlBase, Extractor, Loader, Orchestrator, Transformer
+from spetlr.etl.step_graph import get_step_dependencies
+from spetlr.etl.types import dataset_group
+
+
+class ParallelOrchestratorTests(unittest.TestCase):
+    def test_same_result_as_sequential(self):
+        for parallelism in [1, 4]:
+            saved = {}
+            result = make_pipeline(saved, parallelism).execute()
+            self.assertEqual(
+                ["employees", "joined", "unused"],
+                list(result.keys()),
+            )
+            self.assertEqual("employees+", result["employees"])
+            self.assertEqual("birthdays+employees+", result["joined"])
+            self.assertEqual(
+                {"employees": "employees+", "joined": "birthdays+employees+"}, saved
+            )
+
+    def test_independent_steps_run_concurrently(self):
+        # both extractors must be waiting at the same time to pass the barrier
+        barrier = threading.Barrier(2, timeout=10)
+        oc = Orchestrator(max_parallel_steps=2)
+        oc.extract_from(BarrierExtractor(barrier, dataset_key="a"))
+        oc.extract_from(BarrierExtractor(barrier, dataset_key="b"))
+
+        result = oc.execute()
+
+        self.assertEqual({"a": "a", "b": "b"}, result)
+
+    def test_first_error_is_raised(self):
+        oc = Orchestrator(max_parallel_steps=4)
+        oc.extract_from(ValueExtractor("a"))
+        oc.extract_from(FailingExtractor(dataset_key="b"))
+        oc.transform_with(AppendTransformer(["a"], "c", consume_inputs=False))
+
+        with self.assertRaises(ValueError):
+            oc.execute()
+
+    def test_dependencies(self):
+        steps = [
+            ValueExtractor("a"),
+            ValueExtractor("b"),
+            AppendTransformer(["a"], "c", consume_inputs=False),
+            SaveLoader({}, "b"),
+            SaveLoader({}, "c"),
+            # consumes a and c, must wait for everybody reading them
+            AppendTransformer(["a", "c"], "d", consume_inputs=True),
+            # a composite step depends on everything
+            CustomStep(),
+        ]
+
+        self.assertEqual(
+            {
+                0: set(),
+                1: set(),
+                2: {0},
+                3: {1},
+                4: {2},
+                5: {0, 2, 4},
+                6: {0, 1, 2, 3, 4, 5},
+            },
+            get_step_dependencies(steps),
+        )
+
+
+def make_pipeline(saved: dict, parallelism: int) -> Orchestrator:
+    oc = Orchestrator(max_parallel_steps=parallelism)
+    oc.extract_from(ValueExtractor("employees"))
+    oc.extract_from(ValueExtractor("birthdays"))
+    oc.transform_with(AppendTransformer(["employees"], "employees"))
+    oc.load_into(SaveLoader(saved, "employees"))
+    oc.transform_with(
+        AppendTransformer(["employees", "birthdays"], "joined", consume_inputs=False)
+    )
+    oc.transform_with(DropTransformer(["birthdays"], "unused"))
+    oc.load_into(SaveLoader(saved, "joined"))
+    return oc
+
+
+class ValueExtractor(Extractor):
+    def __init__(self, value: str):
+        super().__init__(dataset_key=value)
+        self.value = value
+
+    def read(self):
+        return self.value
+
+
+class BarrierExtractor(Extractor):
+    def __init__(self, barrier: threading.Barrier, dataset_key: str):
+        super().__init__(dataset_key=dataset_key)
+        self.barrier = barrier
+
+    def read(self):
+        self.barrier.wait()
+        return self.dataset_key
+
+
+class FailingExtractor(Extractor):
+    def read(self):
+        raise ValueError("extraction failed")
+
+
+class AppendTransformer(Transformer):
+    def __init__(self, input_keys, output_key, consume_inputs=True):
+        super().__init__(
+            dataset_input_keys=input_keys,
+            dataset_output_key=output_key,
+            consume_inputs=consume_inputs,
+        )
+
+    def process(self, df):
+        return df + "+"
+
+    def process_many(self, datasets: dataset_group):
+        return "+".join(datasets.values())
+
+
+class DropTransformer(AppendTransformer):
+    def process(self, df):
+        return None
+
+
+class SaveLoader(Loader):
+    def __init__(self, saved: dict, key: str):
+        super().__init__(dataset_input_keys=key)
+        self.saved = saved
+        self.key = key
+
+    def save(self, df):
+        self.saved[self.key] = df
+
+
+class CustomStep(EtlBase):
+    def etl(self, inputs: dataset_group) -> dataset_group:
+        return inputs
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from spetlr.etl import Orchestrator
+from spetlr.etl.profiling import StepProfiler
+from tests.local.etl.test_parallel_orchestrator import (
+    AppendTransformer,
+    SaveLoader,
+    ValueExtractor,
+)
+
+
+class StepProfilerTests(unittest.TestCase):
+    def test_profile_orchestrator(self):
+        for parallelism in [1, 4]:
+            oc = Orchestrator(max_parallel_steps=parallelism, profile_steps=True)
+            oc.extract_from(ValueExtractor("a"))
+            oc.extract_from(ValueExtractor("b"))
+            oc.transform_with(AppendTransformer(["a", "b"], "c"))
+            oc.load_into(SaveLoader({}, "c"))
+            oc.execute()
+
+            report = oc.step_profiler.get_report()
+
+            self.assertEqual(
+                [
+                    "ValueExtractor",
+                    "ValueExtractor",
+                    "AppendTransformer",
+                    "SaveLoader",
+                ],
+                [p.step_name for p in report],
+            )
+            self.assertEqual([0, 1, 2, 3], [p.step_index for p in report])
+            self.assertEqual(
+                [[], [], ["a", "b"], ["c"]],
+                [p.dataset_input_keys for p in report],
+            )
+            self.assertEqual(
+                [["a"], ["b"], ["c"], []],
+                [p.dataset_output_keys for p in report],
+            )
+            self.assertEqual(
+                [[], [], ["a", "b"], []],
+                [p.dataset_removed_keys for p in report],
+            )
+            self.assertTrue(all(p.duration_seconds >= 0 for p in report))
+
+    def test_profiling_is_opt_in(self):
+        oc = Orchestrator()
+        oc.extract_from(ValueExtractor("a"))
+        oc.execute()
+
+        self.assertIsNone(oc.step_profiler)
+
+    def test_profile_single_step(self):
+        profiler = StepProfiler()
+        result = profiler.run_step(ValueExtractor("a"), {})
+
+        self.assertEqual({"a": "a"}, result)
+        (profile,) = profiler.as_dicts()
+        self.assertEqual("ValueExtractor", profile["step_name"])
+        self.assertEqual(["a"], profile["dataset_output_keys"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
 import unittest
+from unittest.mock import patch
 
+from spetlr import Configurator
 from spetlr.sql import SqlExecutor
+from spetlr.sql.SqlExecutor import _get_statement_templates
 from tests.local.sql import sql
 
 
@@ -34,3 +37,37 @@ class TestSqlExecutor(unittest.TestCase):
         s = SqlExecutor(sql, statement_spliter=None, ignore_empty_folder=True)
         statements = list(s.get_statements("unknown"))
         self.assertEqual(len(statements), 0)
+
+    def test_07_statements_are_split_once(self):
+        _get_statement_templates.cache_clear()
+        s = SqlExecutor(sql)
+        statements = list(s.get_statements("*"))
+
+        with patch("spetlr.sql.SqlExecutor.parse") as parse:
+            self.assertEqual(list(s.get_statements("*")), statements)
+            parse.assert_not_called()
+
+    def test_08_replacements_follow_the_configurator(self):
+        c = Configurator()
+        c.register("MyReplacedTable", {"name": "my_db.tbl1"})
+        s = SqlExecutor()
+        raw_sql = "-- a comment\nSELECT * FROM {MyReplacedTable};\n-- {MyComment}"
+
+        self.assertEqual(
+            list(s.chop_and_substitute(raw_sql, {"MyComment": "only a comment"})),
+            ["-- a comment\nSELECT * FROM my_db.tbl1;"],
+        )
+        replacements = SqlExecutor._base_replacements
+
+        list(s.chop_and_substitute(raw_sql, {"MyComment": ""}))
+        self.assertIs(SqlExecutor._base_replacements, replacements)
+
+        c.register("MyReplacedTable", {"name": "my_db.tbl2"})
+        self.assertEqual(
+            list(s.chop_and_substitute(raw_sql, {"MyComment": ""})),
+            ["-- a comment\nSELECT * FROM my_db.tbl2;"],
+        )
+        self.assertIsNot(SqlExecutor._base_replacements, replacements)
+
+        with self.assertRaises(KeyError):
+            list(s.chop_and_substitute(raw_sql))
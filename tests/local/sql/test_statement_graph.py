@@ -0,0 +1,122 @@
+import threading
+import unittest
+
+from spetlr.sql import SqlExecutor
+from spetlr.sql.statement_graph import (
+    execute_concurrently,
+    get_statement_dependencies,
+    get_statement_footprint,
+)
+from tests.local.sql import sql
+
+
+class RecordingServer:
+    def __init__(self, fail_on: str = None):
+        self.executed = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def sql(self, statement: str) -> None:
+        if statement == self.fail_on:
+            raise ValueError(statement)
+        with self._lock:
+            self.executed.append(statement)
+
+
+class BarrierServer(RecordingServer):
+    """Only returns when two statements run at the same time."""
+
+    def __init__(self):
+        super().__init__()
+        self.barrier = threading.Barrier(2, timeout=10)
+
+    def sql(self, statement: str) -> None:
+        self.barrier.wait()
+        super().sql(statement)
+
+
+class TestStatementGraph(unittest.TestCase):
+    def test_01_footprints(self):
+        footprint = get_statement_footprint(
+            "CREATE OR REPLACE VIEW my_db.v AS "
+            "SELECT a.x, data FROM other_db.`My Table` a JOIN data ON a.id = data.id"
+        )
+        self.assertEqual(footprint.writes, {("my_db", "v")})
+        self.assertIn(("other_db", "my table"), footprint.reads)
+        self.assertIn(("data",), footprint.reads)
+
+        footprint = get_statement_footprint("DROP TABLE IF EXISTS my_db.tbl;")
+        self.assertEqual(footprint.writes, {("my_db", "tbl")})
+        self.assertEqual(footprint.reads, set())
+
+        # statements that change the session are barriers
+        self.assertIsNone(get_statement_footprint("USE my_db").writes)
+        self.assertIsNone(get_statement_footprint("SET x = 1").writes)
+
+    def test_02_dependencies(self):
+        statements = [
+            "CREATE DATABASE IF NOT EXISTS db1",
+            "CREATE DATABASE IF NOT EXISTS db2",
+            "CREATE TABLE db1.a (id int)",
+            "CREATE TABLE db2.b (id int)",
+            "CREATE VIEW db2.v AS SELECT * FROM db1.a JOIN db2.b USING (id)",
+            "ALTER TABLE db1.a ADD COLUMNS (x int)",
+            "USE db1",
+            "CREATE TABLE c (id int)",
+        ]
+        self.assertEqual(
+            get_statement_dependencies(statements),
+            {
+                0: set(),
+                1: set(),
+                2: {0},
+                3: {1},
+                4: {0, 1, 2, 3},
+                5: {0, 2, 4},
+                6: {0, 1, 2, 3, 4, 5},
+                7: {6},
+            },
+        )
+
+    def test_021_rename(self):
+        footprint = get_statement_footprint("ALTER TABLE db.a RENAME TO db.b")
+        self.assertEqual(footprint.writes, {("db", "a"), ("db", "b")})
+        self.assertEqual(footprint.reads, set())
+
+        statements = [
+            "ALTER TABLE db.a RENAME TO db.b",
+            "CREATE VIEW db.v AS SELECT * FROM db.b",
+            "INSERT INTO db.c SELECT * FROM db.b",
+        ]
+        self.assertEqual(
+            get_statement_dependencies(statements),
+            {0: set(), 1: {0}, 2: {0}},
+        )
+
+    def test_03_execute_concurrently(self):
+        server = BarrierServer()
+        execute_concurrently(
+            server, ["CREATE TABLE db.a (id int)", "CREATE TABLE db.b (id int)"], 2
+        )
+        self.assertEqual(len(server.executed), 2)
+
+    def test_04_first_error_is_raised(self):
+        statements = [
+            "CREATE TABLE db.a (id int)",
+            "CREATE TABLE db.b (id int)",
+            "INSERT INTO db.a SELECT * FROM db.b",
+        ]
+        server = RecordingServer(fail_on=statements[1])
+        with self.assertRaises(ValueError):
+            execute_concurrently(server, statements, 4)
+        self.assertEqual(server.executed, statements[:1])
+
+    def test_05_sql_executor(self):
+        serial = RecordingServer()
+        SqlExecutor(sql, server=serial).execute_sql_file("*")
+
+        parallel = RecordingServer()
+        SqlExecutor(sql, server=parallel, max_parallel_statements=4).execute_sql_file(
+            "*"
+        )
+        self.assertEqual(sorted(parallel.executed), sorted(serial.executed))
@@ -1,9 +1,12 @@
 import unittest
 from textwrap import dedent
 
+from more_itertools import peekable
 from pyspark.sql import types as t
 
-from spetlr.schema_manager.spark_schema import get_schema
+from spetlr.configurator.sql.init_sqlparse import parse
+from spetlr.configurator.sql.utils import _meaningful_token_iter
+from spetlr.schema_manager.spark_schema import _get_schema, _tokenize, get_schema
 
 
 class TestGetSchema(unittest.TestCase):
@@ -71,6 +74,43 @@ class TestGetSchema(unittest.TestCase):
             struct.json(),
         )
 
+    def test_02_same_as_sqlparse(self):
+        """The dedicated tokenizer gives the same schemas as the sqlparse lexer."""
+        for sql in [
+            "(`my col` string COMMENT 'it''s, -- fine', x bigint)",
+            dedent("""
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY (START WITH 1) NOT NULL,
+                v string DEFAULT concat('a', ',') COMMENT "c", -- comment, here
+                a array<struct<x:int,y:map<string,array<decimal(5,2)>>>> not null,
+                b dec(3,1) /* comment, there */ COMMENT 'b',
+                c int NULL
+                """),
+        ]:
+            (statement,) = parse(sql.strip().strip("()"))
+            expected = _get_schema(
+                peekable(_meaningful_token_iter(statement.flatten()))
+            )
+            self.assertEqual(
+                _get_schema(peekable(_tokenize(sql.strip().strip("()")))).json(),
+                expected.json(),
+            )
+            self.assertEqual(get_schema(sql).json(), expected.json())
+
+    def test_03_cached_schema_is_copied(self):
+        struct = get_schema("a int COMMENT 'a', b string")
+        struct.fields[0].metadata["comment"] = "changed"
+        struct.add("c", t.StringType())
+
+        self.assertEqual(
+            get_schema("a int COMMENT 'a', b string"),
+            t.StructType(
+                [
+                    t.StructField("a", t.IntegerType(), metadata={"comment": "a"}),
+                    t.StructField("b", t.StringType()),
+                ]
+            ),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
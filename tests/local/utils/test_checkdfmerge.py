@@ -0,0 +1,99 @@
+from pyspark.sql.types import (
+    IntegerType,
+    LongType,
+    MapType,
+    StringType,
+    StructField,
+    StructType,
+)
+from spetlrtools.testing import DataframeTestCase
+
+from spetlr.spark import Spark
+from spetlr.utils.CheckDfMerge import CheckDfMerge
+
+
+class TestCheckDfMerge(DataframeTestCase):
+    schema = StructType(
+        [
+            StructField("id", IntegerType(), True),
+            StructField("brand", StringType(), True),
+            StructField("tags", MapType(StringType(), StringType()), True),
+        ]
+    )
+
+    target_data = [
+        (1, "Fender", {"a": "1"}),
+        (2, "Gibson", None),
+        (3, None, {"b": "2"}),
+    ]
+
+    source_data = [
+        (1, "Fender", {"a": "1"}),  # unchanged
+        (2, None, None),  # changed to null
+        (3, None, {"b": "3"}),  # changed map
+        (4, "Ibanez", None),  # new
+    ]
+
+    def test_01_hash_matches_column_comparison(self):
+        df_target = Spark.get().createDataFrame(self.target_data, self.schema)
+        df = Spark.get().createDataFrame(self.source_data, self.schema)
+
+        expected = [
+            (2, None, None),
+            (3, None, {"b": "3"}),
+            (4, "Ibanez", None),
+        ]
+        for use_hash in [False, True]:
+            result, merge_required = CheckDfMerge(
+                df=df,
+                df_target=df_target,
+                join_cols=["id"],
+                avoid_cols=[],
+                use_hash=use_hash,
+            )
+            self.assertTrue(merge_required)
+            self.assertEqual(result.columns, df.columns)
+            self.assertDataframeMatches(result.orderBy("id"), None, expected)
+
+    def test_02_only_inserts(self):
+        df_target = Spark.get().createDataFrame(self.target_data, self.schema)
+        df = Spark.get().createDataFrame(
+            [(1, "Fender", {"a": "1"}), (5, "PRS", None)], self.schema
+        )
+
+        result, merge_required = CheckDfMerge(
+            df=df, df_target=df_target, join_cols=["id"], avoid_cols=[], use_hash=True
+        )
+        self.assertFalse(merge_required)
+        self.assertDataframeMatches(result, None, [(5, "PRS", None)])
+
+    def test_03_persisted_target_hash(self):
+        df = Spark.get().createDataFrame(self.source_data, self.schema)
+
+        # the first load persists the hash of all rows
+        empty_target = Spark.get().createDataFrame(
+            [],
+            StructType(
+                self.schema.fields + [StructField("row_hash", LongType(), True)]
+            ),
+        )
+        df_target, merge_required = CheckDfMerge(
+            df=df,
+            df_target=empty_target,
+            join_cols=["id"],
+            avoid_cols=[],
+            target_hash_col="row_hash",
+        )
+        self.assertFalse(merge_required)
+        self.assertEqual(df_target.columns, ["id", "brand", "tags", "row_hash"])
+
+        # loading the same rows again finds no changes
+        result, merge_required = CheckDfMerge(
+            df=df,
+            df_target=df_target,
+            join_cols=["id"],
+            avoid_cols=[],
+            target_hash_col="row_hash",
+        )
+        self.assertFalse(merge_required)
+        self.assertEqual(result.count(), 0)
@@ -105,6 +105,26 @@ class GetMergeStatementTest(unittest.TestCase):
 
         self.assertEqual(output, expected)
 
+    def test_get_merge_statement_with_target_predicate(self):
+        output = GetMergeStatement(
+            merge_statement_type="delta",
+            target_table_name="targetname",
+            source_table_name="sourcename",
+            join_cols=["col1"],
+            insert_cols=["col1", "col2"],
+            target_predicate="target.col2 IN (1, 2)",
+        )
+
+        expected = (
+            "MERGE INTO targetname AS target USING sourcename AS source "
+            "ON (source.col1 = target.col1) AND (target.col2 IN (1, 2)) "
+            "WHEN NOT MATCHED THEN "
+            "INSERT (col1, col2) "
+            "VALUES (source.col1, source.col2);"
+        )
+
+        self.assertEqual(output, expected)
+
 
 if __name__ == "__main__":
     unittest.main()